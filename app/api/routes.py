@@ -1,90 +1,377 @@
 """API路由"""
 
-import json
+import re
+import time
+import hashlib
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, AsyncIterator, Callable, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
 
 from app.core.logger import logger
 from app.core.config import settings
+from app.core.executor import run_blocking, iterate_blocking
+from app.core.admission import AdmissionRejected, get_admission
+from app.core.singleflight import AsyncSingleFlight
+from app.core import jsoncodec
+from app.core.jsoncodec import FastJSONResponse
 from app.services.document.parse_service import parse_markdown
-from app.services.document.nlp_service import analyze_full_document, extract_article_basic_info
-from app.services.document.image_service import extract_elements, analyze_elements
+from app.services.document.upload_service import UploadTooLargeError, receive_upload, process_upload
+from app.services.document.nlp_service import analyze_full_document, iter_full_document, extract_article_basic_info
+from app.services.document.image_service import extract_elements, analyze_elements, iter_image_analysis
 from app.services.document.outline_service import build_outline, analyze_outline
+from app.services.PowerPoint.deck_service import iter_build_deck
+from app.services.artifacts.artifact_store import save_artifact, load_artifact
+from app.services.jobs.job_service import STAGES, DONE, FAILED, submit_job, get_job
 
 router = APIRouter()
 
+# 整套输出目录名（位于 DECK_OUTPUT_DIR 下）
+DECK_NAME_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# 进行中的相同请求共享一次执行
+_request_flight = AsyncSingleFlight("api")
+
+# 流式响应格式
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _payload(data, **extra) -> dict:
+    return {"status": "ok", "data": data, **extra}
+
+
+def _ok(data, **extra) -> FastJSONResponse:
+    """成功响应（直接序列化，跳过 jsonable_encoder）"""
+    return FastJSONResponse(_payload(data, **extra))
+
+
+async def _coalesced(request: Request, work: Callable[[], Awaitable[dict]]) -> FastJSONResponse:
+    """合并相同的进行中请求: 以 Idempotency-Key，或 方法+路径+查询参数+请求体哈希 作为键
+    
+    work 返回响应内容（dict），每个请求各自构造响应对象。
+    """
+    if not settings.API_COALESCE_ENABLED:
+        return FastJSONResponse(await work())
+    
+    idem = request.headers.get("idempotency-key")
+    if idem:
+        key = (request.url.path, "idempotency-key", idem)
+    else:
+        digest = hashlib.sha256(await request.body())
+        digest.update(str(sorted(request.query_params.multi_items())).encode())
+        key = (request.method, request.url.path, digest.hexdigest())
+    return FastJSONResponse(await _request_flight.do(key, work))
+
+
+async def _resolve(inline, artifact_id: Optional[str], name: str):
+    """取内联数据，或按产物ID从服务端存储加载"""
+    if inline is not None:
+        return inline
+    if artifact_id:
+        data = await run_blocking(load_artifact, artifact_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"Artifact not found: {artifact_id}")
+        return data
+    raise HTTPException(status_code=422, detail=f"{name} or {name}_id required")
+
+
+async def _admit() -> Callable[[], None]:
+    """占用一个流水线准入槽位，返回幂等的释放函数；无法获得时返回429"""
+    admission = get_admission()
+    try:
+        await admission.acquire()
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    start = time.perf_counter()
+    released = False
+    
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            admission.release(time.perf_counter() - start)
+    
+    return release
+
+
+@asynccontextmanager
+async def _admitted():
+    """async with 形式的准入控制，用于耗时的流水线接口"""
+    release = await _admit()
+    try:
+        yield
+    finally:
+        release()
+
+
+class _ClosingStream(StreamingResponse):
+    """响应结束（含客户端断开）后执行 on_close"""
+    
+    def __init__(self, *args, on_close: Callable[[], None], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_close = on_close
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+
+def _encode_event(event: dict, fmt: str) -> bytes:
+    """编码单条流式记录: NDJSON 一行一条；SSE 以 event 命名，data 为同样的记录"""
+    data = jsoncodec.dumps_bytes(event)
+    if fmt == "sse":
+        return b"event: %s\ndata: %s\n\n" % (event["event"].encode(), data)
+    return data + b"\n"
+
+
+def _stream(events: AsyncIterator[dict], fmt: str, name: str, on_close: Callable[[], None]) -> StreamingResponse:
+    """将事件流包装为 NDJSON/SSE 响应，中途异常以 error 事件结束，流结束后执行 on_close"""
+    if fmt not in STREAM_MEDIA_TYPES:
+        on_close()
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {fmt}")
+    
+    async def body():
+        try:
+            async for event in events:
+                yield _encode_event(event, fmt)
+        except Exception as e:
+            logger.error(f"[API] {name} stream error: {e}")
+            yield _encode_event({"event": "error", "data": {"detail": str(e)}}, fmt)
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return _ClosingStream(body(), media_type=STREAM_MEDIA_TYPES[fmt], headers=headers, on_close=on_close)
+
+
+UPLOAD_SCHEMA = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"],
+    "properties": {"file": {"type": "string", "format": "binary"}}
+}}}}}
+
+
+@router.post("/documents", openapi_extra=UPLOAD_SCHEMA)
+async def api_upload_document(request: Request, parse: bool = True):
+    """上传PDF（multipart 字段 file），流式落盘后提交MinerU解析，返回文档句柄"""
+    logger.info("[API] documents upload")
+    length = request.headers.get("content-length")
+    async with _admitted():
+        try:
+            upload = await receive_upload(request.headers.get("content-type", ""), request.stream(),
+                                          int(length) if length and length.isdigit() else None)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        try:
+            return _ok(await process_upload(upload, parse))
+        except Exception as e:
+            logger.error(f"[API] documents error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.post("/parse")
-async def api_parse(md_path: str, json_path: Optional[str] = None):
-    """解析Markdown文档"""
+async def api_parse(md_path: str, json_path: Optional[str] = None, inline: bool = True):
+    """解析Markdown文档，结果存为产物并返回 artifact_id"""
     logger.info(f"[API] parse: {md_path}")
     try:
-        result = parse_markdown(md_path, json_path)
-        return {"status": "ok", "data": result}
+        result = await run_blocking(parse_markdown, md_path, json_path)
+        artifact_id = await run_blocking(save_artifact, result)
+        return _ok(result if inline else None, artifact_id=artifact_id)
     except Exception as e:
         logger.error(f"[API] parse error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/analyze/basic")
-async def api_analyze_basic(parse_result: dict):
+async def api_analyze_basic(request: Request, parse_result: Optional[dict] = None,
+                            parse_result_id: Optional[str] = None):
     """提取文章基础信息"""
     logger.info("[API] analyze/basic")
-    try:
-        result = extract_article_basic_info(parse_result)
-        return {"status": "ok", "data": result}
-    except Exception as e:
-        logger.error(f"[API] analyze/basic error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    parse_result = await _resolve(parse_result, parse_result_id, "parse_result")
+    
+    async def work():
+        try:
+            return _payload(await run_blocking(extract_article_basic_info, parse_result))
+        except Exception as e:
+            logger.error(f"[API] analyze/basic error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    return await _coalesced(request, work)
 
 
 @router.post("/analyze/full")
-async def api_analyze_full(parse_result: dict, abstract: str = ""):
-    """完整文档分析"""
+async def api_analyze_full(request: Request, parse_result: Optional[dict] = None, abstract: str = "",
+                           parse_result_id: Optional[str] = None):
+    """完整文档分析，结果存为产物"""
     logger.info("[API] analyze/full")
-    try:
-        result = analyze_full_document(parse_result, abstract)
-        return {"status": "ok", "data": result}
-    except Exception as e:
-        logger.error(f"[API] analyze/full error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    parse_result = await _resolve(parse_result, parse_result_id, "parse_result")
+    
+    async def work():
+        async with _admitted():
+            try:
+                result = await run_blocking(analyze_full_document, parse_result, abstract)
+                artifact_id = await run_blocking(save_artifact, result)
+                return _payload(result, artifact_id=artifact_id)
+            except Exception as e:
+                logger.error(f"[API] analyze/full error: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+    
+    return await _coalesced(request, work)
+
+
+@router.post("/analyze/full/stream")
+async def api_analyze_full_stream(parse_result: Optional[dict] = None, abstract: str = "",
+                                  parse_result_id: Optional[str] = None,
+                                  fmt: str = Query("ndjson", alias="format")):
+    """流式完整文档分析: 每完成一个章节输出一条，最后输出 statistics（附 artifact_id）"""
+    logger.info(f"[API] analyze/full/stream ({fmt})")
+    parse_result = await _resolve(parse_result, parse_result_id, "parse_result")
+    
+    async def events():
+        result = {"sections_analysis": [], "metadata": parse_result.get("metadata", {})}
+        async for event in iterate_blocking(iter_full_document(parse_result, abstract)):
+            if event["event"] == "basic_info":
+                result["basic_info"] = event["data"]
+            elif event["event"] == "section":
+                result["sections_analysis"].append(event["data"])
+            else:
+                result["statistics"] = event["data"]
+                event = {**event, "artifact_id": await run_blocking(save_artifact, result)}
+            yield event
+    
+    return _stream(events(), fmt, "analyze/full", await _admit())
 
 
 @router.post("/analyze/images")
-async def api_analyze_images(parse_result: dict, base_path: Optional[str] = None):
-    """图表分析"""
+async def api_analyze_images(request: Request, parse_result: Optional[dict] = None,
+                             base_path: Optional[str] = None, parse_result_id: Optional[str] = None):
+    """图表分析，结果存为产物"""
     logger.info("[API] analyze/images")
-    try:
-        elements = extract_elements(parse_result)
-        bp = Path(base_path) if base_path else None
-        result = analyze_elements(elements, bp)
-        return {"status": "ok", "data": result}
-    except Exception as e:
-        logger.error(f"[API] analyze/images error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    parse_result = await _resolve(parse_result, parse_result_id, "parse_result")
+    
+    async def work():
+        async with _admitted():
+            try:
+                elements = await run_blocking(extract_elements, parse_result)
+                bp = Path(base_path) if base_path else None
+                result = await run_blocking(analyze_elements, elements, bp)
+                artifact_id = await run_blocking(save_artifact, result)
+                return _payload(result, artifact_id=artifact_id)
+            except Exception as e:
+                logger.error(f"[API] analyze/images error: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+    
+    return await _coalesced(request, work)
+
+
+@router.post("/analyze/images/stream")
+async def api_analyze_images_stream(parse_result: Optional[dict] = None, base_path: Optional[str] = None,
+                                    parse_result_id: Optional[str] = None,
+                                    fmt: str = Query("ndjson", alias="format")):
+    """流式图表分析: 每完成一个元素输出一条，最后输出 statistics（附 artifact_id）"""
+    logger.info(f"[API] analyze/images/stream ({fmt})")
+    parse_result = await _resolve(parse_result, parse_result_id, "parse_result")
+    bp = Path(base_path) if base_path else None
+    
+    async def events():
+        result = []
+        async for event in iterate_blocking(iter_image_analysis(parse_result, bp)):
+            if event["event"] == "element":
+                result.append(event["data"])
+            else:
+                event = {**event, "artifact_id": await run_blocking(save_artifact, result)}
+            yield event
+    
+    return _stream(events(), fmt, "analyze/images", await _admit())
 
 
 @router.post("/outline/build")
-async def api_outline_build(parse_result: dict, text_analysis: list, visual_analysis: list):
+async def api_outline_build(parse_result: Optional[dict] = Body(default=None),
+                            visual_analysis: Optional[list] = Body(default=None),
+                            parse_result_id: Optional[str] = None,
+                            visual_analysis_id: Optional[str] = None):
     """构建大纲输入"""
     logger.info("[API] outline/build")
+    parse_result = await _resolve(parse_result, parse_result_id, "parse_result")
+    visual_analysis = await _resolve(visual_analysis, visual_analysis_id, "visual_analysis")
     try:
-        result = build_outline(parse_result, text_analysis, visual_analysis)
-        return {"status": "ok", "data": result}
+        result = await run_blocking(build_outline, parse_result, visual_analysis)
+        return _ok(result)
     except Exception as e:
         logger.error(f"[API] outline/build error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/outline/analyze")
-async def api_outline_analyze(outline_inputs: list):
+async def api_outline_analyze(request: Request, outline_inputs: list):
     """大纲分析"""
     logger.info("[API] outline/analyze")
+    
+    async def work():
+        async with _admitted():
+            try:
+                return _payload(await run_blocking(analyze_outline, outline_inputs))
+            except Exception as e:
+                logger.error(f"[API] outline/analyze error: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+    
+    return await _coalesced(request, work)
+
+
+@router.post("/deck/stream")
+async def api_deck_stream(md_path: str, json_path: Optional[str] = None,
+                          basic_info: Optional[dict] = Body(default=None), deck_name: Optional[str] = None,
+                          fmt: str = Query("ndjson", alias="format")):
+    """渐进式生成整套页面: 大纲每完成一个章节即渲染写入并输出一条 pages，最后输出 done（含清单路径）
+    
+    输出目录固定在 DECK_OUTPUT_DIR 下，deck_name 仅允许字母、数字、下划线与连字符（默认使用 deck_id）。
+    """
+    logger.info(f"[API] deck/stream ({fmt}): {md_path}")
+    output_dir = None
+    if deck_name is not None:
+        if not DECK_NAME_RE.fullmatch(deck_name):
+            raise HTTPException(status_code=400, detail=f"Invalid deck_name: {deck_name}")
+        output_dir = str(Path(settings.DECK_OUTPUT_DIR) / deck_name)
+    events = iterate_blocking(iter_build_deck(md_path, json_path, basic_info, output_dir))
+    return _stream(events, fmt, "deck", await _admit())
+
+
+@router.post("/jobs")
+async def api_job_submit(stage: str = Body(...), params: dict = Body(default={})):
+    """提交异步任务"""
+    logger.info(f"[API] jobs submit: {stage}")
+    if stage not in STAGES:
+        raise HTTPException(status_code=400, detail=f"Unknown stage: {stage}, available: {list(STAGES)}")
     try:
-        result = analyze_outline(outline_inputs)
-        return {"status": "ok", "data": result}
+        job_id = await submit_job(stage, params)
+        return _ok({"job_id": job_id, "state": "queued"})
     except Exception as e:
-        logger.error(f"[API] outline/analyze error: {e}")
+        logger.error(f"[API] jobs submit error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+async def api_job_status(job_id: str):
+    """查询任务状态与进度"""
+    job = await run_blocking(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return _ok(job)
+
+
+@router.get("/jobs/{job_id}/result")
+async def api_job_result(job_id: str):
+    """获取任务结果"""
+    job = await run_blocking(get_job, job_id, True)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job["state"] == FAILED:
+        raise HTTPException(status_code=500, detail=job.get("error") or "Job failed")
+    if job["state"] != DONE:
+        raise HTTPException(status_code=409, detail=f"Job not finished: {job['state']}")
+    return _ok(job["result"])
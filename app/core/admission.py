@@ -0,0 +1,120 @@
+"""准入控制: 限制单进程并发流水线数，超出部分排队，队列满或等待超时快速拒绝"""
+
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT
+
+TAG = "[ADMISSION]"
+
+
+class AdmissionRejected(Exception):
+    """无法获得执行槽位（队列已满或排队超时）"""
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """并发槽位 + 有界FIFO等待队列
+    
+    Args:
+        max_concurrent: 同时执行的流水线数
+        max_queue: 最多排队的请求数，超出立即拒绝
+        timeout: 单个请求最长排队秒数
+        retry_after: 尚无耗时统计时建议的重试秒数
+    """
+    
+    def __init__(self, max_concurrent: int, max_queue: int, timeout: float, retry_after: int = 10):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.default_retry_after = retry_after
+        self.active = 0
+        self._waiters = deque()
+        self._avg_hold: Optional[float] = None  # 单个槽位平均占用秒数(EWMA)
+    
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+    
+    def retry_after(self) -> int:
+        """按平均占用时长估算排到槽位所需秒数"""
+        if self._avg_hold is None:
+            return self.default_retry_after
+        return max(1, math.ceil(self._avg_hold * (self.waiting + 1) / self.max_concurrent))
+    
+    def _reject(self, reason: str) -> AdmissionRejected:
+        ADMISSION_REJECTED.labels(reason).inc()
+        logger.warning(f"{TAG} rejected ({reason}): active={self.active}, waiting={self.waiting}")
+        return AdmissionRejected(reason, self.retry_after())
+    
+    def _sync_gauges(self):
+        ADMISSION_ACTIVE.set(self.active)
+        ADMISSION_QUEUE_DEPTH.set(self.waiting)
+    
+    async def acquire(self) -> float:
+        """获取槽位，返回排队秒数；无法获取时抛出 AdmissionRejected"""
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self._sync_gauges()
+            ADMISSION_WAIT.observe(0)
+            return 0.0
+        
+        if self.waiting >= self.max_queue:
+            raise self._reject("queue_full")
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._sync_gauges()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(fut, self.timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("timeout")
+        except asyncio.CancelledError:
+            # 槽位已移交但请求被取消（客户端断开），归还槽位
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+            self._sync_gauges()
+        
+        waited = time.perf_counter() - start
+        ADMISSION_WAIT.observe(waited)
+        return waited
+    
+    def release(self, held: Optional[float] = None):
+        """归还槽位并唤醒队首等待者（槽位直接移交，不会被新请求插队）"""
+        if held is not None:
+            self._avg_hold = held if self._avg_hold is None else 0.8 * self._avg_hold + 0.2 * held
+        
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                self._sync_gauges()
+                return
+        self.active -= 1
+        self._sync_gauges()
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """获取流水线准入控制器（首次调用时按配置创建）"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(settings.ADMISSION_MAX_CONCURRENT, settings.ADMISSION_MAX_QUEUE,
+                                          settings.ADMISSION_QUEUE_TIMEOUT, settings.ADMISSION_RETRY_AFTER)
+    return _controller
@@ -0,0 +1,202 @@
+"""HTTP压缩中间件: 响应按 Accept-Encoding 协商 br/gzip，请求体支持 gzip"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+# 不压缩的内容类型（已压缩或需要实时推送）
+SKIP_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip",
+              "text/event-stream", "application/vnd.openxmlformats")
+
+
+class _Encoder:
+    """gzip / brotli 增量编码器"""
+    
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            out = self._c.process(data)
+            return out + self._c.flush() if flush else out
+        out = self._c.compress(data)
+        return out + self._c.flush(zlib.Z_SYNC_FLUSH) if flush else out
+    
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._c.finish()
+        return self._c.flush(zlib.Z_FINISH)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """选择响应编码: 客户端接受且可用时优先 br，其次 gzip"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    
+    if brotli and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """响应压缩 + gzip请求体解压
+    
+    Args:
+        minimum_size: 小于该字节数的响应不压缩
+        gzip_level: gzip压缩级别
+        brotli_quality: brotli质量（安装 brotli 时生效）
+        max_body_size: 解压后请求体上限，超出返回413
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4, max_body_size: int = 50 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        if headers.get("content-encoding", "").lower() == "gzip":
+            try:
+                scope, receive = await self._decode_request(scope, receive)
+            except ValueError as e:
+                await self._reject(send, 413 if "too large" in str(e) else 400, str(e))
+                return
+        
+        encoding = negotiate(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        responder = _Responder(self, encoding, send)
+        await self.app(scope, receive, responder)
+    
+    async def _decode_request(self, scope: Scope, receive: Receive):
+        """读取并解压gzip请求体，返回替换后的 scope/receive"""
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = d.decompress(b"".join(chunks), self.max_body_size + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid gzip body: {e}")
+        if len(body) > self.max_body_size or d.unconsumed_tail:
+            raise ValueError("Request body too large")
+        
+        raw = [(k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")]
+        raw.append((b"content-length", str(len(body)).encode()))
+        scope["headers"] = raw  # 原地修改: 下游写入的 scope["route"] 需对外层中间件可见
+        
+        sent = False
+        
+        async def replay() -> Message:
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        
+        return scope, replay
+    
+    @staticmethod
+    async def _reject(send: Send, status: int, detail: str):
+        body = ('{"detail":"%s"}' % detail.replace('"', "'")).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+class _Responder:
+    """拦截响应消息并按需压缩"""
+    
+    def __init__(self, mw: CompressionMiddleware, encoding: str, send: Send):
+        self.mw = mw
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+    
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            ctype = headers.get("content-type", "")
+            if "content-encoding" in headers or any(ctype.startswith(t) for t in SKIP_TYPES):
+                self.passthrough = True
+            return
+        
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        
+        if self.passthrough:
+            if self.start is not None:
+                await self.send(self.start)
+                self.start = None
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more and len(body) < self.mw.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            
+            self.encoder = _Encoder(self.encoding, self.mw.gzip_level, self.mw.brotli_quality)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more:
+                del headers["Content-Length"]
+                await self.send(start)
+            else:
+                data = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(data))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+        
+        # 流式响应: 每个分块立即刷新，保证逐条可见
+        data = self.encoder.compress(body, flush=more)
+        if not more:
+            data += self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more})
@@ -2,7 +2,7 @@
 
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -35,6 +35,73 @@ class Settings(BaseSettings):
     MINERU_UPLOAD_URL: str = "https://mineru.net/api/v4/file-urls/batch"
     MINERU_RESULT_URL: str = "https://mineru.net/api/v4/extract-results/batch"
     MINERU_POLL_INTERVAL: int = 10
+    MINERU_EXTRACT_PATTERNS: List[str] = ["full.md", "*content_list.json"]  # 解压白名单，引用的图片自动加入
+    MINERU_EXTRACT_ALL: bool = False
+    MINERU_CACHE_ENABLED: bool = True
+    MINERU_CACHE_DIR: str = "downloads/.mineru_cache"
+    MINERU_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    MINERU_JOURNAL_PATH: str = "downloads/mineru_journal.db"
+    MINERU_RESUME_ON_STARTUP: bool = True
+    MINERU_JOURNAL_LEASE: int = 60  # 批次心跳超过该秒数未刷新时，其他进程可认领续跑
+    MINERU_POLL_TIMEOUT: int = 3600  # 批次提交后等待结果的最长秒数，超时（含续跑时已超龄）记为失败
+    MINERU_BATCH_MAX_FILES: int = 50
+    MINERU_BATCH_MAX_BYTES: int = 500 * 1024 * 1024
+    MINERU_MAX_CONCURRENT_BATCHES: int = 4
+    MINERU_POOL_SIZE: int = 20
+    MINERU_POOL_SIZE_PER_HOST: int = 10
+    
+    # 并发
+    API_WORKER_THREADS: int = 8  # 路由中同步耗时任务的线程池大小
+    
+    # 准入控制（单进程同时执行的流水线请求数、排队上限与排队超时秒数）
+    ADMISSION_MAX_CONCURRENT: int = 4
+    ADMISSION_MAX_QUEUE: int = 16
+    ADMISSION_QUEUE_TIMEOUT: float = 30.0
+    ADMISSION_RETRY_AFTER: int = 10  # 尚无耗时统计时返回的 Retry-After
+    
+    # 请求合并（相同的进行中请求只执行一次）
+    API_COALESCE_ENABLED: bool = True  # 按 Idempotency-Key 或请求体哈希合并API请求
+    DIFY_COALESCE_ENABLED: bool = True  # 按 (llm_id, prompt) 合并 Dify workflow 调用
+    
+    # 异步任务
+    JOB_DB_PATH: str = "outputs/jobs.db"
+    JOB_WORKERS: int = 4
+    JOB_DEFAULT_CONCURRENCY: int = 2
+    JOB_LEASE: int = 60  # 任务心跳超过该秒数未刷新时，其他worker认领重跑
+    JOB_STAGE_CONCURRENCY: Dict[str, int] = {"process_document": 1, "analyze_full": 2,
+                                             "analyze_images": 2, "outline_analyze": 2}
+    
+    # 监控
+    METRICS_ENABLED: bool = True  # 暴露 /metrics（Prometheus 文本格式）
+    
+    # 压缩
+    COMPRESS_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESS_GZIP_LEVEL: int = 6
+    COMPRESS_BROTLI_QUALITY: int = 4
+    
+    # 版式渲染
+    DECK_OUTPUT_DIR: str = "outputs/decks"
+    LAYOUT_RENDER_WORKERS: int = 4  # render_deck 并行渲染/写入线程数
+    LAYOUT_TEMPLATE_CACHE_DIR: str = "outputs/.template_cache"  # Jinja字节码缓存，空字符串禁用
+    LAYOUT_TEMPLATE_AUTO_RELOAD: Optional[bool] = None  # 模板修改后自动重载，未配置时跟随 DEBUG
+    LAYOUT_RENDER_CACHE_ENABLED: bool = True  # 按 (模板, 模板版本, 变量哈希) 复用页面渲染结果
+    LAYOUT_RENDER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LAYOUT_RENDER_CACHE_DIR: str = ""  # 磁盘层目录，空字符串禁用
+    LAYOUT_RENDER_CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+    
+    # 图片派生资源（按内容哈希缓存的缩放图: 幻灯片展示与Dify上传）
+    IMAGE_ASSET_ENABLED: bool = True
+    IMAGE_ASSET_DIR: str = "outputs/.image_assets"
+    IMAGE_ASSET_MAX_BYTES: int = 1024 * 1024 * 1024
+    IMAGE_ASSET_WORKERS: int = 4  # 生成派生图的进程数，0 表示在当前线程生成
+    IMAGE_DISPLAY_MAX_SIDE: int = 1600  # 幻灯片展示图最长边
+    IMAGE_LLM_MAX_SIDE: int = 1024  # 上传给视觉模型的图片最长边
+    IMAGE_JPEG_QUALITY: int = 85
+    
+    # 产物存储
+    ARTIFACT_DIR: str = "outputs/artifacts"
+    ARTIFACT_MAX_BYTES: int = 1024 * 1024 * 1024
+    ARTIFACT_COMPRESS_LEVEL: int = 6
     
     # 限制
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024
@@ -0,0 +1,114 @@
+"""磁盘LRU: 以修改时间记录最近访问，超出容量时按最近访问时间淘汰（各磁盘缓存共用）"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from app.core.logger import logger
+
+TMP_SUFFIX = ".tmp"  # 写入中的临时文件，淘汰时忽略
+
+# 条目 -> (最近访问时间, 大小)；返回 None 表示不是有效条目
+EntryStat = Callable[[Path], Optional[Tuple[float, int]]]
+
+
+def touch(path: Path) -> bool:
+    """刷新访问时间；条目已被淘汰时返回 False"""
+    now = time.time()
+    try:
+        os.utime(path, (now, now))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def tmp_path(path: Path) -> Path:
+    """同目录下的临时路径（进程与线程唯一）"""
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}")
+
+
+def atomic_write(path: Path, data: bytes):
+    """写入同目录临时文件后原子替换，并刷新访问时间"""
+    tmp = tmp_path(path)
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    touch(path)
+
+
+def _file_stat(path: Path) -> Optional[Tuple[float, int]]:
+    st = path.stat()
+    return st.st_mtime, st.st_size
+
+
+def _unlink(path: Path):
+    path.unlink(missing_ok=True)
+
+
+class DiskLRU:
+    """目录中的缓存条目，总大小增量统计，超出上限时淘汰最久未访问的条目
+    
+    Args:
+        root: 缓存目录
+        max_bytes: 容量上限
+        pattern: 条目的 glob 模式（相对 root）
+        tag: 日志前缀
+        stat: 条目的 (访问时间, 大小)，默认取文件自身
+        remove: 删除条目，默认删除文件
+    """
+    
+    def __init__(self, root: Path, max_bytes: int, pattern: str = "*", tag: str = "[LRU]",
+                 stat: Optional[EntryStat] = None, remove: Optional[Callable[[Path], None]] = None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.pattern = pattern
+        self.tag = tag
+        self._stat = stat or _file_stat
+        self._remove = remove or _unlink
+        self._size: Optional[int] = None  # 首次淘汰扫描时统计
+        self.lock = threading.Lock()  # 淘汰期间持有，读取条目内容时可同样持有以免被中途删除
+    
+    def added(self, size: int):
+        """登记新写入的条目，超出上限时淘汰"""
+        with self.lock:
+            if self._size is not None:
+                self._size += size
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self.evict()
+    
+    def evict(self) -> int:
+        """按最近访问时间淘汰，直到总大小不超过上限，返回淘汰数"""
+        if not self.root.exists():
+            return 0
+        
+        with self.lock:
+            entries = []
+            for path in self.root.glob(self.pattern):
+                if path.name.endswith(TMP_SUFFIX):
+                    continue
+                try:
+                    info = self._stat(path)
+                except FileNotFoundError:
+                    continue
+                if info is not None:
+                    entries.append((info[0], info[1], path))
+            
+            total = sum(e[1] for e in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+            self._size = total
+        
+        if removed:
+            logger.info(f"{self.tag} evicted {removed} entries, total={total}")
+        return removed
@@ -0,0 +1,46 @@
+"""阻塞任务线程池"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from app.core.config import settings
+from app.core.metrics import EXECUTOR_IN_FLIGHT
+
+_executor: Optional[ThreadPoolExecutor] = None
+_END = object()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """获取专用线程池（首次调用时创建）"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.API_WORKER_THREADS,
+                                       thread_name_prefix="keenpoint-worker")
+    return _executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """在专用线程池中执行同步函数，避免阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    with EXECUTOR_IN_FLIGHT.track():
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def iterate_blocking(iterable: Iterable) -> AsyncIterator:
+    """在专用线程池中逐项推进同步迭代器（用于流式响应）"""
+    iterator = iter(iterable)
+    while True:
+        item = await run_blocking(next, iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+def shutdown_executor(wait: bool = False):
+    """关闭线程池"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,50 @@
+"""JSON编解码: 优先使用orjson，未安装时回退标准库"""
+
+import json
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """序列化为UTF-8字节（紧凑格式，不转义非ASCII；sort_keys 用于生成稳定的哈希输入）
+    
+    含孤立代理字符（PDF提取文本中常见）的内容无法编码为UTF-8，此时退回 ASCII 转义输出。
+    """
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTS | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+        except TypeError:
+            pass
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+    except UnicodeEncodeError:
+        return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode("ascii")
+
+
+def dumps(obj: Any) -> str:
+    """序列化为字符串，等价于 json.dumps(obj, ensure_ascii=False) 的紧凑形式"""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """反序列化，解析失败抛出 ValueError"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 dumps_bytes 渲染的JSON响应"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,342 @@
+"""进程内指标: Counter / Gauge / Histogram 与 Prometheus 文本格式导出"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认耗时分桶（秒），覆盖毫秒级路由到分钟级LLM/MinerU调用
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Registry:
+    """指标注册表"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+    
+    def get(self, name: str) -> Optional["_Metric"]:
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        """导出 Prometheus 文本格式"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+    
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_func", "_lock")
+    
+    def __init__(self):
+        self._value = 0.0
+        self._func: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def value(self) -> float:
+        return self._func() if self._func else self._value
+    
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+    
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+    
+    def set(self, value: float):
+        self._value = value
+    
+    def set_function(self, func: Callable[[], float]):
+        """导出时调用 func 取值（用于派生指标）"""
+        self._func = func
+    
+    def track(self) -> "_InFlight":
+        """上下文管理器: 进入时+1，退出时-1"""
+        return _InFlight(self)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        idx = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+    
+    def time(self) -> "_Timer":
+        """上下文管理器: 记录代码块耗时（秒）"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+    
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _InFlight:
+    __slots__ = ("child",)
+    
+    def __init__(self, child: _GaugeChild):
+        self.child = child
+    
+    def __enter__(self):
+        self.child.inc()
+        return self
+    
+    def __exit__(self, *exc):
+        self.child.dec()
+
+
+class _Metric:
+    """带标签的指标基类，子指标按标签值缓存"""
+    
+    kind = ""
+    
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+    
+    def labels(self, *values):
+        """按标签值取子指标（首次访问时创建）"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def _items(self) -> List[tuple]:
+        with self._lock:
+            return sorted(self._children.items())
+    
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {_fmt(c.value)}" for k, c in self._items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    
+    def _new_child(self):
+        return _GaugeChild()
+    
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+    
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+    
+    def set(self, value: float):
+        self.labels().set(value)
+    
+    def track(self) -> _InFlight:
+        return self.labels().track()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, doc, labels, registry)
+    
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+    
+    def observe(self, value: float):
+        self.labels().observe(value)
+    
+    def time(self) -> _Timer:
+        return self.labels().time()
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in self._items():
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.bounds + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+# ==================== 应用指标 ====================
+
+HTTP_LATENCY = Histogram("keenpoint_http_request_duration_seconds", "HTTP请求耗时",
+                         ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("keenpoint_http_requests_in_flight", "处理中的HTTP请求数")
+UPSTREAM_LATENCY = Histogram("keenpoint_upstream_duration_seconds", "上游调用耗时（Dify按llm_id区分）",
+                             ("service", "call"))
+UPSTREAM_ERRORS = Counter("keenpoint_upstream_errors_total", "上游调用失败次数", ("service", "call"))
+EXECUTOR_IN_FLIGHT = Gauge("keenpoint_executor_tasks_in_flight", "专用线程池中执行的阻塞任务数")
+JOBS_RUNNING = Gauge("keenpoint_jobs_running", "运行中的异步任务数", ("stage",))
+MINERU_BATCHES_ACTIVE = Gauge("keenpoint_mineru_batches_active", "进行中的MinerU批次数")
+CACHE_LOOKUPS = Counter("keenpoint_cache_lookups_total", "缓存查询次数", ("cache", "result"))
+CACHE_HIT_RATIO = Gauge("keenpoint_cache_hit_ratio", "缓存命中率（累计）", ("cache",))
+STAGE_DURATION = Histogram("keenpoint_stage_duration_seconds", "流水线阶段耗时", ("pipeline", "stage"))
+PARSE_SECONDS_PER_MB = Histogram("keenpoint_parse_seconds_per_mb", "Markdown解析耗时（秒/MB）",
+                                 buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+ADMISSION_ACTIVE = Gauge("keenpoint_admission_active", "占用准入槽位的流水线请求数")
+ADMISSION_QUEUE_DEPTH = Gauge("keenpoint_admission_queue_depth", "等待准入槽位的请求数")
+ADMISSION_WAIT = Histogram("keenpoint_admission_wait_seconds", "准入排队耗时")
+ADMISSION_REJECTED = Counter("keenpoint_admission_rejected_total", "准入拒绝次数（429）", ("reason",))
+SINGLEFLIGHT_CALLS = Counter("keenpoint_singleflight_calls_total",
+                            "合并调用次数（executed=实际执行，shared=复用进行中的执行）", ("scope", "outcome"))
+
+
+def record_cache(cache: str, hit: bool):
+    """记录一次缓存查询，首次出现的缓存自动导出命中率"""
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+    ratio = CACHE_HIT_RATIO.labels(cache)
+    if ratio._func is None:
+        hits, misses = CACHE_LOOKUPS.labels(cache, "hit"), CACHE_LOOKUPS.labels(cache, "miss")
+        ratio.set_function(lambda: hits.value / ((hits.value + misses.value) or 1))
+
+
+def observe_upstream(service: str, call: str, seconds: float, error: bool = False):
+    """记录一次上游调用"""
+    UPSTREAM_LATENCY.labels(service, call).observe(seconds)
+    if error:
+        UPSTREAM_ERRORS.labels(service, call).inc()
+
+
+@contextmanager
+def upstream_timer(service: str, call: str):
+    """上游调用计时，异常时同时计入错误数
+    
+    Usage:
+        with upstream_timer("dify", "llm_1"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        observe_upstream(service, call, time.perf_counter() - start, error=True)
+        raise
+    observe_upstream(service, call, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """按路由模板记录请求耗时与并发数（未匹配路由归入 <unmatched>，避免标签爆炸）"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = [500]
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            HTTP_LATENCY.labels(scope["method"], path, status[0]).observe(time.perf_counter() - start)
+
+
+def render() -> str:
+    """导出全部指标"""
+    return REGISTRY.render()
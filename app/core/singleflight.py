@@ -0,0 +1,88 @@
+"""Single-flight: 相同键的并发调用只执行一次，其余调用等待并共享结果"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.metrics import SINGLEFLIGHT_CALLS
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """线程版（用于线程池中的同步上游调用）
+    
+    Args:
+        name: 指标标签
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """执行 fn；若相同 key 正在执行则等待其结果（异常同样共享）"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            SINGLEFLIGHT_CALLS.labels(self.name, "shared").inc()
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        SINGLEFLIGHT_CALLS.labels(self.name, "executed").inc()
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """协程版（用于API请求合并）
+    
+    共享执行在独立任务中运行，发起者断开连接不会取消其他等待者的执行。
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+    
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            SINGLEFLIGHT_CALLS.labels(self.name, "shared").inc()
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.name, "executed").inc()
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+    
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # 等待者均已断开时避免 "exception was never retrieved" 告警
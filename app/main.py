@@ -1,17 +1,29 @@
 """KeenPoint API服务"""
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.routes import router
 from app.core.config import settings, ensure_dirs
 from app.core.logger import logger
+from app.core.executor import shutdown_executor
+from app.core.jsoncodec import FastJSONResponse
+from app.core.compression import CompressionMiddleware
+from app.core import metrics
+from app.services.clients import mineru_client
+from app.services.document import asset_service
+from app.services.jobs import job_service
+from app.services.PowerPoint import layout_service
 
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
     docs_url="/docs",
+    default_response_class=FastJSONResponse,
     redoc_url=None
 )
 
@@ -23,17 +35,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESS_MIN_SIZE,
+    gzip_level=settings.COMPRESS_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESS_BROTLI_QUALITY,
+    max_body_size=settings.MAX_UPLOAD_SIZE,
+)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(router, prefix="/api/v1")
 
+_background = set()
+
 
 @app.on_event("startup")
 async def startup():
     ensure_dirs()
+    await mineru_client.startup()
+    if settings.MINERU_RESUME_ON_STARTUP:
+        task = asyncio.create_task(mineru_client.resume_pending())
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+    job_service.startup()
+    layout_service.warm_up()
     logger.info(f"[APP] {settings.APP_NAME} v{settings.VERSION} started")
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    for task in list(_background):
+        task.cancel()
+    job_service.shutdown()
+    await mineru_client.shutdown()
+    shutdown_executor()
+    asset_service.shutdown()
     logger.info("[APP] shutdown")
 
 
@@ -45,3 +83,9 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
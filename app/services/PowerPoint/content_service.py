@@ -1,72 +1,83 @@
 """内容服务 - 整合大纲、解析和图表分析数据"""
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from app.core.logger import logger
 
 TAG = "[CONTENT]"
 
 
-def _find_section_in_parse(section_name: str, parse_result: Dict) -> Dict:
-    """在解析结果中查找对应章节"""
-    sections = parse_result.get("sections", [])
-    
-    for sec in sections:
-        if sec.get("name", "") == section_name:
-            return sec
-    
-    # 尝试模糊匹配（去除数字前缀）
-    clean_name = section_name.lstrip("0123456789. ")
-    for sec in sections:
-        sec_name = sec.get("name", "").lstrip("0123456789. ")
-        if sec_name == clean_name:
-            return sec
-    
-    logger.warning(f"{TAG} section not found: {section_name}")
-    return {}
+REF_KEYS = {
+    "image": "fig_refs",
+    "table": "table_refs",
+    "equation": "formula_refs"
+}
+SECTION_PREFIX_CHARS = "0123456789. "
 
 
-def _find_element_by_id(element_id: int, element_type: str, parse_section: Dict) -> Dict:
-    """根据ID和类型查找元素"""
-    ref_map = {
-        "image": "fig_refs",
-        "table": "table_refs",
-        "equation": "formula_refs"
-    }
+class ContentIndex:
+    """单个文档的查找索引，在 build_all_slides_content 中构建一次
     
-    ref_key = ref_map.get(element_type)
-    if not ref_key:
-        return {}
+    - 章节: 名称 → 章节，及去除数字前缀后的名称 → 章节（均取首个匹配）
+    - 元素: 每个章节内 (类型, ID) → 引用（按需构建）
+    - 分析文本: (类型, ID) → analysis_text（取首个匹配）
+    """
     
-    refs = parse_section.get(ref_key, [])
-    for ref in refs:
-        if ref.get("id") == element_id:
-            return ref
+    def __init__(self, parse_result: Dict, visual_analysis: List[Dict]):
+        self._by_name: Dict[str, Dict] = {}
+        self._by_clean_name: Dict[str, Dict] = {}
+        for sec in parse_result.get("sections", []):
+            name = sec.get("name", "")
+            self._by_name.setdefault(name, sec)
+            self._by_clean_name.setdefault(name.lstrip(SECTION_PREFIX_CHARS), sec)
+        
+        self._analysis: Dict[tuple, str] = {}
+        if isinstance(visual_analysis, list):
+            for item in visual_analysis:
+                elem = item.get("element", {})
+                key = (elem.get("type"), elem.get("id"))
+                if key not in self._analysis:
+                    analysis = item.get("analysis") or {}
+                    self._analysis[key] = analysis.get("analysis_text", "")
+        
+        self._refs: Dict[int, Dict[tuple, Dict]] = {}
     
-    return {}
-
-
-def _find_analysis_text(element_id: int, element_type: str, visual_analysis: List[Dict]) -> str:
-    """从视觉分析结果中查找分析文本"""
-    if not isinstance(visual_analysis, list):
-        return ""
+    def section(self, section_name: str) -> Dict:
+        """查找章节，精确匹配优先，其次去除数字前缀后匹配"""
+        sec = self._by_name.get(section_name)
+        if sec is None:
+            sec = self._by_clean_name.get(section_name.lstrip(SECTION_PREFIX_CHARS))
+        if sec is None:
+            logger.warning(f"{TAG} section not found: {section_name}")
+            return {}
+        return sec
     
-    for item in visual_analysis:
-        elem = item.get("element", {})
-        if elem.get("id") == element_id and elem.get("type") == element_type:
-            analysis = item.get("analysis", {})
-            return analysis.get("analysis_text", "")
+    def element(self, parse_section: Dict, element_type: str, element_id: int) -> Dict:
+        """在章节引用中查找元素"""
+        if element_type not in REF_KEYS:
+            return {}
+        refs = self._refs.get(id(parse_section))
+        if refs is None:
+            refs = {}
+            for etype, ref_key in REF_KEYS.items():
+                for ref in parse_section.get(ref_key, []):
+                    refs.setdefault((etype, ref.get("id")), ref)
+            self._refs[id(parse_section)] = refs
+        return refs.get((element_type, element_id), {})
     
-    return ""
+    def analysis_text(self, element_type: str, element_id: int) -> str:
+        """查找元素的视觉分析文本"""
+        return self._analysis.get((element_type, element_id), "")
 
 
 def build_slide_content(outline_section: Dict, parse_result: Dict, 
-                        visual_analysis: List[Dict]) -> List[Dict]:
+                        visual_analysis: List[Dict], index: Optional[ContentIndex] = None) -> List[Dict]:
     """构建幻灯片内容
     
     Args:
         outline_section: 大纲中的一个章节，包含 {section_name, raw_result}
         parse_result: 完整的文档解析结果
         visual_analysis: 完整的视觉分析结果
+        index: 文档索引（批量构建时复用，缺省时临时构建）
     
     Returns:
         list: 该章节的所有幻灯片内容列表
@@ -79,7 +90,8 @@ def build_slide_content(outline_section: Dict, parse_result: Dict,
         return []
     
     # 在解析结果中找到对应章节
-    parse_section = _find_section_in_parse(section_name, parse_result)
+    index = index or ContentIndex(parse_result, visual_analysis)
+    parse_section = index.section(section_name)
     section_content = parse_section.get("content", "")
     
     # 获取大纲中的幻灯片列表
@@ -105,20 +117,20 @@ def build_slide_content(outline_section: Dict, parse_result: Dict,
         
         # 处理图片引用
         for img_id in visual_refs_ids.get("images", []):
-            elem = _find_element_by_id(img_id, "image", parse_section)
+            elem = index.element(parse_section, "image", img_id)
             if elem:
                 elem_full = {
                     "type": "image",
                     "id": img_id,
                     "img_path": elem.get("img_path", ""),
                     "caption": elem.get("caption", ""),
-                    "analysis_text": _find_analysis_text(img_id, "image", visual_analysis)
+                    "analysis_text": index.analysis_text("image", img_id)
                 }
                 visual_refs["images"].append(elem_full)
         
         # 处理表格引用
         for tbl_id in visual_refs_ids.get("tables", []):
-            elem = _find_element_by_id(tbl_id, "table", parse_section)
+            elem = index.element(parse_section, "table", tbl_id)
             if elem:
                 elem_full = {
                     "type": "table",
@@ -126,13 +138,14 @@ def build_slide_content(outline_section: Dict, parse_result: Dict,
                     "img_path": elem.get("img_path", ""),
                     "caption": elem.get("caption", ""),
                     "body": elem.get("body", ""),
-                    "analysis_text": _find_analysis_text(tbl_id, "table", visual_analysis)
+                    "data": elem.get("data"),
+                    "analysis_text": index.analysis_text("table", tbl_id)
                 }
                 visual_refs["tables"].append(elem_full)
         
         # 处理公式引用
         for eq_id in visual_refs_ids.get("equations", []):
-            elem = _find_element_by_id(eq_id, "equation", parse_section)
+            elem = index.element(parse_section, "equation", eq_id)
             if elem:
                 elem_full = {
                     "type": "equation",
@@ -140,7 +153,7 @@ def build_slide_content(outline_section: Dict, parse_result: Dict,
                     "img_path": elem.get("img_path", ""),
                     "text": elem.get("text", ""),
                     "text_format": elem.get("text_format", "latex"),
-                    "analysis_text": _find_analysis_text(eq_id, "equation", visual_analysis)
+                    "analysis_text": index.analysis_text("equation", eq_id)
                 }
                 visual_refs["equations"].append(elem_full)
         
@@ -163,24 +176,62 @@ def build_slide_content(outline_section: Dict, parse_result: Dict,
     return slides
 
 
+def _compact_slides(slides: List[Dict]) -> tuple:
+    """将各幻灯片的章节正文提取到章节表，幻灯片改为引用 section_id"""
+    sections = []
+    section_ids: Dict[str, int] = {}
+    compact = []
+    
+    for slide in slides:
+        name = slide["section_name"]
+        section_id = section_ids.get(name)
+        if section_id is None:
+            section_id = section_ids[name] = len(sections) + 1
+            sections.append({"section_id": section_id, "section_name": name, "content": slide["content"]})
+        slide_ref = {k: v for k, v in slide.items() if k != "content"}
+        slide_ref["section_id"] = section_id
+        compact.append(slide_ref)
+    
+    return compact, sections
+
+
+def expand_slides_content(result: Dict) -> Dict:
+    """将紧凑格式还原为每张幻灯片携带 content 的展开格式（已展开则原样返回）"""
+    if "sections" not in result:
+        return result
+    
+    contents = {sec["section_id"]: sec["content"] for sec in result["sections"]}
+    slides = []
+    for slide in result.get("slides", []):
+        expanded = {k: v for k, v in slide.items() if k != "section_id"}
+        expanded["content"] = contents.get(slide.get("section_id"), "")
+        expanded["visual_refs"] = expanded.pop("visual_refs", {})
+        slides.append(expanded)
+    
+    return {"slides": slides, "statistics": result.get("statistics", {})}
+
+
 def build_all_slides_content(outline_result: Dict, parse_result: Dict, 
-                             visual_analysis: List[Dict]) -> Dict:
+                             visual_analysis: List[Dict], compact: bool = False) -> Dict:
     """构建所有幻灯片内容
     
     Args:
         outline_result: 大纲生成结果，包含 {sections: [...], statistics: {...}}
         parse_result: 文档解析结果
         visual_analysis: 视觉分析结果
+        compact: 紧凑格式，章节正文只在 sections 中出现一次，幻灯片以 section_id 引用
     
     Returns:
         dict: {
             slides: [所有幻灯片内容],
+            sections: [{section_id, section_name, content}]（仅紧凑格式）,
             statistics: {total_slides, total_sections, ...}
         }
     """
     logger.info(f"{TAG} building all slides content")
     
     outline_sections = outline_result.get("sections", [])
+    index = ContentIndex(parse_result, visual_analysis)
     all_slides = []
     
     for section in outline_sections:
@@ -188,27 +239,31 @@ def build_all_slides_content(outline_result: Dict, parse_result: Dict,
             logger.warning(f"{TAG} skip error section: {section.get('section_name')}")
             continue
         
-        slides = build_slide_content(section, parse_result, visual_analysis)
+        slides = build_slide_content(section, parse_result, visual_analysis, index)
         all_slides.extend(slides)
     
     logger.info(f"{TAG} total slides: {len(all_slides)} from {len(outline_sections)} sections")
     
-    return {
-        "slides": all_slides,
-        "statistics": {
-            "total_slides": len(all_slides),
-            "total_sections": len(outline_sections),
-            "success_sections": len([s for s in outline_sections if not s.get("error")]),
-            "failed_sections": len([s for s in outline_sections if s.get("error")])
-        }
+    statistics = {
+        "total_slides": len(all_slides),
+        "total_sections": len(outline_sections),
+        "success_sections": len([s for s in outline_sections if not s.get("error")]),
+        "failed_sections": len([s for s in outline_sections if s.get("error")])
     }
+    
+    if compact:
+        slides, sections = _compact_slides(all_slides)
+        return {"slides": slides, "sections": sections, "statistics": statistics}
+    
+    return {"slides": all_slides, "statistics": statistics}
 
 
-def build_content_from_process_result(process_result: Dict) -> Dict:
+def build_content_from_process_result(process_result: Dict, compact: bool = False) -> Dict:
     """从 process_document 结果构建幻灯片内容
     
     Args:
         process_result: process_document 的完整输出
+        compact: 是否使用紧凑格式（见 build_all_slides_content）
     
     Returns:
         dict: {slides: [...], statistics: {...}}
@@ -217,4 +272,4 @@ def build_content_from_process_result(process_result: Dict) -> Dict:
     parse_result = process_result.get("parse_result", {})
     visual_analysis = process_result.get("visual_analysis", [])
     
-    return build_all_slides_content(outline, parse_result, visual_analysis)
+    return build_all_slides_content(outline, parse_result, visual_analysis, compact)
@@ -0,0 +1,165 @@
+"""整套输出的共享资源: 页面内联样式合并为带内容哈希的共享样式表，HTML压缩，图片打包"""
+
+import re
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.document.asset_service import derive_images
+
+STYLE_DIR = "assets"
+IMAGE_DIR = "assets/images"
+LINK_PLACEHOLDER = "\x00deck-stylesheet\x00"
+
+_STYLE_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_BODY_RE = re.compile(r"<body\b([^>]*)>", re.I)
+_CLASS_RE = re.compile(r"""\bclass\s*=\s*(["'])(.*?)\1""", re.I | re.S)
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_RULE_RE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _css_rules(css: str) -> List[Tuple[List[str], str]]:
+    """拆分为 [(选择器列表, 压缩后的声明)]，不支持 @ 规则"""
+    css = _CSS_COMMENT_RE.sub("", css)
+    if "@" in css:
+        raise ValueError("at-rules are not supported")
+    
+    rules = []
+    for selectors, body in _CSS_RULE_RE.findall(css):
+        decls = []
+        for decl in body.split(";"):
+            prop, sep, value = decl.partition(":")
+            if sep and prop.strip():
+                decls.append(f"{prop.strip()}:{_SPACES_RE.sub(' ', value.strip())}")
+        rules.append(([_SPACES_RE.sub(" ", s.strip()) for s in selectors.split(",")], ";".join(decls)))
+    
+    rest = _CSS_RULE_RE.sub("", css).strip()
+    if rest:
+        raise ValueError(f"unparsed css: {rest[:40]}")
+    return rules
+
+
+def minify_css(css: str) -> str:
+    """去除注释与多余空白"""
+    return "".join(f"{','.join(sel)}{{{body}}}" for sel, body in _css_rules(css))
+
+
+def _scope_selector(selector: str, scope: str) -> str:
+    """将选择器限定在 body.<scope> 内"""
+    if selector == "*":
+        return f"body.{scope},.{scope} *"
+    if selector == "body" or selector.startswith(("body ", "body.", "body:", "body>")):
+        return f"body.{scope}{selector[4:]}"
+    if selector.startswith(("html", ":root")):
+        raise ValueError(f"cannot scope selector: {selector}")
+    return f".{scope} {selector}"
+
+
+def scope_css(css: str, scope: str) -> str:
+    """压缩并为每条规则加上作用域前缀，使不同模板的同名选择器互不影响"""
+    return "".join(f"{','.join(_scope_selector(s, scope) for s in sel)}{{{body}}}"
+                   for sel, body in _css_rules(css))
+
+
+def minify_html(html: str) -> str:
+    """去除注释，连续空白（含缩进换行）压缩为单个空格，渲染结果不变（模板不含 pre/textarea/script）"""
+    html = _HTML_COMMENT_RE.sub("", html)
+    return _SPACES_RE.sub(" ", html).strip()
+
+
+def _add_body_class(html: str, match: "re.Match", cls: str) -> str:
+    attrs = match.group(1)
+    class_match = _CLASS_RE.search(attrs)
+    if class_match:
+        q, value = class_match.group(1), class_match.group(2)
+        attrs = attrs[:class_match.start()] + f"class={q}{value} {cls}{q}" + attrs[class_match.end():]
+    else:
+        attrs = f' class="{cls}"{attrs}'
+    return f"{html[:match.start()]}<body{attrs}>{html[match.end():]}"
+
+
+class DeckStylesheet:
+    """收集整套页面的内联样式，合并为单个共享样式表
+    
+    每种不同的样式内容分配一个作用域类名（按内容哈希），页面 body 加上该类名，
+    规则加上作用域前缀，不同模板的同名选择器互不冲突。无法处理的样式保留内联。
+    
+    Usage:
+        sheet = DeckStylesheet()
+        pages = [sheet.extract(html) for html in htmls]
+        name, css = sheet.build()
+        pages = [sheet.link(html, name) for html in pages]
+    """
+    
+    def __init__(self):
+        self._scopes: Dict[str, Optional[str]] = {}  # 原始样式 -> 作用域类名（None 表示保留内联）
+        self._parts: List[str] = []
+        self.pages = 0
+    
+    def extract(self, html: str) -> str:
+        """移除页面内联样式并替换为样式表占位符"""
+        match = _STYLE_RE.search(html)
+        body = _BODY_RE.search(html, match.end()) if match else None
+        if body is None:
+            return html
+        
+        css = match.group(1)
+        if css not in self._scopes:
+            scope = "s-" + hashlib.sha256(css.encode("utf-8")).hexdigest()[:8]
+            try:
+                self._parts.append(scope_css(css, scope))
+            except ValueError:
+                scope = None
+            self._scopes[css] = scope
+        
+        scope = self._scopes[css]
+        if scope is None:
+            return html
+        
+        self.pages += 1
+        html = _add_body_class(html, body, scope)
+        return f"{html[:match.start()]}{LINK_PLACEHOLDER}{html[match.end():]}"
+    
+    def build(self) -> Tuple[Optional[str], str]:
+        """生成共享样式表，返回 (相对路径, 内容)；无可提取样式时路径为 None"""
+        css = "\n".join(self._parts)
+        if not css:
+            return None, ""
+        digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+        return f"{STYLE_DIR}/deck.{digest}.css", css
+    
+    @staticmethod
+    def link(html: str, href: str) -> str:
+        """将占位符替换为样式表链接"""
+        return html.replace(LINK_PLACEHOLDER, f'<link rel="stylesheet" href="{href}">')
+
+
+def bundle_images(pages: List[Dict[str, Any]], image_base: Optional[str] = None) -> Dict[str, str]:
+    """图文页图片改为引用 assets/images 下的展示尺寸派生图
+    
+    派生图按内容哈希命名，相同内容只打包一份；不存在的图片保留原引用。
+    
+    Returns:
+        {输出目录内相对路径: 待复制的源文件}
+    """
+    pictures = [p for p in pages if p["kind"] == "picture"]
+    resolved = []
+    for page in pictures:
+        src = page["vars"]["image"].get("src", "")
+        path = Path(src)
+        if src and not path.is_absolute() and image_base:
+            path = Path(image_base) / path
+        resolved.append(str(path) if src else "")
+    
+    derived = derive_images([p for p in resolved if p], "display")
+    files = {}
+    for page, path in zip(pictures, resolved):
+        source = derived.get(path)
+        if source is None:
+            continue
+        name = f"{IMAGE_DIR}/{Path(source).name}"
+        files[name] = source
+        page["vars"]["image"]["src"] = name
+    return files
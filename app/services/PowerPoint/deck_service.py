@@ -0,0 +1,70 @@
+"""渐进式整套生成: 大纲每完成一个章节，立即构建该章节的幻灯片内容并渲染写入"""
+
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.logger import logger
+from app.core.metrics import STAGE_DURATION
+from app.services.document.outline_service import iter_process_document
+from app.services.PowerPoint.content_service import ContentIndex, build_slide_content
+from app.services.PowerPoint.layout_service import open_deck
+
+TAG = "[DECK]"
+
+
+def iter_build_deck(md_path: str, json_path: Optional[str] = None, basic_info: Optional[Dict[str, Any]] = None,
+                    output_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """流式生成整套页面
+    
+    解析与图表分析完成后打开输出目录（deck 事件），此后大纲每完成一个章节即写入该章节页面
+    （pages 事件），清单随之更新；全部完成后写入最终清单（done 事件）。
+    
+    Args:
+        md_path: Markdown文件路径
+        json_path: content_list.json路径（可选）
+        basic_info: 文档基础信息，提供时生成标题页
+        output_dir: 输出目录（默认 DECK_OUTPUT_DIR/<deck_id>）
+    
+    Yields:
+        {"event": "deck" | "pages" | "done", "data": ...}
+    """
+    start = time.perf_counter()
+    parse_result = visual_analysis = index = deck = None
+    outline_start = first_page = None
+    
+    for event in iter_process_document(md_path, json_path):
+        kind, data = event["event"], event["data"]
+        
+        if kind == "parse_result":
+            parse_result = data
+        elif kind == "visual_analysis":
+            visual_analysis = data
+            index = ContentIndex(parse_result, visual_analysis)
+            deck = open_deck(output_dir, basic_info)
+            outline_start = time.perf_counter()
+            yield {"event": "deck", "data": {"deck_id": deck.deck_id, "output_dir": str(deck.folder),
+                                             "manifest_path": str(deck.manifest_path),
+                                             "metadata": parse_result.get("metadata", {})}}
+        elif kind == "section":
+            slides = build_slide_content(data, parse_result, visual_analysis, index)
+            pages = deck.add_section(data["section_name"], slides)
+            elapsed = time.perf_counter() - outline_start
+            if pages and first_page is None:
+                first_page = elapsed
+                STAGE_DURATION.labels("build_deck", "first_page").observe(elapsed)
+                logger.info(f"{TAG} first pages after {elapsed * 1000:.0f}ms")
+            yield {"event": "pages", "data": {"section_name": data["section_name"], "error": data.get("error"),
+                                              "pages": pages, "elapsed_ms": round(elapsed * 1000, 2)}}
+        else:
+            result = deck.close()
+            total = time.perf_counter() - start
+            STAGE_DURATION.labels("build_deck", "total").observe(total)
+            result["statistics"] = data
+            result["timings"] = {
+                **result["timings"],
+                "first_page_ms": round(first_page * 1000, 2) if first_page is not None else None,
+                "outline_ms": round((time.perf_counter() - outline_start) * 1000, 2),
+                "pipeline_ms": round(total * 1000, 2)
+            }
+            logger.info(f"{TAG} done: {len(result['pages'])} pages, timings={result['timings']}")
+            yield {"event": "done", "data": result}
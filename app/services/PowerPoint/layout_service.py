@@ -1,29 +1,209 @@
 """布局服务: PPT页面模板渲染"""
 
+import os
+import time
+import shutil
+import hashlib
+import uuid
+from datetime import datetime
+from itertools import groupby
 from pathlib import Path
-from typing import Dict, Any
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
 
+from app.core import jsoncodec
+from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import STAGE_DURATION
 from app.services.document.nlp_service import extract_article_basic_info
+from app.services.document.table_parser import parse_table_html
+from app.services.PowerPoint.content_service import expand_slides_content
+from app.services.PowerPoint.render_cache import RenderCache
+from app.services.PowerPoint.deck_assets import DeckStylesheet, bundle_images, minify_html
 
 TAG = "[LAYOUT]"
 
+# 整套渲染时幻灯片类型 → 模板
+DECK_TEMPLATES = {
+    "title": "title_page.html",
+    "section_header": "section_header.html",
+    "text_only": "text_only.html",
+    "picture": "picture_page.html",
+    "table": "table_result.html"
+}
+MANIFEST_NAME = "manifest.json"
+
+
+def _table_data(table: Dict[str, Any]) -> Dict[str, Any]:
+    """将表格引用转为 table_result 模板数据（优先使用解析阶段的结构化结果）"""
+    data = table.get("data") or parse_table_html(table.get("body", ""))
+    return {
+        "columns": data["columns"],
+        "rows": [{"values": r, "highlight": False} for r in data["rows"]],
+        "note": table.get("caption", "")
+    }
+
+
+def _title_page(basic_info: Dict[str, Any]) -> Dict[str, Any]:
+    info = {
+        "title": basic_info.get("title", "Untitled Document"),
+        "subtitle": basic_info.get("subtitle", ""),
+        "authors": basic_info.get("authors", []),
+        "affiliation": basic_info.get("affiliation", ""),
+        "date": basic_info.get("date") or datetime.now().strftime("%Y-%m-%d")
+    }
+    return {"kind": "title", "template": DECK_TEMPLATES["title"], "slide_title": info["title"],
+            "section_name": "", "vars": info}
+
+
+def _section_pages(section_name: str, slides: List[Dict[str, Any]], number: int) -> List[Dict[str, Any]]:
+    """单个章节的页面: 章节页 + 各内容页"""
+    section_index = f"{number:02d}"
+    section_title = section_name.lstrip("0123456789. ") or section_name
+    pages = [{"kind": "section_header", "slide_title": section_title, "section_name": section_name,
+              "vars": {"section_index": section_index, "section_title": section_title,
+                       "slide_title": section_title}}]
+    for slide in slides:
+        kind, template_vars = _slide_page(slide, section_index, section_title)
+        pages.append({"kind": kind, "slide_title": slide.get("slide_title", ""),
+                      "section_name": section_name, "vars": template_vars})
+    for page in pages:
+        page["template"] = DECK_TEMPLATES[page["kind"]]
+    return pages
+
+
+def _page_entry(index: int, page: Dict[str, Any], size: int) -> Dict[str, Any]:
+    """清单中的页面记录"""
+    return {
+        "index": index,
+        "file": f"slide_{index:03d}.html",
+        "kind": page["kind"],
+        "template": page["template"],
+        "slide_title": page["slide_title"],
+        "section_name": page["section_name"],
+        "size": size
+    }
+
+
+def _write_manifest(folder: Path, manifest: Dict[str, Any]) -> Path:
+    """原子写入清单: 清单中列出的页面均已落盘"""
+    path = folder / MANIFEST_NAME
+    tmp = folder / f".{MANIFEST_NAME}.tmp"
+    tmp.write_bytes(jsoncodec.dumps_bytes(manifest))
+    os.replace(tmp, path)
+    return path
+
+
+def _write_file(item: Tuple[Path, bytes]):
+    path, data = item
+    path.write_bytes(data)
+
+
+def _copy_file(item: Tuple[Path, str]):
+    path, source = item
+    shutil.copyfile(source, path)
+
+
+def _slide_page(slide: Dict[str, Any], section_index: str, section_title: str) -> Tuple[str, Dict[str, Any]]:
+    """按幻灯片引用的元素选择模板: 表格 > 图片 > 纯文本（可带公式）"""
+    refs = slide.get("visual_refs", {})
+    base = {
+        "section_index": section_index,
+        "section_title": section_title,
+        "slide_title": slide.get("slide_title", "")
+    }
+    
+    if refs.get("tables"):
+        return "table", {**base, "table": _table_data(refs["tables"][0])}
+    
+    if refs.get("images"):
+        img = refs["images"][0]
+        return "picture", {
+            **base,
+            "paragraphs": [slide["slide_purpose"]] if slide.get("slide_purpose") else [],
+            "bullets": slide.get("content_points", []),
+            "image": {"src": img.get("img_path", ""), "alt": img.get("caption", ""),
+                      "caption": img.get("caption", "")}
+        }
+    
+    content = {"summary": slide.get("slide_purpose", ""), "key_points": slide.get("content_points", [])}
+    if refs.get("equations"):
+        eq = refs["equations"][0]
+        content["equation"] = {"latex": eq.get("text", ""), "label": f"({eq.get('id', '')})"}
+    return "text_only", {**base, "content": content}
+
 
 class LayoutService:
     """布局服务类"""
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, auto_reload: Optional[bool] = None,
+                 render_cache: Optional[RenderCache] = None):
+        """
+        Args:
+            cache_dir: Jinja字节码缓存目录（默认 LAYOUT_TEMPLATE_CACHE_DIR，空字符串禁用）
+            auto_reload: 每次取模板时检查文件修改（默认 LAYOUT_TEMPLATE_AUTO_RELOAD，未配置时跟随 DEBUG）
+            render_cache: 页面渲染缓存（默认按 LAYOUT_RENDER_CACHE_* 配置创建）
+        """
         self.template_dir = Path(__file__).parent / "template"
-        self.env = Environment(loader=FileSystemLoader(str(self.template_dir)))
+        
+        cache_dir = settings.LAYOUT_TEMPLATE_CACHE_DIR if cache_dir is None else cache_dir
+        bytecode_cache = None
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        
+        if auto_reload is None:
+            auto_reload = settings.LAYOUT_TEMPLATE_AUTO_RELOAD
+        self.env = Environment(
+            loader=FileSystemLoader(str(self.template_dir)),
+            bytecode_cache=bytecode_cache,
+            auto_reload=settings.DEBUG if auto_reload is None else auto_reload
+        )
+        
+        if render_cache is None and settings.LAYOUT_RENDER_CACHE_ENABLED:
+            render_cache = RenderCache(settings.LAYOUT_RENDER_CACHE_MAX_BYTES, settings.LAYOUT_RENDER_CACHE_DIR,
+                                       settings.LAYOUT_RENDER_CACHE_DISK_MAX_BYTES)
+        self.render_cache = render_cache
+        self._versions: Dict[str, Tuple[Template, str]] = {}
+    
+    def warm_up(self) -> int:
+        """预加载全部模板（优先读取字节码缓存），避免首次渲染时编译，返回模板数"""
+        start = time.perf_counter()
+        names = self.env.list_templates(extensions=["html"])
+        for name in names:
+            self.env.get_template(name)
+        logger.info(f"{TAG} warm_up: {len(names)} templates in {(time.perf_counter() - start) * 1000:.1f}ms, "
+                    f"auto_reload={self.env.auto_reload}")
+        return len(names)
+    
+    def _template_version(self, name: str, template: Template) -> str:
+        """模板源码哈希；模板重新加载（对象变化）时重新计算"""
+        cached = self._versions.get(name)
+        if cached is not None and cached[0] is template:
+            return cached[1]
+        source = self.env.loader.get_source(self.env, name)[0]
+        version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        self._versions[name] = (template, version)
+        return version
+    
+    def _render(self, name: str, template_vars: Dict[str, Any]) -> str:
+        """渲染模板，输入未变化时直接复用缓存结果"""
+        template = self.env.get_template(name)
+        if self.render_cache is None:
+            return template.render(**template_vars)
+        key = RenderCache.make_key(name, self._template_version(name, template), template_vars)
+        return self.render_cache.get_or_render(key, lambda: template.render(**template_vars))
+    
+    def render_cache_stats(self) -> Dict[str, Any]:
+        """渲染缓存命中统计"""
+        return self.render_cache.stats() if self.render_cache else {}
     
     def render_title_page(self, basic_info: Dict[str, Any]) -> str:
         """渲染标题页模板"""
         logger.info(f"{TAG} render_title_page")
         
         try:
-            template = self.env.get_template("title_page.html")
-            
             template_vars = {
                 "title": basic_info.get("title", "Untitled Document"),
                 "subtitle": basic_info.get("subtitle", ""),
@@ -36,10 +216,10 @@ class LayoutService:
                 from datetime import datetime
                 template_vars["date"] = datetime.now().strftime("%Y-%m-%d")
             
-            html = template.render(**template_vars)
+            html = self._render("title_page.html", template_vars)
             logger.info(f"{TAG} render_title_page done, len={len(html)}")
             return html
-            
+        
         except Exception as e:
             logger.error(f"{TAG} render_title_page error: {e}")
             raise
@@ -61,8 +241,6 @@ class LayoutService:
         logger.info(f"{TAG} render_picture_page: {data.get('slide_title', '')[:40]}")
         
         try:
-            template = self.env.get_template("test.html")
-            
             # 支持两种数据格式
             text_content = data.get("text_content", {})
             if text_content:
@@ -91,15 +269,144 @@ class LayoutService:
                 "image": image_data
             }
             
-            html = template.render(**template_vars)
+            html = self._render("test.html", template_vars)
             logger.info(f"{TAG} render_picture_page done, len={len(html)}")
             return html
-            
+        
         except Exception as e:
             logger.error(f"{TAG} render_picture_page error: {e}")
             raise
             raise
     
+    def render_table_page(self, data: Dict[str, Any]) -> str:
+        """渲染表格页模板
+        
+        Args:
+            data: {section_index, section_title, slide_title, table}，table 为表格引用
+                  （含 data 或 body、caption）或已整理的 {columns, rows, note}
+        """
+        logger.info(f"{TAG} render_table_page: {data.get('slide_title', '')[:40]}")
+        
+        table = data.get("table", {})
+        if "columns" in table:
+            rows = [r if isinstance(r, dict) else {"values": r, "highlight": False} for r in table.get("rows", [])]
+            table = {"columns": table["columns"], "rows": rows, "note": table.get("note", "")}
+        else:
+            table = _table_data(table)
+        
+        template_vars = {
+            "section_index": data.get("section_index", ""),
+            "section_title": data.get("section_title", ""),
+            "slide_title": data.get("slide_title", ""),
+            "table": table
+        }
+        html = self._render("table_result.html", template_vars)
+        logger.info(f"{TAG} render_table_page done, rows={len(table['rows'])}, len={len(html)}")
+        return html
+    
+    def plan_deck(self, slides_content: Dict[str, Any],
+                  basic_info: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """将幻灯片内容映射为页面列表: 标题页、每章节一个章节页、各内容页
+        
+        Args:
+            slides_content: build_all_slides_content 的结果（展开或紧凑格式）
+            basic_info: 文档基础信息，提供时生成标题页
+        
+        Returns:
+            [{kind, template, slide_title, section_name, vars}]
+        """
+        pages = [_title_page(basic_info)] if basic_info else []
+        slides = expand_slides_content(slides_content).get("slides", [])
+        for number, (section_name, group) in enumerate(groupby(slides, key=lambda s: s.get("section_name", "")), 1):
+            pages += _section_pages(section_name, list(group), number)
+        return pages
+    
+    def _render_page(self, page: Dict[str, Any]) -> str:
+        return self._render(page["template"], page["vars"])
+    
+    def render_deck(self, slides_content: Dict[str, Any], basic_info: Optional[Dict[str, Any]] = None,
+                    output_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                    shared_styles: bool = False, bundle: bool = False,
+                    image_base: Optional[str] = None) -> Dict[str, Any]:
+        """整套渲染: 线程池并行渲染所有页面，渲染完成后统一并发写入页面与清单
+        
+        Args:
+            slides_content: build_all_slides_content 的结果（展开或紧凑格式）
+            basic_info: 文档基础信息，提供时生成标题页
+            output_dir: 输出目录（默认 DECK_OUTPUT_DIR/<deck_id>）
+            max_workers: 渲染/写入线程数（默认 LAYOUT_RENDER_WORKERS）
+            shared_styles: 内联样式合并为带内容哈希的共享样式表 assets/deck.<hash>.css，并压缩页面HTML
+            bundle: 图文页图片缩放为展示尺寸并复制到 assets/images，页面改为相对引用
+            image_base: 相对图片路径的根目录（MinerU解压目录）
+        
+        Returns:
+            {deck_id, output_dir, manifest_path, stylesheet, images, pages: [...],
+             timings: {plan_ms, [images_ms], render_ms, [assets_ms], write_ms, total_ms}}
+        """
+        deck_id = uuid.uuid4().hex
+        folder = Path(output_dir or Path(settings.DECK_OUTPUT_DIR) / deck_id)
+        workers = max_workers or settings.LAYOUT_RENDER_WORKERS
+        timings = {}
+        start = time.perf_counter()
+        
+        def phase(name: str, since: float) -> float:
+            now = time.perf_counter()
+            STAGE_DURATION.labels("render_deck", name).observe(now - since)
+            timings[f"{name}_ms"] = round((now - since) * 1000, 2)
+            return now
+        
+        pages = self.plan_deck(slides_content, basic_info)
+        mark = phase("plan", start)
+        
+        images = {}
+        if bundle:
+            images = bundle_images(pages, image_base)
+            mark = phase("images", mark)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="keenpoint-layout") as pool:
+            htmls = list(pool.map(self._render_page, pages))
+            mark = phase("render", mark)
+            
+            folder.mkdir(parents=True, exist_ok=True)
+            entries, files = [], []
+            stylesheet = None
+            if shared_styles:
+                sheet = DeckStylesheet()
+                htmls = [sheet.extract(h) for h in htmls]
+                stylesheet, css = sheet.build()
+                if stylesheet:
+                    (folder / stylesheet).parent.mkdir(parents=True, exist_ok=True)
+                    files.append((folder / stylesheet, css.encode("utf-8")))
+                    htmls = [sheet.link(h, stylesheet) for h in htmls]
+                htmls = list(pool.map(minify_html, htmls))
+                mark = phase("assets", mark)
+            
+            for i, (page, content) in enumerate(zip(pages, htmls), 1):
+                data = content.encode("utf-8")
+                entry = _page_entry(i, page, len(data))
+                files.append((folder / entry["file"], data))
+                entries.append(entry)
+            if images:
+                (folder / next(iter(images))).parent.mkdir(parents=True, exist_ok=True)
+            list(pool.map(_copy_file, [(folder / name, source) for name, source in images.items()]))
+            list(pool.map(_write_file, files))
+        mark = phase("write", mark)
+        timings["total_ms"] = round((mark - start) * 1000, 2)
+        
+        # 清单最后写入: 存在即表示所有页面已落盘
+        manifest = {"deck_id": deck_id, "complete": True, "total_pages": len(entries), "stylesheet": stylesheet,
+                    "images": sorted(images), "pages": entries, "timings": timings}
+        manifest_path = _write_manifest(folder, manifest)
+        
+        logger.info(f"{TAG} render_deck: {len(entries)} pages -> {folder}, timings={timings}")
+        return {"deck_id": deck_id, "output_dir": str(folder), "manifest_path": str(manifest_path),
+                "stylesheet": stylesheet, "images": sorted(images), "pages": entries, "timings": timings}
+    
+    def open_deck(self, output_dir: Optional[str] = None,
+                  basic_info: Optional[Dict[str, Any]] = None) -> "DeckWriter":
+        """开始逐章节写入的整套输出（提供 basic_info 时立即写入标题页）"""
+        return DeckWriter(self, output_dir, basic_info)
+    
     def save_title_page(self, basic_info: Dict[str, Any], output_path: str) -> str:
         """渲染并保存标题页"""
         logger.info(f"{TAG} save_title_page: {output_path}")
@@ -109,6 +416,15 @@ class LayoutService:
             f.write(html)
         return output_path
     
+    def save_table_page(self, data: Dict[str, Any], output_path: str) -> str:
+        """渲染并保存表格页"""
+        logger.info(f"{TAG} save_table_page: {output_path}")
+        html = self.render_table_page(data)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        return output_path
+    
     def save_picture_page(self, data: Dict[str, Any], output_path: str) -> str:
         """渲染并保存图文页"""
         logger.info(f"{TAG} save_picture_page: {output_path}")
@@ -119,6 +435,76 @@ class LayoutService:
         return output_path
 
 
+class DeckWriter:
+    """逐章节写入的整套输出: 每添加一个章节立即渲染并写入其页面，随后更新清单
+    
+    清单原子替换且只列出已落盘的页面，complete 为 false 表示仍在生成。
+    共享样式表与图片打包依赖完整的页面集合，此模式下不使用。
+    
+    Usage:
+        deck = service.open_deck(basic_info=info)
+        for section_name, slides in sections:
+            deck.add_section(section_name, slides)
+        result = deck.close()
+    """
+    
+    def __init__(self, service: LayoutService, output_dir: Optional[str] = None,
+                 basic_info: Optional[Dict[str, Any]] = None):
+        self.service = service
+        self.deck_id = uuid.uuid4().hex
+        self.folder = Path(output_dir or Path(settings.DECK_OUTPUT_DIR) / self.deck_id)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.entries: List[Dict[str, Any]] = []
+        self.sections = 0
+        self._start = time.perf_counter()
+        self._write_manifest(complete=False)
+        if basic_info:
+            self._write([_title_page(basic_info)])
+    
+    def add_section(self, section_name: str, slides: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """渲染并写入一个章节（章节页 + 内容页），返回新增的清单记录；无幻灯片时跳过"""
+        if not slides:
+            return []
+        self.sections += 1
+        return self._write(_section_pages(section_name, slides, self.sections))
+    
+    def _write(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        added = []
+        for page in pages:
+            data = self.service._render_page(page).encode("utf-8")
+            entry = _page_entry(len(self.entries) + 1, page, len(data))
+            (self.folder / entry["file"]).write_bytes(data)
+            self.entries.append(entry)
+            added.append(entry)
+        self._write_manifest(complete=False)
+        STAGE_DURATION.labels("render_deck", "section").observe(time.perf_counter() - start)
+        return added
+    
+    def _write_manifest(self, complete: bool, timings: Optional[Dict[str, float]] = None) -> Path:
+        manifest = {"deck_id": self.deck_id, "complete": complete, "total_pages": len(self.entries),
+                    "stylesheet": None, "images": [], "pages": self.entries}
+        if timings:
+            manifest["timings"] = timings
+        return _write_manifest(self.folder, manifest)
+    
+    @property
+    def manifest_path(self) -> Path:
+        return self.folder / MANIFEST_NAME
+    
+    def close(self) -> Dict[str, Any]:
+        """写入最终清单（complete=true）
+        
+        Returns:
+            {deck_id, output_dir, manifest_path, pages: [...], timings: {total_ms}}
+        """
+        timings = {"total_ms": round((time.perf_counter() - self._start) * 1000, 2)}
+        manifest_path = self._write_manifest(complete=True, timings=timings)
+        logger.info(f"{TAG} deck closed: {len(self.entries)} pages, {self.sections} sections -> {self.folder}")
+        return {"deck_id": self.deck_id, "output_dir": str(self.folder), "manifest_path": str(manifest_path),
+                "pages": self.entries, "timings": timings}
+
+
 # 单例
 _service = LayoutService()
 
@@ -138,6 +524,16 @@ def render_picture_page(data: Dict[str, Any]) -> str:
     return _service.render_picture_page(data)
 
 
+def render_table_page(data: Dict[str, Any]) -> str:
+    """渲染表格页模板"""
+    return _service.render_table_page(data)
+
+
+def save_table_page(data: Dict[str, Any], output_path: str) -> str:
+    """渲染并保存表格页"""
+    return _service.save_table_page(data, output_path)
+
+
 def save_title_page(basic_info: Dict[str, Any], output_path: str) -> str:
     """渲染并保存标题页"""
     return _service.save_title_page(basic_info, output_path)
@@ -146,3 +542,32 @@ def save_title_page(basic_info: Dict[str, Any], output_path: str) -> str:
 def save_picture_page(data: Dict[str, Any], output_path: str) -> str:
     """渲染并保存图文页"""
     return _service.save_picture_page(data, output_path)
+
+
+def warm_up() -> int:
+    """预加载全部模板"""
+    return _service.warm_up()
+
+
+def render_cache_stats() -> Dict[str, Any]:
+    """渲染缓存命中统计"""
+    return _service.render_cache_stats()
+
+
+def plan_deck(slides_content: Dict[str, Any], basic_info: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """将幻灯片内容映射为页面列表"""
+    return _service.plan_deck(slides_content, basic_info)
+
+
+def open_deck(output_dir: Optional[str] = None, basic_info: Optional[Dict[str, Any]] = None) -> DeckWriter:
+    """开始逐章节写入的整套输出"""
+    return _service.open_deck(output_dir, basic_info)
+
+
+def render_deck(slides_content: Dict[str, Any], basic_info: Optional[Dict[str, Any]] = None,
+                output_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                shared_styles: bool = False, bundle: bool = False,
+                image_base: Optional[str] = None) -> Dict[str, Any]:
+    """整套渲染并写入页面与清单"""
+    return _service.render_deck(slides_content, basic_info, output_dir, max_workers, shared_styles,
+                                bundle, image_base)
@@ -0,0 +1,268 @@
+"""PPTX导出: 将幻灯片内容直接生成为 .pptx（python-pptx），图片按内容哈希只嵌入一次"""
+
+import os
+import time
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pptx import Presentation
+from pptx.parts.image import Image
+from pptx.util import Emu, Inches, Pt
+
+from app.core.logger import logger
+from app.core.metrics import STAGE_DURATION
+from app.services.document.asset_service import derive_images
+from app.services.PowerPoint.layout_service import plan_deck
+
+TAG = "[PPTX]"
+
+# 默认母版中的版式序号
+LAYOUT_TITLE = 0
+LAYOUT_CONTENT = 1
+LAYOUT_SECTION = 2
+LAYOUT_TITLE_ONLY = 5
+
+SLIDE_WIDTH = Inches(13.333)
+SLIDE_HEIGHT = Inches(7.5)
+MAX_TABLE_ROWS = 12  # 超出部分截断并在备注中说明
+
+BODY_PT = 16
+SMALL_PT = 11
+
+
+class PptxBuilder:
+    """单个演示文稿的构建器
+    
+    版式复用默认母版（标题页、章节页、标题+内容、仅标题），占位符按16:9页宽横向拉伸；
+    图片按内容 SHA-256 建立索引，相同内容的不同路径统一引用同一源文件，只嵌入一次。
+    
+    Args:
+        image_base: 解析结果中相对图片路径的根目录（MinerU解压目录）
+    """
+    
+    def __init__(self, image_base: Optional[str] = None):
+        self.prs = Presentation()
+        self._widen_layouts(self.prs.slide_width)
+        self.prs.slide_width = SLIDE_WIDTH
+        self.prs.slide_height = SLIDE_HEIGHT
+        self.image_base = Path(image_base) if image_base else None
+        self.derived: Dict[str, str] = {}  # 图片路径 -> 展示尺寸派生图
+        self._layouts = self.prs.slide_layouts
+        self._media: Dict[str, Tuple[str, Tuple[int, int]]] = {}  # 内容哈希 -> (源文件, 像素尺寸)
+        self._paths: Dict[str, Optional[str]] = {}  # 图片路径 -> 内容哈希（None 表示不可用）
+        self.pictures = 0
+        self.missing = 0
+    
+    def _widen_layouts(self, old_width: int):
+        """默认母版为4:3，按新页宽等比横向拉伸母版与各版式的占位符"""
+        scale = SLIDE_WIDTH / old_width
+        shapes = list(self.prs.slide_master.placeholders)
+        for layout in self.prs.slide_layouts:
+            shapes.extend(layout.placeholders)
+        # 先读取全部位置再写入，避免版式继承母版的位置被重复拉伸
+        geometry = [(shape, shape.left, shape.width) for shape in shapes]
+        for shape, left, width in geometry:
+            if left is not None and width is not None:
+                shape.left, shape.width = Emu(int(left * scale)), Emu(int(width * scale))
+    
+    # ==================== 页面 ====================
+    
+    def add_page(self, page: Dict[str, Any]):
+        """按 plan_deck 的页面类型添加一张幻灯片"""
+        builder = getattr(self, f"_add_{page['kind']}")
+        builder(page["vars"])
+    
+    def _add_title(self, v: Dict[str, Any]):
+        slide = self.prs.slides.add_slide(self._layouts[LAYOUT_TITLE])
+        slide.shapes.title.text = v.get("title", "")
+        lines = [v.get("subtitle"), ", ".join(v.get("authors") or []), v.get("affiliation"), v.get("date")]
+        self._fill(slide.placeholders[1].text_frame, [(line, 0) for line in lines if line])
+    
+    def _add_section_header(self, v: Dict[str, Any]):
+        slide = self.prs.slides.add_slide(self._layouts[LAYOUT_SECTION])
+        slide.shapes.title.text = v.get("section_title", "")
+        slide.placeholders[1].text_frame.text = v.get("section_index", "")
+    
+    def _add_text_only(self, v: Dict[str, Any]):
+        slide = self.prs.slides.add_slide(self._layouts[LAYOUT_CONTENT])
+        slide.shapes.title.text = v.get("slide_title", "")
+        content = v.get("content", {})
+        lines = [(content.get("summary", ""), 0)] if content.get("summary") else []
+        lines += [(p, 1) for p in content.get("key_points", [])]
+        equation = content.get("equation")
+        if equation:
+            lines.append((f"{equation.get('latex', '')} {equation.get('label', '')}".strip(), 0))
+        self._fill(slide.placeholders[1].text_frame, lines, BODY_PT)
+    
+    def _add_picture(self, v: Dict[str, Any]):
+        slide = self.prs.slides.add_slide(self._layouts[LAYOUT_TITLE_ONLY])
+        slide.shapes.title.text = v.get("slide_title", "")
+        
+        lines = [(p, 0) for p in v.get("paragraphs", [])] + [(f"• {b}", 0) for b in v.get("bullets", [])]
+        box = slide.shapes.add_textbox(Inches(0.6), Inches(1.6), Inches(6.2), Inches(5.4))
+        self._fill(box.text_frame, lines, BODY_PT)
+        
+        image = v.get("image", {})
+        self._place_image(slide, image.get("src", ""), Inches(7.1), Inches(1.6), Inches(5.6), Inches(4.7))
+        if image.get("caption"):
+            caption = slide.shapes.add_textbox(Inches(7.1), Inches(6.4), Inches(5.6), Inches(0.8))
+            self._fill(caption.text_frame, [(image["caption"], 0)], SMALL_PT)
+    
+    def _add_table(self, v: Dict[str, Any]):
+        slide = self.prs.slides.add_slide(self._layouts[LAYOUT_TITLE_ONLY])
+        slide.shapes.title.text = v.get("slide_title", "")
+        
+        table = v.get("table", {})
+        columns = table.get("columns", [])
+        rows = [r["values"] for r in table.get("rows", [])]
+        note = table.get("note", "")
+        if len(rows) > MAX_TABLE_ROWS:
+            note = f"{note} ({len(rows) - MAX_TABLE_ROWS} more rows omitted)".strip()
+            rows = rows[:MAX_TABLE_ROWS]
+        
+        if columns:
+            shape = slide.shapes.add_table(len(rows) + 1, len(columns), Inches(0.6), Inches(1.6),
+                                           Inches(12.1), Inches(0.4) * (len(rows) + 1))
+            cells = shape.table
+            for c, text in enumerate(columns):
+                self._cell(cells.cell(0, c), text)
+            for r, values in enumerate(rows, 1):
+                for c in range(len(columns)):
+                    self._cell(cells.cell(r, c), values[c] if c < len(values) else "")
+        
+        if note:
+            box = slide.shapes.add_textbox(Inches(0.6), Inches(6.7), Inches(12.1), Inches(0.6))
+            self._fill(box.text_frame, [(note, 0)], SMALL_PT)
+    
+    @staticmethod
+    def _fill(frame, lines: List[Tuple[str, int]], size: Optional[int] = None):
+        """写入多段文本 [(文本, 层级)]"""
+        frame.word_wrap = True
+        for i, (text, level) in enumerate(lines):
+            para = frame.paragraphs[0] if i == 0 else frame.add_paragraph()
+            para.text = text
+            para.level = level
+            if size:
+                para.font.size = Pt(size)
+    
+    @staticmethod
+    def _cell(cell, text: str):
+        cell.text = str(text)
+        for para in cell.text_frame.paragraphs:
+            para.font.size = Pt(SMALL_PT)
+    
+    # ==================== 媒体 ====================
+    
+    def _resolve(self, src: str) -> Optional[Path]:
+        if not src:
+            return None
+        path = Path(src)
+        if not path.is_absolute() and self.image_base is not None:
+            path = self.image_base / path
+        derived = self.derived.get(str(path))
+        return Path(derived) if derived else path
+    
+    def use_derivatives(self, pages: List[Dict[str, Any]]):
+        """图文页图片替换为展示尺寸的派生图（批量生成）"""
+        srcs = [p["vars"].get("image", {}).get("src", "") for p in pages if p["kind"] == "picture"]
+        paths = [str(path) for path in map(self._resolve, srcs) if path is not None]
+        self.derived = derive_images(paths, "display")
+    
+    def _image(self, src: str) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """按内容哈希返回 (源文件, 像素尺寸)，同一路径只读取一次，相同内容共用首个源文件"""
+        if src in self._paths:
+            digest = self._paths[src]
+            return self._media.get(digest) if digest else None
+        
+        path = self._resolve(src)
+        try:
+            blob = path.read_bytes() if path else None
+        except OSError:
+            blob = None
+        if not blob:
+            logger.warning(f"{TAG} image not found: {src}")
+            self._paths[src] = None
+            return None
+        
+        digest = hashlib.sha256(blob).hexdigest()
+        self._paths[src] = digest
+        media = self._media.get(digest)
+        if media is None:
+            media = self._media[digest] = (str(path), Image.from_blob(blob, path.name).size)
+        return media
+    
+    def _place_image(self, slide, src: str, left: int, top: int, width: int, height: int):
+        """在给定区域内按比例居中放置图片"""
+        media = self._image(src)
+        if media is None:
+            self.missing += 1
+            return
+        
+        path, (px_w, px_h) = media
+        scale = min(width / px_w, height / px_h)
+        cx, cy = Emu(int(px_w * scale)), Emu(int(px_h * scale))
+        x, y = left + (width - cx) // 2, top + (height - cy) // 2
+        slide.shapes.add_picture(path, x, y, cx, cy)
+        self.pictures += 1
+    
+    @property
+    def media_count(self) -> int:
+        return len(self._media)
+    
+    # ==================== 保存 ====================
+    
+    def save(self, output_path: str) -> int:
+        """直接写入同目录临时文件后原子替换，返回文件大小"""
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                self.prs.save(f)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return path.stat().st_size
+
+
+def build_pptx(slides_content: Dict[str, Any], output_path: str, basic_info: Optional[Dict[str, Any]] = None,
+               image_base: Optional[str] = None) -> Dict[str, Any]:
+    """将 build_all_slides_content 的结果导出为 .pptx
+    
+    Args:
+        slides_content: 幻灯片内容（展开或紧凑格式）
+        output_path: 输出文件路径
+        basic_info: 文档基础信息，提供时生成标题页
+        image_base: 相对图片路径的根目录（MinerU解压目录）
+    
+    Returns:
+        {path, slides, size, media: {pictures, embedded, missing}, timings: {assets_ms, build_ms, save_ms}}
+    """
+    start = time.perf_counter()
+    pages = plan_deck(slides_content, basic_info)
+    builder = PptxBuilder(image_base)
+    builder.use_derivatives(pages)
+    prepared = time.perf_counter()
+    STAGE_DURATION.labels("build_pptx", "assets").observe(prepared - start)
+    
+    for page in pages:
+        builder.add_page(page)
+    built = time.perf_counter()
+    STAGE_DURATION.labels("build_pptx", "build").observe(built - prepared)
+    
+    size = builder.save(output_path)
+    saved = time.perf_counter()
+    STAGE_DURATION.labels("build_pptx", "save").observe(saved - built)
+    
+    result = {
+        "path": str(output_path),
+        "slides": len(pages),
+        "size": size,
+        "media": {"pictures": builder.pictures, "embedded": builder.media_count, "missing": builder.missing},
+        "timings": {"assets_ms": round((prepared - start) * 1000, 2), "build_ms": round((built - prepared) * 1000, 2),
+                    "save_ms": round((saved - built) * 1000, 2)}
+    }
+    logger.info(f"{TAG} {output_path}: {len(pages)} slides, {size} bytes, media={result['media']}")
+    return result
@@ -0,0 +1,143 @@
+"""页面渲染缓存: 以 (模板名, 模板版本, 模板变量哈希) 为键复用渲染结果"""
+
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from app.core import jsoncodec
+from app.core.disk_lru import DiskLRU, atomic_write, touch
+from app.core.metrics import record_cache
+
+TAG = "[RENDER_CACHE]"
+SUFFIX = ".html"
+METRIC_NAME = "layout_render"
+
+
+class RenderCache:
+    """内存LRU + 可选磁盘层
+    
+    Args:
+        max_bytes: 内存层上限（按HTML的UTF-8字节数计）
+        disk_dir: 磁盘层目录（None 或空字符串禁用），进程重启后仍可复用
+        disk_max_bytes: 磁盘层上限，超出按最近访问时间淘汰
+    """
+    
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._disk = DiskLRU(self.disk_dir, disk_max_bytes, f"*{SUFFIX}", TAG) if self.disk_dir else None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (html, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(template: str, version: str, variables: Dict[str, Any]) -> Optional[str]:
+        """生成缓存键；变量无法序列化时返回 None（不缓存）"""
+        try:
+            raw = jsoncodec.dumps_bytes(variables, sort_keys=True)
+        except TypeError:
+            return None
+        h = hashlib.sha256(f"{template}\0{version}\0".encode("utf-8"))
+        h.update(raw)
+        return h.hexdigest()[:32]
+    
+    def get(self, key: str) -> Optional[str]:
+        """查询缓存，内存未命中时查询磁盘层并回填内存"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            record_cache(METRIC_NAME, True)
+            return entry[0]
+        
+        html = self._disk_get(key)
+        with self._lock:
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += 1
+        record_cache(METRIC_NAME, html is not None)
+        if html is not None:
+            self._mem_put(key, html)
+        return html
+    
+    def put(self, key: str, html: str):
+        """写入内存层（及磁盘层）"""
+        self._mem_put(key, html)
+        if self.disk_dir is not None:
+            self._disk_put(key, html)
+    
+    def get_or_render(self, key: Optional[str], render: Callable[[], str]) -> str:
+        """命中时直接返回，否则渲染并写入缓存（key 为 None 时不缓存）"""
+        if key is None:
+            return render()
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.put(key, html)
+        return html
+    
+    def stats(self) -> Dict[str, Any]:
+        """命中统计与内存占用"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size
+            }
+    
+    def clear(self):
+        """清空内存层（磁盘层保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def _mem_put(self, key: str, html: str):
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (html, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+    
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}{SUFFIX}"
+    
+    def _disk_get(self, key: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            html = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        touch(path)
+        return html
+    
+    def _disk_put(self, key: str, html: str):
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        data = html.encode("utf-8")
+        atomic_write(path, data)
+        self._disk.added(len(data))
@@ -0,0 +1,75 @@
+"""产物存储: 服务端保存中间结果，后续请求以ID引用代替完整JSON"""
+
+import gzip
+import hashlib
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core import jsoncodec
+from app.core.disk_lru import DiskLRU, atomic_write, touch
+
+TAG = "[ARTIFACT]"
+SUFFIX = ".json.gz"
+
+
+class ArtifactStore:
+    """gzip压缩的JSON产物，按内容哈希命名，超出容量按LRU淘汰"""
+    
+    def __init__(self, root: str, max_bytes: int, level: int = 6):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.level = level
+        self._lru = DiskLRU(self.root, max_bytes, f"*{SUFFIX}", TAG)
+    
+    def _path(self, artifact_id: str) -> Path:
+        return self.root / f"{artifact_id}{SUFFIX}"
+    
+    def put(self, data: Any) -> str:
+        """保存产物，返回ID（相同内容返回相同ID）"""
+        raw = jsoncodec.dumps_bytes(data)
+        artifact_id = hashlib.sha256(raw).hexdigest()[:32]
+        path = self._path(artifact_id)
+        
+        if touch(path):
+            return artifact_id
+        
+        self.root.mkdir(parents=True, exist_ok=True)
+        packed = gzip.compress(raw, compresslevel=self.level)
+        atomic_write(path, packed)
+        
+        logger.info(f"{TAG} stored {artifact_id}: raw={len(raw)} gz={len(packed)}")
+        self._lru.added(len(packed))
+        return artifact_id
+    
+    def get(self, artifact_id: str) -> Optional[Any]:
+        """读取产物，不存在返回None"""
+        if not artifact_id or not artifact_id.isalnum():
+            return None
+        path = self._path(artifact_id)
+        try:
+            with open(path, "rb") as f:
+                raw = gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        touch(path)
+        return jsoncodec.loads(raw)
+    
+    def evict(self) -> int:
+        """超出容量时淘汰最久未访问的产物"""
+        return self._lru.evict()
+
+
+# 单例
+_store = ArtifactStore(settings.ARTIFACT_DIR, settings.ARTIFACT_MAX_BYTES, settings.ARTIFACT_COMPRESS_LEVEL)
+
+
+def save_artifact(data: Any) -> str:
+    """保存产物"""
+    return _store.put(data)
+
+
+def load_artifact(artifact_id: str) -> Optional[Any]:
+    """读取产物"""
+    return _store.get(artifact_id)
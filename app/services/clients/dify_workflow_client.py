@@ -1,6 +1,6 @@
 """Dify Workflow API客户端"""
 
-import json
+import hashlib
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union, Generator
 
@@ -8,6 +8,9 @@ import requests
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core import jsoncodec
+from app.core.metrics import upstream_timer
+from app.core.singleflight import SingleFlight
 
 
 MIME_TYPES = {
@@ -16,6 +19,10 @@ MIME_TYPES = {
 }
 
 
+# 进程内共享: 相同 (应用, llm_id, 请求体) 的并发调用只请求一次
+_run_flight = SingleFlight("dify")
+
+
 class DifyClient:
     """Dify Workflow客户端"""
     
@@ -39,7 +46,7 @@ class DifyClient:
         if not mime:
             raise ValueError(f"Unsupported type: {ext}")
         
-        with open(path, 'rb') as f:
+        with open(path, 'rb') as f, upstream_timer("dify", "upload"):
             resp = requests.post(
                 f"{self.base_url}/files/upload",
                 headers={"Authorization": f"Bearer {self.api_key}"},
@@ -75,14 +82,27 @@ class DifyClient:
         
         logger.info(f"[DIFY] run llm_id={llm_id} prompt_len={len(prompt)}")
         
-        resp = requests.post(
-            f"{self.base_url}/workflows/run",
-            headers=self.headers,
-            json=payload,
-            timeout=timeout
-        )
-        resp.raise_for_status()
-        return resp.json()
+        body = jsoncodec.dumps_bytes(payload)
+        if not settings.DIFY_COALESCE_ENABLED:
+            return jsoncodec.loads(self._post_run(llm_id, body, timeout))
+        
+        key = (self.base_url, self.api_key, llm_id, hashlib.sha256(body).hexdigest())
+        content = _run_flight.do(key, lambda: self._post_run(llm_id, body, timeout))
+        # 各调用方各自解析，避免共享可变结果
+        return jsoncodec.loads(content)
+    
+    def _post_run(self, llm_id: int, body: bytes, timeout: int) -> bytes:
+        """发送workflow请求，返回原始响应体"""
+        with upstream_timer("dify", f"llm_{llm_id}"):
+            resp = requests.post(
+                f"{self.base_url}/workflows/run",
+                headers=self.headers,
+                data=body,
+                timeout=timeout
+            )
+            resp.raise_for_status()
+            return resp.content
+
 
 def _get_client(api_key: str = None, user: str = None) -> DifyClient:
     """获取客户端实例"""
@@ -102,7 +122,7 @@ def _extract_output(result: Dict) -> Dict:
         val = list(outputs.values())[0]
         if isinstance(val, str):
             try:
-                return json.loads(val)
+                return jsoncodec.loads(val)
             except:
                 pass
         return val if isinstance(val, dict) else outputs
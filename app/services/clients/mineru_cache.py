@@ -0,0 +1,128 @@
+"""MinerU结果缓存: 按PDF内容指纹复用已解压的结果目录"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.disk_lru import DiskLRU, tmp_path, touch
+from app.core.logger import logger
+
+TAG = "[MINERU_CACHE]"
+META_FILE = ".meta.json"
+
+
+def fingerprint(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件SHA-256指纹"""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    """统计目录大小"""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _entry_stat(entry: Path) -> Optional[Tuple[float, int]]:
+    """条目目录的 (访问时间, 大小)：访问时间记在元数据文件上，大小取自元数据"""
+    meta = entry / META_FILE
+    if not entry.is_dir() or not meta.exists():
+        return None
+    try:
+        with open(meta, "r", encoding="utf-8") as f:
+            size = json.load(f).get("size", 0)
+    except ValueError:
+        size = _dir_size(entry)
+    return meta.stat().st_mtime, size
+
+
+class ResultStore:
+    """本地结果库，按总大小做LRU淘汰"""
+    
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lru = DiskLRU(self.root, max_bytes, "*", TAG, stat=_entry_stat,
+                            remove=lambda entry: shutil.rmtree(entry, ignore_errors=True))
+    
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+    
+    def get(self, key: str) -> Optional[Path]:
+        """查找缓存目录，命中时刷新访问时间"""
+        meta = self._entry(key) / META_FILE
+        if not touch(meta):
+            return None
+        return meta.parent
+    
+    def restore(self, key: str, target: Path) -> Optional[Path]:
+        """将缓存结果复制到清空后的目标目录（复制期间持有淘汰锁，出错按未命中处理）"""
+        with self._lru.lock:
+            entry = self.get(key)
+            if entry is None:
+                return None
+            try:
+                if target.exists():
+                    shutil.rmtree(target)
+                shutil.copytree(entry, target, ignore=shutil.ignore_patterns(META_FILE))
+            except OSError as e:
+                logger.warning(f"{TAG} restore failed, treated as miss: key={key[:12]}: {e}")
+                shutil.rmtree(target, ignore_errors=True)
+                return None
+        return target
+    
+    def put(self, key: str, src_dir: Path, file_name: str = "") -> Optional[Path]:
+        """写入缓存（先复制到临时目录再原子替换）"""
+        src_dir = Path(src_dir)
+        if not src_dir.is_dir():
+            return None
+        
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(key)
+        tmp = tmp_path(entry)
+        
+        try:
+            shutil.copytree(src_dir, tmp, dirs_exist_ok=True)
+            size = _dir_size(tmp)
+            with open(tmp / META_FILE, "w", encoding="utf-8") as f:
+                json.dump({"file_name": file_name, "size": size, "created": time.time()}, f)
+            touch(tmp / META_FILE)
+            
+            with self._lru.lock:
+                if entry.exists():
+                    shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        
+        logger.info(f"{TAG} stored: {file_name} key={key[:12]} size={size}")
+        self._lru.added(size)
+        return entry
+    
+    def evict(self) -> int:
+        """超出容量时淘汰最久未访问的结果，返回淘汰数"""
+        return self._lru.evict()
+
+
+def make_key(digest: str, extract_all: bool = False) -> str:
+    """缓存键: 内容指纹 + 模型版本 + 解压模式（按白名单解压时含白名单哈希，白名单变更后不复用旧结果）"""
+    if extract_all:
+        return f"{digest}_{settings.MINERU_MODEL}_full"
+    patterns = hashlib.sha256(json.dumps(settings.MINERU_EXTRACT_PATTERNS).encode("utf-8")).hexdigest()[:12]
+    return f"{digest}_{settings.MINERU_MODEL}_{patterns}"
+
+
+# 单例
+_store = ResultStore(settings.MINERU_CACHE_DIR, settings.MINERU_CACHE_MAX_BYTES)
+
+
+def get_store() -> ResultStore:
+    """获取结果库实例"""
+    return _store
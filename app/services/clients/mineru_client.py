@@ -2,15 +2,63 @@
 
 import os
 import io
+import re
+import json
+import shutil
 import asyncio
 import zipfile
+import math
+import time
+import posixpath
+from contextlib import asynccontextmanager
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import aiohttp
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import MINERU_BATCHES_ACTIVE, UPSTREAM_ERRORS, observe_upstream, record_cache, upstream_timer
+from app.services.clients.mineru_cache import fingerprint, make_key, get_store
+from app.services.clients.mineru_journal import get_journal, UPLOADING, POLLING, DONE, FAILED
+
+MD_IMAGE_RE = re.compile(r'!\[[^\]]*\]\(([^\s\)]+)')
+
+# 应用级共享会话（由 startup/shutdown 管理）
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def startup():
+    """创建共享会话与连接池（应用启动时调用）"""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        return
+    connector = aiohttp.TCPConnector(limit=settings.MINERU_POOL_SIZE,
+                                     limit_per_host=settings.MINERU_POOL_SIZE_PER_HOST)
+    _session = aiohttp.ClientSession(connector=connector)
+    _session_loop = asyncio.get_running_loop()
+    logger.info(f"[MINERU] session started: pool={settings.MINERU_POOL_SIZE}")
+
+
+async def shutdown():
+    """关闭共享会话（应用关闭时调用）"""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("[MINERU] session closed")
+    _session = _session_loop = None
+
+
+@asynccontextmanager
+async def _session_scope():
+    """优先复用共享会话；未启动或不在同一事件循环时（脚本场景）使用临时会话"""
+    if _session is not None and not _session.closed and _session_loop is asyncio.get_running_loop():
+        yield _session
+        return
+    async with aiohttp.ClientSession() as session:
+        yield session
 
 
 async def _apply_urls(session: aiohttp.ClientSession, files: List[str]) -> tuple:
@@ -20,20 +68,23 @@ async def _apply_urls(session: aiohttp.ClientSession, files: List[str]) -> tuple
         "model_version": settings.MINERU_MODEL
     }
     
-    async with session.post(settings.MINERU_UPLOAD_URL, headers=settings.MINERU_HEADERS, json=payload) as resp:
-        result = await resp.json()
-        if result.get("code") != 0:
-            raise Exception(f"Apply URL failed: {result}")
-        
-        data = result["data"]
-        logger.info(f"[MINERU] urls applied: batch_id={data['batch_id']}")
-        return data["batch_id"], data["file_urls"]
+    with upstream_timer("mineru", "apply_urls"):
+        async with session.post(settings.MINERU_UPLOAD_URL, headers=settings.MINERU_HEADERS, json=payload) as resp:
+            result = await resp.json()
+            if result.get("code") != 0:
+                raise Exception(f"Apply URL failed: {result}")
+    
+    data = result["data"]
+    logger.info(f"[MINERU] urls applied: batch_id={data['batch_id']}")
+    return data["batch_id"], data["file_urls"]
 
 
 async def _upload(session: aiohttp.ClientSession, file_path: str, url: str):
     """上传单个文件"""
+    start = time.perf_counter()
     with open(file_path, 'rb') as f:
         async with session.put(url, data=f, headers={"Content-Type": ""}) as resp:
+            observe_upstream("mineru", "upload", time.perf_counter() - start, resp.status != 200)
             if resp.status == 200:
                 logger.info(f"[MINERU] uploaded: {os.path.basename(file_path)}")
             else:
@@ -41,29 +92,95 @@ async def _upload(session: aiohttp.ClientSession, file_path: str, url: str):
                 logger.error(f"[MINERU] upload failed: {resp.status} - {text}")
 
 
-async def _poll(session: aiohttp.ClientSession, batch_id: str) -> List[dict]:
-    """轮询任务状态"""
+async def _poll(session: aiohttp.ClientSession, batch_id: str, deadline: float) -> List[dict]:
+    """轮询任务状态（poll 耗时为提交到全部完成的总时长），超过 deadline 仍未完成时抛出 TimeoutError"""
+    start = time.perf_counter()
     while True:
         async with session.get(f"{settings.MINERU_RESULT_URL}/{batch_id}", headers=settings.MINERU_HEADERS) as resp:
             result = await resp.json()
             if result.get("code") != 0:
                 logger.warning(f"[MINERU] poll failed: {result}")
-                await asyncio.sleep(settings.MINERU_POLL_INTERVAL)
-                continue
-            
-            items = result["data"]["extract_result"]
-            running = [i for i in items if i["state"] not in ["done", "failed"]]
-            
-            for i in items:
-                logger.info(f"[MINERU] {i['file_name']}: {i['state']}")
-            
-            if not running:
-                return items
+                UPSTREAM_ERRORS.labels("mineru", "poll").inc()
+            else:
+                items = result["data"]["extract_result"]
+                running = [i for i in items if i["state"] not in ["done", "failed"]]
+                
+                for i in items:
+                    logger.info(f"[MINERU] {i['file_name']}: {i['state']}")
+                
+                if not running:
+                    observe_upstream("mineru", "poll", time.perf_counter() - start)
+                    return items
         
+        if time.time() >= deadline:
+            observe_upstream("mineru", "poll", time.perf_counter() - start, error=True)
+            raise TimeoutError(f"batch {batch_id} not finished within {settings.MINERU_POLL_TIMEOUT}s")
         await asyncio.sleep(settings.MINERU_POLL_INTERVAL)
 
 
-async def _download(session: aiohttp.ClientSession, items: List[dict], output_dir: str):
+def _referenced_images(zf: zipfile.ZipFile, member: zipfile.ZipInfo) -> List[str]:
+    """收集 full.md / content_list.json 引用的图片路径（相对压缩包根目录）"""
+    base = posixpath.dirname(member.filename)
+    raw = zf.read(member)
+    
+    refs = []
+    if member.filename.endswith(".md"):
+        refs = MD_IMAGE_RE.findall(raw.decode("utf-8", errors="ignore"))
+    elif member.filename.endswith(".json"):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return []
+        if isinstance(data, list):
+            refs = [i.get("img_path") for i in data if isinstance(i, dict) and i.get("img_path")]
+    
+    return [posixpath.normpath(posixpath.join(base, r)) for r in refs
+            if not r.startswith(("http://", "https://"))]
+
+
+def _select_members(zf: zipfile.ZipFile, extract_all: bool = False) -> List[zipfile.ZipInfo]:
+    """筛选需要解压的成员: 默认仅保留解析器用到的文件"""
+    files = [m for m in zf.infolist() if not m.is_dir()]
+    if extract_all:
+        return files
+    
+    patterns = settings.MINERU_EXTRACT_PATTERNS
+    selected = [m for m in files
+                if any(fnmatch(posixpath.basename(m.filename), p) or fnmatch(m.filename, p) for p in patterns)]
+    
+    refs = set()
+    for m in selected:
+        refs.update(_referenced_images(zf, m))
+    
+    chosen = {m.filename for m in selected}
+    selected.extend(m for m in files if m.filename in refs and m.filename not in chosen)
+    return selected
+
+
+def _extract(data: bytes, target: Path, extract_all: bool = False) -> int:
+    """解压结果压缩包到清空后的目标目录（不保留同名PDF的旧结果），返回写入的文件数"""
+    if target.exists():
+        shutil.rmtree(target)
+    target.mkdir(parents=True)
+    root = target.resolve()
+    count = 0
+    
+    with zipfile.ZipFile(io.BytesIO(data), 'r') as zf:
+        for member in _select_members(zf, extract_all):
+            path = (target / member.filename).resolve()
+            if root not in path.parents:
+                logger.warning(f"[MINERU] skip unsafe member: {member.filename}")
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(member) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            count += 1
+    
+    return count
+
+
+async def _download(session: aiohttp.ClientSession, items: List[dict], output_dir: str,
+                    extract_all: bool = False):
     """下载并解压结果"""
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
@@ -74,45 +191,274 @@ async def _download(session: aiohttp.ClientSession, items: List[dict], output_di
         
         name = Path(item["file_name"]).stem
         target = Path(output_dir) / name
-        target.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"[MINERU] downloading: {item['full_zip_url']}")
+        start = time.perf_counter()
         async with session.get(item["full_zip_url"]) as resp:
             if resp.status != 200:
+                observe_upstream("mineru", "download", time.perf_counter() - start, error=True)
                 logger.error(f"[MINERU] download failed: {resp.status}")
                 continue
             
-            data = io.BytesIO(await resp.read())
+            data = await resp.read()
+        observe_upstream("mineru", "download", time.perf_counter() - start)
         
-        with zipfile.ZipFile(data, 'r') as zf:
-            for member in zf.infolist():
-                if member.is_dir():
-                    continue
-                path = target / member.filename
-                path.parent.mkdir(parents=True, exist_ok=True)
-                with zf.open(member) as src, open(path, "wb") as dst:
-                    dst.write(src.read())
+        count = await asyncio.to_thread(_extract, data, target, extract_all)
+        item["extract_dir"] = str(target)
+        logger.info(f"[MINERU] extracted: {name}, files={count}")
+
+
+async def _lookup_cache(file_paths: List[str], out: str, extract_all: bool) -> tuple:
+    """按内容指纹查找缓存，返回 (命中结果{idx: item}, 文件键列表)"""
+    store = get_store()
+    hits, keys = {}, []
+    
+    for idx, path in enumerate(file_paths):
+        key = make_key(await asyncio.to_thread(fingerprint, path), extract_all)
+        keys.append(key)
         
-        logger.info(f"[MINERU] extracted: {name}")
+        target = Path(out) / Path(path).stem
+        hit = await asyncio.to_thread(store.restore, key, target)
+        record_cache("mineru_result", hit)
+        if hit:
+            name = os.path.basename(path)
+            hits[idx] = {"file_name": name, "data_id": name, "state": "done",
+                         "cached": True, "extract_dir": str(target)}
+            logger.info(f"[MINERU] cache hit: {name}")
+    
+    return hits, keys
 
 
-async def process_files(file_paths: List[str], output_dir: Optional[str] = None) -> List[dict]:
-    """处理PDF文件"""
+def plan_batches(pending: List[tuple], max_files: Optional[int] = None,
+                 max_bytes: Optional[int] = None) -> List[List[tuple]]:
+    """按文件数和总字节数将待处理文件拆分为大小均衡的批次
+    
+    Args:
+        pending: [(输入序号, 文件路径, 缓存键)]
+        max_files: 单批最大文件数（默认 MINERU_BATCH_MAX_FILES）
+        max_bytes: 单批最大字节数（默认 MINERU_BATCH_MAX_BYTES，超限的单个文件独占一批）
+    
+    Returns:
+        批次列表，批内与批间均按输入序号排列
+    """
+    max_files = max_files or settings.MINERU_BATCH_MAX_FILES
+    max_bytes = max_bytes or settings.MINERU_BATCH_MAX_BYTES
+    if not pending:
+        return []
+    
+    sizes = {p[0]: os.path.getsize(p[1]) for p in pending}
+    total = sum(sizes.values())
+    count = max(math.ceil(len(pending) / max_files), math.ceil(total / max_bytes), 1)
+    
+    # 从大到小放入当前最轻且仍有余量的批次
+    bins = [{"files": [], "bytes": 0} for _ in range(count)]
+    for entry in sorted(pending, key=lambda p: sizes[p[0]], reverse=True):
+        size = sizes[entry[0]]
+        fits = [b for b in bins if len(b["files"]) < max_files
+                and (not b["files"] or b["bytes"] + size <= max_bytes)]
+        target = min(fits, key=lambda b: b["bytes"]) if fits else None
+        if target is None:
+            target = {"files": [], "bytes": 0}
+            bins.append(target)
+        target["files"].append(entry)
+        target["bytes"] += size
+    
+    batches = [sorted(b["files"], key=lambda p: p[0]) for b in bins if b["files"]]
+    return sorted(batches, key=lambda b: b[0][0])
+
+
+def _failed_item(file_name: str, reason: str) -> dict:
+    """未取得结果的输入文件对应的失败记录"""
+    return {"file_name": file_name, "state": "failed", "err_msg": reason}
+
+
+@asynccontextmanager
+async def _lease(journal, batch_id: str):
+    """处理批次期间定期刷新心跳，其他进程据此判断批次仍在处理"""
+    async def beat():
+        while True:
+            await asyncio.sleep(settings.MINERU_JOURNAL_LEASE / 3)
+            if not await asyncio.to_thread(journal.heartbeat, batch_id):
+                logger.warning(f"[MINERU] batch {batch_id} claimed by another process")
+    
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+async def _finish_batch(session: aiohttp.ClientSession, batch_id: str, files: List[tuple],
+                        out: str, extract_all: bool, use_cache: bool, created: float) -> Dict[int, dict]:
+    """轮询并下载已上传的批次，返回 {输入序号: 结果}（批次结果中缺失的文件记为失败）
+    
+    Args:
+        files: [(输入序号, 文件名, 缓存键)]
+        created: 批次提交时间，超过 MINERU_POLL_TIMEOUT 仍未完成时批次记为失败
+    """
+    journal = await asyncio.to_thread(get_journal)
+    await asyncio.to_thread(journal.set_batch_state, batch_id, POLLING)
+    
+    try:
+        items = await _poll(session, batch_id, created + settings.MINERU_POLL_TIMEOUT)
+    except TimeoutError:
+        await asyncio.to_thread(journal.set_batch_state, batch_id, FAILED)
+        raise
+    await _download(session, items, out, extract_all)
+    
+    by_name = {i["file_name"]: i for i in items}
+    results = {}
+    for idx, name, key in files:
+        item = by_name.get(name)
+        if item is None:
+            item = _failed_item(name, "missing from batch result")
+        results[idx] = item
+        await asyncio.to_thread(journal.set_item_state, batch_id, name, item["state"], item.get("extract_dir"))
+        if use_cache and key and item.get("extract_dir"):
+            await asyncio.to_thread(get_store().put, key, Path(item["extract_dir"]), name)
+    
+    await asyncio.to_thread(journal.set_batch_state, batch_id, DONE)
+    return results
+
+
+async def _run_batch(session: aiohttp.ClientSession, pending: List[tuple], out: str,
+                     extract_all: bool, use_cache: bool) -> Dict[int, dict]:
+    """提交一个批次: 申请URL → 写入日志 → 上传 → 轮询下载
+    
+    Args:
+        pending: [(输入序号, 文件路径, 缓存键)]
+    """
+    paths = [p for _, p, _ in pending]
+    batch_id, urls = await _apply_urls(session, paths)
+    created = time.time()
+    
+    journal = await asyncio.to_thread(get_journal)
+    await asyncio.to_thread(journal.record_batch, batch_id, out, [
+        {"file_path": p, "file_name": os.path.basename(p), "url": url, "cache_key": key}
+        for (_, p, key), url in zip(pending, urls)
+    ], extract_all, use_cache)
+    
+    async with _lease(journal, batch_id):
+        for path, url in zip(paths, urls):
+            await _upload(session, path, url)
+            await asyncio.to_thread(journal.set_item_state, batch_id, os.path.basename(path), "uploaded")
+        
+        files = [(idx, os.path.basename(p), key) for idx, p, key in pending]
+        return await _finish_batch(session, batch_id, files, out, extract_all, use_cache, created)
+
+
+async def process_files(file_paths: List[str], output_dir: Optional[str] = None,
+                        extract_all: Optional[bool] = None, use_cache: Optional[bool] = None) -> List[dict]:
+    """处理PDF文件
+    
+    Args:
+        file_paths: PDF路径列表
+        output_dir: 输出目录
+        extract_all: 是否解压完整压缩包（默认取 MINERU_EXTRACT_ALL，仅解压解析器所需文件）
+        use_cache: 是否按内容指纹复用结果库（默认取 MINERU_CACHE_ENABLED）
+    
+    Returns:
+        与输入一一对应的结果列表；所在批次失败的文件为 {file_name, state: "failed", err_msg}
+    """
     out = output_dir or settings.DOWNLOAD_DIR
+    full = settings.MINERU_EXTRACT_ALL if extract_all is None else extract_all
+    cache = settings.MINERU_CACHE_ENABLED if use_cache is None else use_cache
     
-    async with aiohttp.ClientSession() as session:
-        batch_id, urls = await _apply_urls(session, file_paths)
+    hits, keys = await _lookup_cache(file_paths, out, full) if cache else ({}, [])
+    pending = [(idx, p, keys[idx] if keys else None)
+               for idx, p in enumerate(file_paths) if idx not in hits]
+    
+    results = dict(hits)
+    batches = plan_batches(pending)
+    if batches:
+        logger.info(f"[MINERU] {len(pending)} files planned into {len(batches)} batches")
+        sem = asyncio.Semaphore(settings.MINERU_MAX_CONCURRENT_BATCHES)
         
-        for path, url in zip(file_paths, urls):
-            await _upload(session, path, url)
+        async with _session_scope() as session:
+            async def run(batch):
+                async with sem:
+                    with MINERU_BATCHES_ACTIVE.track():
+                        return await _run_batch(session, batch, out, full, cache)
+            
+            outcomes = await asyncio.gather(*(run(b) for b in batches), return_exceptions=True)
         
-        results = await _poll(session, batch_id)
-        await _download(session, results, out)
+        errors = []
+        for batch, o in zip(batches, outcomes):
+            if isinstance(o, BaseException):
+                errors.append(o)
+                logger.error(f"[MINERU] batch failed: {o}")
+                for idx, path, _ in batch:
+                    results[idx] = _failed_item(os.path.basename(path), str(o))
+            else:
+                results.update(o)
+        if len(errors) == len(batches):
+            raise errors[0]
+    
+    logger.info(f"[MINERU] done: total={len(file_paths)}, cached={len(hits)}, batches={len(batches)}")
+    return [results[idx] for idx in range(len(file_paths))]
+
+
+async def _resume_batch(session: aiohttp.ClientSession, journal, batch: dict) -> List[dict]:
+    """续跑已认领的批次: 补传未上传的文件 → 轮询下载；失败时批次记为失败"""
+    batch_id = batch["batch_id"]
+    try:
+        async with _lease(journal, batch_id):
+            if batch["state"] == UPLOADING:
+                for i in batch["items"]:
+                    if i["state"] != "pending":
+                        continue
+                    if not os.path.exists(i["file_path"]):
+                        raise FileNotFoundError(f"File not found: {i['file_path']}")
+                    await _upload(session, i["file_path"], i["url"])
+                    await asyncio.to_thread(journal.set_item_state, batch_id, i["file_name"], "uploaded")
+            
+            files = [(i["idx"], i["file_name"], i["cache_key"]) for i in batch["items"]]
+            done = await _finish_batch(session, batch_id, files, batch["output_dir"],
+                                       bool(batch["extract_all"]), bool(batch["use_cache"]), batch["created"])
+    except Exception as e:
+        logger.error(f"[MINERU] resume batch {batch_id} failed: {e}")
+        await asyncio.to_thread(journal.set_batch_state, batch_id, FAILED)
+        return []
+    
+    logger.info(f"[MINERU] resumed batch {batch_id}: {len(done)} files")
+    return [done[idx] for idx in sorted(done)]
+
+
+async def resume_pending() -> List[dict]:
+    """续跑日志中未完成的批次（应用启动时调用，批次间并发）
+    
+    多worker时每个批次只由认领成功的进程续跑；心跳未过期的批次（如重启前的旧进程刚退出）等待一个租约后再认领一次。
+    """
+    journal = await asyncio.to_thread(get_journal)
+    batches = await asyncio.to_thread(journal.unfinished)
+    if not batches:
+        return []
+    
+    logger.info(f"[MINERU] {len(batches)} unfinished batches")
+    sem = asyncio.Semaphore(settings.MINERU_MAX_CONCURRENT_BATCHES)
+    
+    async with _session_scope() as session:
+        async def resume(b, retry=True):
+            async with sem:
+                if await asyncio.to_thread(journal.claim, b):
+                    with MINERU_BATCHES_ACTIVE.track():
+                        return await _resume_batch(session, journal, b)
+            if not retry:
+                logger.info(f"[MINERU] batch {b['batch_id']} owned by {b['owner']}, skipped")
+                return []
+            await asyncio.sleep(settings.MINERU_JOURNAL_LEASE)
+            return await resume(b, retry=False)
         
-        logger.info("[MINERU] done")
-        return results
+        outcomes = await asyncio.gather(*(resume(b) for b in batches))
+    
+    return [r for done in outcomes for r in done]
 
 
-def process_sync(file_paths: List[str], output_dir: Optional[str] = None) -> List[dict]:
-    """同步版本"""
-    return asyncio.run(process_files(file_paths, output_dir))
+def process_sync(file_paths: List[str], output_dir: Optional[str] = None,
+                 extract_all: Optional[bool] = None, use_cache: Optional[bool] = None) -> List[dict]:
+    """同步版本，仅供脚本使用；事件循环内请直接 await process_files"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(process_files(file_paths, output_dir, extract_all, use_cache))
+    raise RuntimeError("process_sync called inside a running event loop, await process_files instead")
@@ -0,0 +1,161 @@
+"""MinerU批次日志: 持久化batch_id与各文件状态，进程重启后可续跑"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+
+TAG = "[MINERU_JOURNAL]"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id    TEXT PRIMARY KEY,
+    output_dir  TEXT NOT NULL,
+    extract_all INTEGER NOT NULL DEFAULT 0,
+    use_cache   INTEGER NOT NULL DEFAULT 1,
+    state       TEXT NOT NULL,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL,
+    owner       TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    batch_id    TEXT NOT NULL,
+    idx         INTEGER NOT NULL,
+    file_path   TEXT NOT NULL,
+    file_name   TEXT NOT NULL,
+    url         TEXT NOT NULL,
+    cache_key   TEXT,
+    state       TEXT NOT NULL,
+    extract_dir TEXT,
+    PRIMARY KEY (batch_id, idx)
+);
+"""
+
+# 批次状态
+UPLOADING = "uploading"
+POLLING = "polling"
+DONE = "done"
+FAILED = "failed"
+
+
+_token: Optional[tuple] = None  # (pid, 认领标识)
+
+
+def _owner() -> str:
+    """当前进程的认领标识 <主机名>:<随机串>，每个进程启动后新生成（重启或PID复用后不会与旧进程相同）"""
+    global _token
+    if _token is None or _token[0] != os.getpid():
+        _token = (os.getpid(), f"{socket.gethostname()}:{uuid.uuid4().hex[:12]}")
+    return _token[1]
+
+
+class BatchJournal:
+    """基于SQLite的批次日志"""
+    
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(batches)")}
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE batches ADD COLUMN owner TEXT")
+    
+    def record_batch(self, batch_id: str, output_dir: str, files: List[Dict],
+                     extract_all: bool = False, use_cache: bool = True):
+        """登记新批次（上传前调用）
+        
+        Args:
+            files: [{file_path, file_name, url, cache_key}]
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (batch_id, output_dir, int(extract_all), int(use_cache), UPLOADING, now, now, _owner())
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, NULL)",
+                [(batch_id, idx, f["file_path"], f["file_name"], f["url"], f.get("cache_key"), "pending")
+                 for idx, f in enumerate(files)]
+            )
+        logger.info(f"{TAG} recorded batch {batch_id}: {len(files)} files")
+    
+    def set_batch_state(self, batch_id: str, state: str):
+        """更新批次状态"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE batches SET state = ?, updated = ? WHERE batch_id = ?",
+                               (state, time.time(), batch_id))
+    
+    def set_item_state(self, batch_id: str, file_name: str, state: str, extract_dir: Optional[str] = None):
+        """更新文件状态"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE items SET state = ?, extract_dir = COALESCE(?, extract_dir) "
+                "WHERE batch_id = ? AND file_name = ?",
+                (state, extract_dir, batch_id, file_name)
+            )
+    
+    def heartbeat(self, batch_id: str) -> bool:
+        """刷新所持批次的心跳；批次已被其他进程认领时返回 False"""
+        with self._lock, self._conn:
+            cur = self._conn.execute("UPDATE batches SET updated = ? WHERE batch_id = ? AND owner = ?",
+                                     (time.time(), batch_id, _owner()))
+        return cur.rowcount == 1
+    
+    def claim(self, batch: Dict) -> bool:
+        """认领 unfinished() 中的批次用于续跑
+        
+        仅当心跳超过 MINERU_JOURNAL_LEASE 未刷新（所属进程已退出）时可认领；
+        按读取时的 owner 原子更新，多个进程同时续跑时只有一个成功。
+        """
+        if batch.get("owner") == _owner():
+            return False
+        now = time.time()
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "UPDATE batches SET owner = ?, updated = ? "
+                "WHERE batch_id = ? AND owner IS ? AND updated < ? AND state NOT IN (?, ?)",
+                (_owner(), now, batch["batch_id"], batch.get("owner"),
+                 now - settings.MINERU_JOURNAL_LEASE, DONE, FAILED)
+            )
+        return cur.rowcount == 1
+    
+    def unfinished(self) -> List[Dict]:
+        """未完成的批次及其文件"""
+        with self._lock:
+            batches = self._conn.execute(
+                "SELECT * FROM batches WHERE state NOT IN (?, ?) ORDER BY created", (DONE, FAILED)
+            ).fetchall()
+            result = []
+            for b in batches:
+                items = self._conn.execute(
+                    "SELECT * FROM items WHERE batch_id = ? ORDER BY idx", (b["batch_id"],)
+                ).fetchall()
+                result.append({**dict(b), "items": [dict(i) for i in items]})
+        return result
+    
+    def close(self):
+        """关闭连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_journal: Optional[BatchJournal] = None
+
+
+def get_journal() -> BatchJournal:
+    """获取日志实例（首次调用时打开数据库）"""
+    global _journal
+    if _journal is None:
+        _journal = BatchJournal(settings.MINERU_JOURNAL_PATH)
+    return _journal
@@ -0,0 +1,193 @@
+"""图片资源: 按内容哈希生成并缓存缩放后的派生图（幻灯片展示 / LLM输入）"""
+
+import os
+import time
+import shutil
+import hashlib
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from PIL import Image
+
+from app.core.config import settings
+from app.core.disk_lru import TMP_SUFFIX, DiskLRU, touch
+from app.core.logger import logger
+from app.core.metrics import STAGE_DURATION, record_cache
+
+TAG = "[ASSET]"
+JPEG_SUFFIXES = (".jpg", ".jpeg")
+
+
+def _variant_sides() -> Dict[str, int]:
+    """派生图类型 -> 最长边像素"""
+    return {"display": settings.IMAGE_DISPLAY_MAX_SIDE, "llm": settings.IMAGE_LLM_MAX_SIDE}
+
+
+def _derive(src: str, dst: str, max_side: int, quality: int):
+    """生成单张派生图（进程池中执行）: 长边不超过 max_side，JPEG保持JPEG，其余输出PNG"""
+    as_jpeg = dst.endswith(".jpg")
+    tmp = f"{dst}.{os.getpid()}{TMP_SUFFIX}"
+    try:
+        with Image.open(src) as img:
+            fits = max(img.size) <= max_side
+            if fits and img.format == ("JPEG" if as_jpeg else "PNG"):
+                shutil.copyfile(src, tmp)
+            else:
+                if as_jpeg:
+                    img.draft(img.mode, (max_side, max_side))  # 按DCT比例缩小解码
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+                if as_jpeg:
+                    if img.mode not in ("RGB", "L"):
+                        img = img.convert("RGB")
+                    img.save(tmp, "JPEG", quality=quality)
+                else:
+                    img.save(tmp, "PNG", compress_level=6)
+        os.replace(tmp, dst)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class ImageAssetStore:
+    """派生图磁盘缓存
+    
+    文件名为 <内容SHA-256>_<类型><最长边>.<扩展名>，跨运行复用；相同内容的不同路径共享同一派生图。
+    缺失的派生图在进程池中并行生成，超出容量按最近访问时间淘汰。
+    
+    Args:
+        root: 缓存目录
+        max_bytes: 缓存容量上限
+        workers: 生成进程数，0 表示在当前线程生成
+        quality: JPEG质量
+    """
+    
+    def __init__(self, root: str, max_bytes: int, workers: int = 4, quality: int = 85):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.quality = quality
+        self._digests: Dict[Tuple[str, int, int], str] = {}  # (路径, 大小, 修改时间) -> 内容哈希
+        self._failed: Set[Path] = set()  # 生成失败的目标文件，本进程内不再重试
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._lru = DiskLRU(self.root, max_bytes, "*/*_*.*", TAG)
+    
+    def _digest(self, path: Path) -> Optional[str]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = (str(path), st.st_size, st.st_mtime_ns)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()[:32]
+            self._digests[key] = digest
+        return digest
+    
+    def _target(self, digest: str, variant: str, max_side: int, src: Path) -> Path:
+        ext = "jpg" if src.suffix.lower() in JPEG_SUFFIXES else "png"
+        return self.root / digest[:2] / f"{digest}_{variant}{max_side}.{ext}"
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 服务进程为多线程，fork 可能复制他线程持有的锁，使用 spawn
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+    
+    def derive(self, paths: Iterable[str], variant: str) -> Dict[str, str]:
+        """返回 {原路径: 派生图路径}
+        
+        不存在的路径不出现在结果中；生成失败时退回原路径。
+        
+        Args:
+            paths: 图片路径
+            variant: 派生图类型（display / llm）
+        """
+        max_side = _variant_sides()[variant]
+        start = time.perf_counter()
+        result: Dict[str, str] = {}
+        jobs: Dict[Path, Tuple[str, list]] = {}  # 目标文件 -> (源文件, [原路径])
+        
+        for src in dict.fromkeys(paths):
+            path = Path(src)
+            digest = self._digest(path)
+            if digest is None:
+                continue
+            target = self._target(digest, variant, max_side, path)
+            if target in self._failed:
+                result[src] = src
+            elif target in jobs:
+                jobs[target][1].append(src)
+            elif touch(target):
+                result[src] = str(target)
+                record_cache("image_asset", True)
+            else:
+                jobs[target] = (src, [src])
+                record_cache("image_asset", False)
+        
+        if jobs:
+            for target in jobs:
+                target.parent.mkdir(parents=True, exist_ok=True)
+            args = [(src, str(target), max_side, self.quality) for target, (src, _) in jobs.items()]
+            if self.workers > 0 and len(args) > 1:
+                pool = self._get_pool()
+                futures = [pool.submit(_derive, *a) for a in args]
+            else:
+                futures = None
+            
+            for i, (target, (src, aliases)) in enumerate(jobs.items()):
+                try:
+                    futures[i].result() if futures else _derive(*args[i])
+                    derived = str(target)
+                except Exception as e:
+                    logger.warning(f"{TAG} derive failed, using original: {src}: {e}")
+                    self._failed.add(target)
+                    derived = src
+                for alias in aliases:
+                    result[alias] = derived
+            self._lru.added(sum(_size(t) for t in jobs if t not in self._failed))
+        
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.labels("image_assets", variant).observe(elapsed)
+        logger.info(f"{TAG} {variant}: {len(result)} images, generated={len(jobs)}, {elapsed * 1000:.0f}ms")
+        return result
+    
+    def evict(self) -> int:
+        """超出容量时淘汰最久未访问的派生图"""
+        return self._lru.evict()
+    
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# 单例
+_store = ImageAssetStore(settings.IMAGE_ASSET_DIR, settings.IMAGE_ASSET_MAX_BYTES,
+                         settings.IMAGE_ASSET_WORKERS, settings.IMAGE_JPEG_QUALITY)
+
+
+def derive_images(paths: Iterable[str], variant: str) -> Dict[str, str]:
+    """获取派生图路径 {原路径: 派生图路径}；未启用时返回存在的原路径"""
+    if not settings.IMAGE_ASSET_ENABLED:
+        return {p: p for p in paths if Path(p).is_file()}
+    return _store.derive(paths, variant)
+
+
+def shutdown():
+    """关闭进程池"""
+    _store.shutdown()
@@ -1,13 +1,14 @@
 """图表公式提取与分析服务"""
 
 import re
-import json
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 from app.core.logger import logger
+from app.core import jsoncodec
 from app.services.clients.dify_workflow_client import analyze_images, upload_files
+from app.services.document.asset_service import derive_images
 
 
 def _get_context(content: str, elem_id: int, elem_type: str, window: int = 200) -> str:
@@ -106,6 +107,15 @@ def analyze_elements(elements: List[Dict[str, Any]], base_path: Optional[Path] =
         logger.warning("[IMAGE] no elements")
         return []
     
+    results = list(iter_elements(elements, base_path))
+    
+    success = len([r for r in results if r.get("analysis")])
+    logger.info(f"[IMAGE] done: success={success}, failed={len(results)-success}")
+    return results
+
+
+def iter_elements(elements: List[Dict[str, Any]], base_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """逐个分析图表公式，每完成一个立即产出"""
     logger.info(f"[IMAGE] analyzing {len(elements)} elements")
     
     # 收集需要上传的图片
@@ -118,20 +128,24 @@ def analyze_elements(elements: List[Dict[str, Any]], base_path: Optional[Path] =
         if full.exists():
             to_upload.append(str(full))
     
-    # 批量上传
+    # 批量上传（缩放后的派生图，相同内容只上传一次）
     file_ids = {}
     if to_upload:
-        logger.info(f"[IMAGE] uploading {len(to_upload)} files")
         try:
-            results = upload_files(to_upload, continue_on_error=True)
-            for r in results:
+            derived = derive_images(to_upload, "llm")
+            unique = list(dict.fromkeys(derived.values()))
+            logger.info(f"[IMAGE] uploading {len(unique)} files ({len(to_upload)} referenced)")
+            uploaded = {}
+            for r in upload_files(unique, continue_on_error=True):
                 if r.get('success'):
-                    file_ids[r['file_path']] = r['file_id']
+                    uploaded[r['file_path']] = r['file_id']
+            for original, path in derived.items():
+                if path in uploaded:
+                    file_ids[original] = uploaded[path]
         except Exception as e:
             logger.error(f"[IMAGE] upload error: {e}")
     
     # 逐个分析
-    results = []
     for idx, elem in enumerate(elements, 1):
         info = elem.get("element", {})
         etype = info.get("type")
@@ -149,12 +163,12 @@ def analyze_elements(elements: List[Dict[str, Any]], base_path: Optional[Path] =
         # 构建prompt
         info_copy = info.copy()
         info_copy['img_path'] = file_id or ""
-        prompt = json.dumps({
+        prompt = jsoncodec.dumps({
             "abstract": elem.get("abstract", ""),
             "element": info_copy,
             "local_context": elem.get("local_context", ""),
             "section_content": elem.get("section_content", "")
-        }, ensure_ascii=False)
+        })
         
         # 调用分析
         try:
@@ -170,26 +184,42 @@ def analyze_elements(elements: List[Dict[str, Any]], base_path: Optional[Path] =
             )
             
             if answer:
-                results.append({
+                result = {
                     **elem,
                     "analysis": {
                         "element_id": answer.get("element_id", eid),
                         "element_type": answer.get("element_type", etype),
                         "analysis_text": answer.get("analysis_text", "")
                     }
-                })
+                }
                 logger.info(f"[IMAGE] {etype}-{eid}: success")
             else:
-                results.append({**elem, "analysis": None, "error": "Empty response"})
+                result = {**elem, "analysis": None, "error": "Empty response"}
                 
         except Exception as e:
             logger.error(f"[IMAGE] {etype}-{eid}: {e}")
-            results.append({**elem, "analysis": None, "error": str(e)})
+            result = {**elem, "analysis": None, "error": str(e)}
+        
+        yield result
         
         if idx < len(elements):
             time.sleep(1)
+
+
+def iter_image_analysis(parse_result: Dict[str, Any], base_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """流式图表分析，逐个产出元素分析结果，最后产出 statistics
     
-    success = len([r for r in results if r.get("analysis")])
-    logger.info(f"[IMAGE] done: success={success}, failed={len(results)-success}")
-    return results
+    Yields:
+        {"event": "element" | "statistics", "data": ...}
+    """
+    elements = extract_elements(parse_result)
+    success = 0
+    for result in iter_elements(elements, base_path):
+        if result.get("analysis"):
+            success += 1
+        yield {"event": "element", "data": result}
+    
+    stats = {"total": len(elements), "success": success, "failed": len(elements) - success}
+    logger.info(f"[IMAGE] stream done: {stats}")
+    yield {"event": "statistics", "data": stats}
 
@@ -2,7 +2,7 @@
 
 import re
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 from app.core.logger import logger
 from app.services.clients.dify_workflow_client import analyze_summary, analyze_basic
@@ -20,14 +20,7 @@ class NLPService:
         basic_info = self._analyze_basic_info(parse_result)
         segments = self._extract_sections(parse_result)
         sections_analysis = self._analyze_sections(segments, abstract)
-        
-        stats = {
-            "total": len(segments),
-            "analyzed": len(sections_analysis),
-            "success": len([s for s in sections_analysis if not s.get("error")]),
-            "failed": len([s for s in sections_analysis if s.get("error")]),
-            "skipped": len(segments) - len(sections_analysis)
-        }
+        stats = self._statistics(segments, sections_analysis)
         
         logger.info(f"[NLP] analyze_full_document done: {stats}")
         
@@ -38,6 +31,37 @@ class NLPService:
             "statistics": stats
         }
     
+    def iter_full_document(self, parse_result: Dict[str, Any], abstract: str) -> Iterator[Dict[str, Any]]:
+        """流式完整文档分析，依次产出 basic_info、各章节分析、statistics
+        
+        Yields:
+            {"event": "basic_info" | "section" | "statistics", "data": ...}
+        """
+        logger.info("[NLP] iter_full_document start")
+        
+        yield {"event": "basic_info", "data": self._analyze_basic_info(parse_result)}
+        
+        segments = self._extract_sections(parse_result)
+        sections_analysis = []
+        for analysis in self._iter_sections(segments, abstract):
+            sections_analysis.append(analysis)
+            yield {"event": "section", "data": analysis}
+        
+        stats = self._statistics(segments, sections_analysis)
+        logger.info(f"[NLP] iter_full_document done: {stats}")
+        yield {"event": "statistics", "data": stats}
+    
+    @staticmethod
+    def _statistics(segments: List[Dict], sections_analysis: List[Dict]) -> Dict[str, int]:
+        """统计章节分析结果"""
+        return {
+            "total": len(segments),
+            "analyzed": len(sections_analysis),
+            "success": len([s for s in sections_analysis if not s.get("error")]),
+            "failed": len([s for s in sections_analysis if s.get("error")]),
+            "skipped": len(segments) - len(sections_analysis)
+        }
+    
     def _analyze_basic_info(self, parse_result: Dict[str, Any]) -> Dict[str, Any]:
         """提取文章基础信息"""
         def make_result(title="", subtitle="", authors=None, affiliation="", date="", error=None):
@@ -187,8 +211,15 @@ class NLPService:
             logger.warning("[NLP] analyze_sections: no segments")
             return []
         
+        results = list(self._iter_sections(segments, abstract))
+        
+        success = len([r for r in results if not r.get("error")])
+        logger.info(f"[NLP] analyze_sections done: success={success}, failed={len(results)-success}")
+        return results
+    
+    def _iter_sections(self, segments: List[Dict], abstract: str) -> Iterator[Dict[str, Any]]:
+        """逐个分析章节片段，每完成一个立即产出"""
         logger.info(f"[NLP] analyze_sections: {len(segments)} segments")
-        results = []
         summaries_cache = {}
         
         for idx, seg in enumerate(segments, 1):
@@ -227,25 +258,22 @@ class NLPService:
                         "summary": analysis["summary"]
                     })
                 
-                results.append(analysis)
                 logger.info(f"[NLP] analyzed {seg_id}: success")
                 
             except Exception as e:
                 logger.error(f"[NLP] analyzed {seg_id}: {e}")
-                results.append({
+                analysis = {
                     "id": seg_id,
                     "section_name": seg["name"],
                     "summary": "",
                     "key_points": [],
                     "error": str(e)
-                })
+                }
+            
+            yield analysis
             
             if idx < len(segments):
                 time.sleep(1)
-        
-        success = len([r for r in results if not r.get("error")])
-        logger.info(f"[NLP] analyze_sections done: success={success}, failed={len(results)-success}")
-        return results
     
     def _build_prompt(self, abstract: str, name: str, content: str, 
                       prev_summaries: Optional[List[Dict]] = None) -> str:
@@ -267,6 +295,11 @@ def analyze_full_document(parse_result: Dict[str, Any], abstract: str) -> Dict[s
     return _service.analyze_full_document(parse_result, abstract)
 
 
+def iter_full_document(parse_result: Dict[str, Any], abstract: str) -> Iterator[Dict[str, Any]]:
+    """流式完整文档分析"""
+    return _service.iter_full_document(parse_result, abstract)
+
+
 def extract_article_basic_info(parse_result: Dict[str, Any]) -> Dict[str, Any]:
     """提取文章基础信息"""
     return _service._analyze_basic_info(parse_result)
@@ -1,12 +1,13 @@
 """大纲生成服务 - 解析文档并生成PPT大纲"""
 
-import json
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Callable
 
 from app.core.logger import logger
-from app.services.clients.dify_workflow_client import analyze_outline
+from app.core import jsoncodec
+from app.core.metrics import STAGE_DURATION
+from app.services.clients.dify_workflow_client import analyze_outline as _analyze_outline
 from app.services.document.parse_service import parse_markdown
 from app.services.document.image_service import extract_elements, analyze_elements
 
@@ -96,93 +97,162 @@ def _extract_sections(parse_result: Dict, element_map: Dict) -> List[Dict]:
     return results
 
 
-def generate_outline(parse_result: Dict, visual_analysis: List[Dict]) -> Dict:
-    """生成PPT大纲
+def build_outline(parse_result: Dict, visual_analysis: List[Dict]) -> List[Dict]:
+    """构建大纲输入
     
     Args:
         parse_result: 文档解析结果
         visual_analysis: 图表公式分析结果
     
     Returns:
-        {sections: [{section_name, raw_result}], statistics: {total, success, failed}}
+        [{abstract, section_name, content, refs}]，每个章节一条
     """
-    logger.info(f"{TAG} generating outline")
-    
     element_map = _build_element_map(visual_analysis)
-    sections_data = _extract_sections(parse_result, element_map)
-    
-    if not sections_data:
-        return {"sections": [], "statistics": {"total": 0, "success": 0, "failed": 0}}
-    
-    results = []
-    total = len(sections_data)
+    return _extract_sections(parse_result, element_map)
+
+
+def iter_outline(outline_inputs: List[Dict]) -> Iterator[Dict]:
+    """逐章节分析大纲，每完成一个章节立即产出
     
-    for idx, data in enumerate(sections_data, 1):
+    Yields:
+        {section_name, raw_result}，失败时 raw_result 为 None 并附 error
+    """
+    total = len(outline_inputs)
+    for idx, data in enumerate(outline_inputs, 1):
         name = data["section_name"]
         logger.info(f"{TAG} [{idx}/{total}] {name[:40]}")
         
         try:
-            query = json.dumps(data, ensure_ascii=False)
-            raw_result = analyze_outline(query=query)
-            results.append({"section_name": name, "raw_result": raw_result})
+            query = jsoncodec.dumps(data)
+            raw_result = _analyze_outline(query=query)
             logger.info(f"{TAG} [{idx}/{total}] success")
+            yield {"section_name": name, "raw_result": raw_result}
         except Exception as e:
             logger.error(f"{TAG} [{idx}/{total}] failed: {e}")
-            results.append({"section_name": name, "raw_result": None, "error": str(e)})
+            yield {"section_name": name, "raw_result": None, "error": str(e)}
         
         if idx < total:
             time.sleep(1)
-    
+
+
+def _outline_statistics(results: List[Dict]) -> Dict:
     success = len([r for r in results if not r.get("error")])
-    failed = total - success
-    logger.info(f"{TAG} done: success={success}, failed={failed}")
+    return {"total": len(results), "success": success, "failed": len(results) - success}
+
+
+def analyze_outline(outline_inputs: List[Dict]) -> Dict:
+    """逐章节分析大纲
     
-    return {
-        "sections": results,
-        "statistics": {"total": total, "success": success, "failed": failed}
-    }
+    Args:
+        outline_inputs: build_outline 的输出
+    
+    Returns:
+        {sections: [{section_name, raw_result}], statistics: {total, success, failed}}
+    """
+    if not outline_inputs:
+        return {"sections": [], "statistics": {"total": 0, "success": 0, "failed": 0}}
+    
+    results = list(iter_outline(outline_inputs))
+    stats = _outline_statistics(results)
+    logger.info(f"{TAG} done: success={stats['success']}, failed={stats['failed']}")
+    return {"sections": results, "statistics": stats}
 
 
-def process_document(md_path: str, json_path: Optional[str] = None) -> Dict:
-    """完整文档处理流程
+def generate_outline(parse_result: Dict, visual_analysis: List[Dict]) -> Dict:
+    """生成PPT大纲
     
     Args:
-        md_path: Markdown文件路径
-        json_path: content_list.json路径（可选）
+        parse_result: 文档解析结果
+        visual_analysis: 图表公式分析结果
     
     Returns:
-        {parse_result, visual_analysis, outline, statistics}
+        {sections: [{section_name, raw_result}], statistics: {total, success, failed}}
+    """
+    logger.info(f"{TAG} generating outline")
+    return analyze_outline(build_outline(parse_result, visual_analysis))
+
+
+def iter_process_document(md_path: str, json_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """流式文档处理: 解析与图表分析完成后各产出一次，大纲每完成一个章节产出一次，最后产出 statistics
+    
+    Yields:
+        {"event": "parse_result" | "visual_analysis" | "section" | "statistics", "data": ...}
     """
     logger.info(f"{TAG} process: {md_path}")
     base = Path(md_path).parent
     
     # 解析文档
-    parse_result = parse_markdown(md_path, json_path)
+    with STAGE_DURATION.labels("process_document", "parse").time():
+        parse_result = parse_markdown(md_path, json_path)
     logger.info(f"{TAG} parsed: {parse_result.get('metadata', {})}")
+    yield {"event": "parse_result", "data": parse_result}
     
     # 提取并分析图表公式
-    elements = extract_elements(parse_result)
-    visual_analysis = analyze_elements(elements, base)
+    with STAGE_DURATION.labels("process_document", "visual_analysis").time():
+        elements = extract_elements(parse_result)
+        visual_analysis = analyze_elements(elements, base)
     analyzed = len([v for v in visual_analysis if v.get("analysis")])
     logger.info(f"{TAG} elements: {len(elements)} extracted, {analyzed} analyzed")
+    yield {"event": "visual_analysis", "data": visual_analysis}
     
-    # 生成大纲
-    outline = generate_outline(parse_result, visual_analysis)
+    # 生成大纲（逐章节）
+    logger.info(f"{TAG} generating outline")
+    start = time.perf_counter()
+    sections = []
+    for section in iter_outline(build_outline(parse_result, visual_analysis)):
+        sections.append(section)
+        yield {"event": "section", "data": section}
+    STAGE_DURATION.labels("process_document", "outline").observe(time.perf_counter() - start)
     
     meta = parse_result.get("metadata", {})
-    stats = outline.get("statistics", {})
+    stats = _outline_statistics(sections)
+    logger.info(f"{TAG} outline done: success={stats['success']}, failed={stats['failed']}")
+    yield {"event": "statistics", "data": {
+        "sections": meta.get("total_sections", 0),
+        "elements": len(elements),
+        "analyzed": analyzed,
+        "outline_total": stats["total"],
+        "outline_success": stats["success"],
+        "outline_failed": stats["failed"]
+    }}
+
+
+def process_document(md_path: str, json_path: Optional[str] = None,
+                     on_progress: Optional[Callable[[str, int, int], None]] = None) -> Dict:
+    """完整文档处理流程
+    
+    Args:
+        md_path: Markdown文件路径
+        json_path: content_list.json路径（可选）
+        on_progress: 进度回调 (阶段名, 已完成阶段数, 总阶段数)
+    
+    Returns:
+        {parse_result, visual_analysis, outline, statistics}
+    """
+    report = on_progress or (lambda stage, done, total: None)
+    result = {"outline": {"sections": []}}
+    
+    report("parse", 0, 3)
+    for event in iter_process_document(md_path, json_path):
+        kind, data = event["event"], event["data"]
+        if kind == "parse_result":
+            result["parse_result"] = data
+            report("visual_analysis", 1, 3)
+        elif kind == "visual_analysis":
+            result["visual_analysis"] = data
+            report("outline", 2, 3)
+        elif kind == "section":
+            result["outline"]["sections"].append(data)
+        else:
+            result["statistics"] = data
+            result["outline"]["statistics"] = {
+                "total": data["outline_total"], "success": data["outline_success"], "failed": data["outline_failed"]
+            }
+    report("done", 3, 3)
     
     return {
-        "parse_result": parse_result,
-        "visual_analysis": visual_analysis,
-        "outline": outline,
-        "statistics": {
-            "sections": meta.get("total_sections", 0),
-            "elements": len(elements),
-            "analyzed": analyzed,
-            "outline_total": stats.get("total", 0),
-            "outline_success": stats.get("success", 0),
-            "outline_failed": stats.get("failed", 0)
-        }
+        "parse_result": result["parse_result"],
+        "visual_analysis": result["visual_analysis"],
+        "outline": result["outline"],
+        "statistics": result["statistics"]
     }
-
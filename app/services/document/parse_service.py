@@ -2,10 +2,13 @@
 
 import re
 import json
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
 from app.core.logger import logger
+from app.core.metrics import PARSE_SECONDS_PER_MB
+from app.services.document.table_parser import parse_table_html
 
 
 class MarkdownParser:
@@ -23,6 +26,7 @@ class MarkdownParser:
         if not md_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
+        start = time.perf_counter()
         with open(md_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
@@ -38,7 +42,12 @@ class MarkdownParser:
                 json_file = candidates[0]
                 json_data = self._load_json(json_file)
         
-        return self._parse_content(content, md_path.parent, json_data, json_file)
+        result = self._parse_content(content, md_path.parent, json_data, json_file)
+        
+        size_mb = md_path.stat().st_size / (1024 * 1024)
+        if size_mb:
+            PARSE_SECONDS_PER_MB.observe((time.perf_counter() - start) / size_mb)
+        return result
     
     def _load_json(self, path: Path) -> Optional[Dict]:
         """加载JSON文件提取图表公式"""
@@ -63,11 +72,13 @@ class MarkdownParser:
                     })
                     img_id += 1
                 elif t == "table":
+                    body = item.get("table_body", "")
                     tables.append({
                         "type": "table", "id": tbl_id,
                         "img_path": item.get("img_path", ""),
                         "caption": " ".join(item.get("table_caption", [])),
-                        "body": item.get("table_body", "")
+                        "body": body,
+                        "data": parse_table_html(body)
                     })
                     tbl_id += 1
                 elif t == "equation":
@@ -169,6 +180,7 @@ class MarkdownParser:
                 "id": idx,
                 "caption": caption,
                 "body": m.group(0),
+                "data": parse_table_html(m.group(0)),
                 "img_path": None
             })
         return tables
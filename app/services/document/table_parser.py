@@ -0,0 +1,152 @@
+"""HTML表格解析: 将 MinerU 的 table_body 转为表头与数据行（展开 rowspan/colspan）"""
+
+import re
+import html
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+# 只对结构标签分词，并直接捕获其后到下一个结构标签之前的文本；单元格内的其他标签在取文本时统一去除
+_STRUCT = r"t(?:able|head|body|foot|[rdh])\b"
+_TOKEN_RE = re.compile(rf"<(/?)({_STRUCT})([^>]*)>([^<]*(?:<(?!/?{_STRUCT})[^<]*)*)", re.I)
+_SPAN_RE = re.compile(r"""\b(rowspan|colspan)\s*=\s*["']?\s*(\d+)""", re.I)
+_BREAK_RE = re.compile(r"<(?:br|/?p|/?div|/?li)\b[^>]*>", re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+MAX_SPAN = 1000  # 异常的跨度值按此截断
+
+# (文本, rowspan, colspan, 是否th)
+Cell = Tuple[str, int, int, bool]
+
+
+def _spans(attrs: str) -> Tuple[int, int]:
+    rowspan = colspan = 1
+    for name, value in _SPAN_RE.findall(attrs):
+        n = max(1, min(int(value), MAX_SPAN))
+        if name.lower() == "rowspan":
+            rowspan = n
+        else:
+            colspan = n
+    return rowspan, colspan
+
+
+def _tokenize(body: str) -> Tuple[List[List[Cell]], int]:
+    """单次扫描标签流，返回 (各行单元格, thead 行数)；嵌套表格的内容并入外层单元格文本"""
+    rows: List[List[Cell]] = []
+    head_rows = 0
+    row = None
+    cell = None  # [文本片段, rowspan, colspan, 是否th]
+    depth = 0
+    in_head = False
+    
+    def close_cell():
+        nonlocal cell
+        if cell is not None:
+            text = "".join(cell[0])
+            if "<" in text:
+                text = _TAG_RE.sub("", _BREAK_RE.sub(" ", _COMMENT_RE.sub("", text)))
+            if "&" in text:
+                text = html.unescape(text)
+            row.append((" ".join(text.split()), cell[1], cell[2], cell[3]))
+            cell = None
+    
+    def close_row():
+        nonlocal row, head_rows
+        close_cell()
+        if row is not None:
+            rows.append(row)
+            head_rows += in_head
+            row = None
+    
+    for slash, tag, attrs, text in _TOKEN_RE.findall(body):
+        tag = tag.lower()
+        closing = slash == "/"
+        
+        if tag == "table" or depth > 1:
+            if tag == "table":
+                depth += -1 if closing else 1
+            if cell is not None:
+                cell[0].append(" ")
+                cell[0].append(text)
+            continue
+        
+        if tag == "tr":
+            close_row()
+            if not closing:
+                row = []
+        elif tag in ("td", "th"):
+            close_cell()
+            if not closing:
+                if row is None:
+                    row = []
+                rowspan, colspan = _spans(attrs) if attrs else (1, 1)
+                cell = [[text], rowspan, colspan, tag == "th"]
+        elif tag == "thead":
+            close_row()
+            in_head = not closing
+        elif tag in ("tbody", "tfoot"):
+            close_row()
+    
+    close_row()
+    return rows, head_rows
+
+
+def _expand(rows: List[List[Cell]]) -> List[List[str]]:
+    """按 rowspan/colspan 展开为规则网格，跨越的位置重复单元格文本"""
+    grid = []
+    pending: Dict[int, Tuple[str, int]] = {}  # 列 -> (文本, 剩余行数)
+    for cells in rows:
+        line = {c: text for c, (text, _) in pending.items()}
+        pending = {c: (text, left - 1) for c, (text, left) in pending.items() if left > 1}
+        col = 0
+        for text, rowspan, colspan, _ in cells:
+            while col in line:
+                col += 1
+            for c in range(col, col + colspan):
+                line[c] = text
+                if rowspan > 1:
+                    pending[c] = (text, rowspan - 1)
+            col += colspan
+        width = max(line) + 1 if line else 0
+        grid.append([line.get(c, "") for c in range(width)])
+    
+    width = max((len(r) for r in grid), default=0)
+    return [r + [""] * (width - len(r)) for r in grid]
+
+
+def _header_count(rows: List[List[Cell]], head_rows: int) -> int:
+    """表头行数: thead 行；否则开头全部为 th 的行；否则首行（含其 rowspan 覆盖的行）"""
+    if head_rows:
+        return head_rows
+    count = 0
+    while count < len(rows) and rows[count] and all(c[3] for c in rows[count]):
+        count += 1
+    if count:
+        return count
+    return max((c[1] for c in rows[0]), default=1) if rows else 0
+
+
+@lru_cache(maxsize=1024)
+def _parse(body: str) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, ...], ...]]:
+    rows, head_rows = _tokenize(body)
+    grid = _expand(rows)
+    n_head = min(_header_count(rows, head_rows), len(grid))
+    
+    columns = []
+    for c in range(len(grid[0]) if grid else 0):
+        labels = []
+        for r in range(n_head):
+            label = grid[r][c]
+            if label and (not labels or labels[-1] != label):
+                labels.append(label)
+        columns.append(" / ".join(labels))
+    return tuple(columns), tuple(tuple(r) for r in grid[n_head:])
+
+
+def parse_table_html(body: str) -> Dict[str, Any]:
+    """解析HTML表格，多行表头按列合并为 "上层 / 下层"，相同正文只解析一次
+    
+    Returns:
+        {columns: [列名], rows: [[单元格文本]]}
+    """
+    columns, rows = _parse(body or "")
+    return {"columns": list(columns), "rows": [list(r) for r in rows]}
@@ -0,0 +1,202 @@
+"""文档上传服务: 流式接收PDF并提交MinerU解析"""
+
+import os
+import uuid
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Dict, Any, List, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+from multipart.exceptions import MultipartParseError
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.executor import run_blocking
+from app.services.clients import mineru_client
+from app.services.document.parse_service import parse_markdown
+from app.services.artifacts.artifact_store import save_artifact
+
+ALLOWED_SUFFIXES = (".pdf",)
+FILE_FIELD = b"file"
+MULTIPART_OVERHEAD = 64 * 1024  # Content-Length 预检时允许的表单开销
+
+
+class UploadTooLargeError(ValueError):
+    """上传内容超过 MAX_UPLOAD_SIZE"""
+
+
+class _FileSink:
+    """multipart 解析回调，只收集第一个名为 file 的文件分段"""
+    
+    def __init__(self):
+        self.headers: Dict[bytes, bytes] = {}
+        self.file_name: Optional[str] = None
+        self.chunks: List[bytes] = []
+        self.complete = False
+        self._in_file = False
+        self._field = b""
+        self._value = b""
+    
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+    
+    def on_part_begin(self):
+        self.headers = {}
+    
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+    
+    def on_header_end(self):
+        self.headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+    
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        if self.file_name is not None or options.get(b"name") != FILE_FIELD:
+            return
+        # 浏览器未选择文件时发送 filename=""，按缺少文件字段处理
+        file_name = os.path.basename(options.get(b"filename", b"").decode("utf-8", "replace"))
+        if file_name:
+            self.file_name = file_name
+            self._in_file = True
+    
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.chunks.append(data[start:end])
+    
+    def on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self.complete = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def receive_upload(content_type: str, stream: AsyncIterator[bytes],
+                         content_length: Optional[int] = None, max_bytes: Optional[int] = None,
+                         upload_dir: Optional[str] = None) -> Dict[str, Any]:
+    """将 multipart 上传流分块写入 UPLOAD_DIR，不在内存中缓存整个文件
+    
+    Args:
+        content_type: 请求 Content-Type（需含 boundary）
+        stream: 请求体分块
+        content_length: 请求 Content-Length，用于提前拒绝超限上传
+        max_bytes: 文件大小上限（默认 MAX_UPLOAD_SIZE）
+        upload_dir: 保存目录（默认 UPLOAD_DIR）
+    
+    Returns:
+        {document_id, file_name, path, size}
+    """
+    max_bytes = max_bytes or settings.MAX_UPLOAD_SIZE
+    if content_length and content_length > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+    
+    ctype, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if ctype != b"multipart/form-data" or not boundary:
+        raise ValueError("multipart/form-data with boundary required")
+    
+    folder = Path(upload_dir or settings.UPLOAD_DIR)
+    folder.mkdir(parents=True, exist_ok=True)
+    document_id = uuid.uuid4().hex
+    tmp = folder / f"{document_id}.part"
+    
+    sink = _FileSink()
+    parser = MultipartParser(boundary, sink.callbacks())
+    f = None
+    size = 0
+    
+    try:
+        async for chunk in stream:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise ValueError(f"Invalid multipart body: {e}")
+            
+            if sink.file_name and f is None:
+                if not sink.file_name.lower().endswith(ALLOWED_SUFFIXES):
+                    raise ValueError(f"Unsupported file type: {sink.file_name}")
+                f = await asyncio.to_thread(open, tmp, "wb")
+            
+            data = sink.drain()
+            if data:
+                size += len(data)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                await asyncio.to_thread(f.write, data)
+            if sink.complete:
+                break
+        
+        if not sink.complete:
+            raise ValueError("Missing file field")
+        if size == 0:
+            raise ValueError(f"Empty file: {sink.file_name}")
+        
+        await asyncio.to_thread(f.close)
+        path = folder / f"{document_id}{Path(sink.file_name).suffix.lower()}"
+        os.replace(tmp, path)
+    except BaseException:
+        if f is not None:
+            f.close()
+            tmp.unlink(missing_ok=True)
+        raise
+    
+    logger.info(f"[UPLOAD] {sink.file_name} -> {path.name} ({size} bytes)")
+    return {"document_id": document_id, "file_name": sink.file_name, "path": str(path), "size": size}
+
+
+def _find(folder: Path, pattern: str) -> Optional[str]:
+    """在解压目录中查找首个匹配文件"""
+    match = next(iter(sorted(folder.rglob(pattern))), None)
+    return str(match) if match else None
+
+
+async def process_upload(upload: Dict[str, Any], parse: bool = True) -> Dict[str, Any]:
+    """提交MinerU解析上传文件，返回供后续阶段使用的文档句柄
+    
+    Args:
+        upload: receive_upload 的返回值
+        parse: 是否继续解析Markdown并将结果存为产物
+    
+    Returns:
+        {document_id, file_name, size, state, cached, md_path, json_path, parse_result_id}
+    """
+    results = await mineru_client.process_files([upload["path"]])
+    item = results[0] if results else {}
+    extract_dir = item.get("extract_dir")
+    if item.get("state") != "done" or not extract_dir:
+        reason = item.get("err_msg") or item.get("state") or "no result"
+        raise RuntimeError(f"MinerU failed for {upload['file_name']}: {reason}")
+    
+    folder = Path(extract_dir)
+    handle = {
+        "document_id": upload["document_id"],
+        "file_name": upload["file_name"],
+        "size": upload["size"],
+        "state": item["state"],
+        "cached": bool(item.get("cached")),
+        "md_path": _find(folder, "full.md"),
+        "json_path": _find(folder, "*content_list.json"),
+        "parse_result_id": None
+    }
+    
+    if parse and handle["md_path"]:
+        parse_result = await run_blocking(parse_markdown, handle["md_path"], handle["json_path"])
+        handle["parse_result_id"] = await run_blocking(save_artifact, parse_result)
+    
+    logger.info(f"[UPLOAD] {upload['document_id']} ready: parse_result_id={handle['parse_result_id']}")
+    return handle
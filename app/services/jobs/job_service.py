@@ -0,0 +1,294 @@
+"""异步任务服务: 提交长流程或单个阶段，轮询状态并获取结果"""
+
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core import jsoncodec
+from app.core.executor import run_blocking
+from app.core.metrics import JOBS_RUNNING
+from app.services.document.parse_service import parse_markdown
+from app.services.document.nlp_service import analyze_full_document, extract_article_basic_info
+from app.services.document.image_service import extract_elements, analyze_elements
+from app.services.document.outline_service import build_outline, analyze_outline, process_document
+from app.services.artifacts.artifact_store import load_artifact
+
+TAG = "[JOB]"
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id   TEXT PRIMARY KEY,
+    stage    TEXT NOT NULL,
+    params   TEXT NOT NULL,
+    state    TEXT NOT NULL,
+    progress TEXT,
+    result   TEXT,
+    error    TEXT,
+    created  REAL NOT NULL,
+    started  REAL,
+    finished REAL,
+    owner    TEXT,
+    updated  REAL
+);
+"""
+
+
+def _run_analyze_images(params: Dict, progress: Callable) -> List[Dict]:
+    """图表分析阶段"""
+    elements = extract_elements(params["parse_result"])
+    base_path = params.get("base_path")
+    return analyze_elements(elements, Path(base_path) if base_path else None)
+
+
+# 阶段注册表: 名称 -> fn(params, progress)
+STAGES: Dict[str, Callable[[Dict, Callable], Any]] = {
+    "process_document": lambda p, progress: process_document(p["md_path"], p.get("json_path"), progress),
+    "parse": lambda p, progress: parse_markdown(p["md_path"], p.get("json_path")),
+    "analyze_basic": lambda p, progress: extract_article_basic_info(p["parse_result"]),
+    "analyze_full": lambda p, progress: analyze_full_document(p["parse_result"], p.get("abstract", "")),
+    "analyze_images": _run_analyze_images,
+    "outline_build": lambda p, progress: build_outline(p["parse_result"], p.get("visual_analysis", [])),
+    "outline_analyze": lambda p, progress: analyze_outline(p["outline_inputs"]),
+}
+
+
+def _resolve_params(params: Dict) -> Dict:
+    """将 xxx_id 形式的产物引用替换为实际数据"""
+    resolved = dict(params)
+    for key in ("parse_result", "visual_analysis", "outline_inputs"):
+        artifact_id = resolved.pop(f"{key}_id", None)
+        if key not in resolved and artifact_id:
+            data = load_artifact(artifact_id)
+            if data is None:
+                raise ValueError(f"Artifact not found: {artifact_id}")
+            resolved[key] = data
+    return resolved
+
+
+class JobStore:
+    """基于SQLite的任务存储"""
+    
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("updated", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+    
+    def create(self, stage: str, params: Dict, owner: Optional[str] = None) -> str:
+        """新建任务（owner 为执行该任务的进程标识）"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, stage, params, state, created, owner, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, stage, jsoncodec.dumps(params), QUEUED, now, owner, now)
+            )
+        return job_id
+    
+    def update(self, job_id: str, **fields):
+        """更新任务字段（progress/result 自动序列化）"""
+        for key in ("progress", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = jsoncodec.dumps(fields[key])
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {cols} WHERE job_id = ?", (*fields.values(), job_id))
+    
+    def get(self, job_id: str, with_result: bool = False) -> Optional[Dict]:
+        """查询任务"""
+        cols = "*" if with_result else "job_id, stage, state, progress, error, created, started, finished"
+        with self._lock:
+            row = self._conn.execute(f"SELECT {cols} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for key in ("progress", "result", "params"):
+            if job.get(key):
+                job[key] = jsoncodec.loads(job[key])
+        return job
+    
+    def heartbeat(self, owner: str) -> int:
+        """刷新该进程所持未完成任务的心跳，返回任务数"""
+        with self._lock, self._conn:
+            cur = self._conn.execute("UPDATE jobs SET updated = ? WHERE owner = ? AND state IN (?, ?)",
+                                     (time.time(), owner, QUEUED, RUNNING))
+        return cur.rowcount
+    
+    def claim(self, owner: str, lease: float) -> List[str]:
+        """认领心跳超过 lease 秒未刷新（所属进程已退出）的未完成任务并重置为排队，返回认领到的任务ID
+        
+        按读取时的 owner 原子更新，多个进程同时认领时每个任务只有一个成功。
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT job_id, owner FROM jobs WHERE state IN (?, ?) AND owner IS NOT ? "
+                "AND COALESCE(updated, 0) < ? ORDER BY created", (QUEUED, RUNNING, owner, now - lease)
+            ).fetchall()
+            claimed = []
+            for r in rows:
+                cur = self._conn.execute(
+                    "UPDATE jobs SET owner = ?, updated = ?, state = ? "
+                    "WHERE job_id = ? AND owner IS ? AND COALESCE(updated, 0) < ? AND state IN (?, ?)",
+                    (owner, now, QUEUED, r["job_id"], r["owner"], now - lease, QUEUED, RUNNING)
+                )
+                if cur.rowcount == 1:
+                    claimed.append(r["job_id"])
+        return claimed
+
+
+class JobService:
+    """任务调度: 本地线程池执行，按阶段限制并发
+    
+    多worker共用任务库时，每个任务归提交或认领它的进程所有；进程定期刷新所持任务的心跳，
+    心跳超过 JOB_LEASE 未刷新的任务由其他进程认领重跑。
+    """
+    
+    def __init__(self, store: JobStore, workers: int, concurrency: Dict[str, int]):
+        self.store = store
+        self.owner = f"{socket.gethostname()}:{uuid.uuid4().hex[:12]}"
+        self._keeper: Optional[asyncio.Task] = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="keenpoint-job")
+        self._limits = concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks = set()
+    
+    def _semaphore(self, stage: str) -> asyncio.Semaphore:
+        if stage not in self._semaphores:
+            limit = self._limits.get(stage, settings.JOB_DEFAULT_CONCURRENCY)
+            self._semaphores[stage] = asyncio.Semaphore(limit)
+        return self._semaphores[stage]
+    
+    async def submit(self, stage: str, params: Dict) -> str:
+        """提交任务，返回任务ID（任务库写入在线程池中执行，写入后再调度）"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        job_id = await run_blocking(self.store.create, stage, params, self.owner)
+        self._schedule(job_id)
+        logger.info(f"{TAG} submitted {stage}: {job_id}")
+        return job_id
+    
+    def _schedule(self, job_id: str):
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, job_id: str):
+        # 任务库读写为同步SQLite操作，放到线程中执行以免阻塞事件循环
+        job = await asyncio.to_thread(self.store.get, job_id, True)
+        stage, params = job["stage"], job["params"]
+        
+        async with self._semaphore(stage):
+            await asyncio.to_thread(self.store.update, job_id, state=RUNNING, started=time.time(),
+                                    progress={"stage": stage})
+            logger.info(f"{TAG} running {stage}: {job_id}")
+            
+            def progress(step: str, done: int, total: int):
+                self.store.update(job_id, progress={"stage": step, "done": done, "total": total})
+            
+            def run():
+                return STAGES[stage](_resolve_params(params), progress)
+            
+            loop = asyncio.get_running_loop()
+            try:
+                with JOBS_RUNNING.labels(stage).track():
+                    result = await loop.run_in_executor(self._pool, run)
+                await asyncio.to_thread(self.store.update, job_id, state=DONE, result=result, finished=time.time())
+                logger.info(f"{TAG} done {stage}: {job_id}")
+            except Exception as e:
+                await asyncio.to_thread(self.store.update, job_id, state=FAILED, error=str(e),
+                                        finished=time.time())
+                logger.error(f"{TAG} failed {stage}: {job_id}: {e}")
+    
+    def _resume(self, job_ids: List[str]) -> int:
+        for job_id in job_ids:
+            self._schedule(job_id)
+        if job_ids:
+            logger.info(f"{TAG} recovered {len(job_ids)} jobs")
+        return len(job_ids)
+    
+    def recover(self) -> int:
+        """认领并重新调度心跳过期的未完成任务（重启前或其他已退出进程遗留）"""
+        return self._resume(self.store.claim(self.owner, settings.JOB_LEASE))
+    
+    async def _keep(self):
+        """定期刷新所持任务的心跳，并认领期间退出的进程遗留的任务"""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, self.owner)
+                self._resume(await asyncio.to_thread(self.store.claim, self.owner, settings.JOB_LEASE))
+            except sqlite3.Error as e:
+                logger.error(f"{TAG} heartbeat failed: {e}")
+    
+    def start(self) -> int:
+        """恢复未完成任务并启动心跳（需在事件循环中调用），返回恢复的任务数"""
+        if self._keeper is None:
+            self._keeper = asyncio.create_task(self._keep())
+        return self.recover()
+    
+    def shutdown(self):
+        """停止调度并关闭线程池"""
+        if self._keeper is not None:
+            self._keeper.cancel()
+            self._keeper = None
+        for task in list(self._tasks):
+            task.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._semaphores.clear()
+
+
+_service: Optional[JobService] = None
+
+
+def get_job_service() -> JobService:
+    """获取任务服务实例（首次调用时创建）"""
+    global _service
+    if _service is None:
+        _service = JobService(JobStore(settings.JOB_DB_PATH), settings.JOB_WORKERS,
+                              settings.JOB_STAGE_CONCURRENCY)
+    return _service
+
+
+def startup():
+    """恢复未完成任务并启动心跳（应用启动时调用）"""
+    get_job_service().start()
+
+
+def shutdown():
+    """关闭任务服务（应用关闭时调用）"""
+    global _service
+    if _service is not None:
+        _service.shutdown()
+        _service = None
+
+
+async def submit_job(stage: str, params: Dict) -> str:
+    """提交任务"""
+    return await get_job_service().submit(stage, params)
+
+
+def get_job(job_id: str, with_result: bool = False) -> Optional[Dict]:
+    """查询任务"""
+    return get_job_service().store.get(job_id, with_result)
@@ -0,0 +1,79 @@
+"""基准测试 - 大负载压缩: 体积与传输耗时
+
+对 process_document 结果（响应）与 parse_result（请求体）分别比较
+identity / gzip / br 的体积、压缩耗时，以及不同带宽下的估算传输时间。
+
+运行: python tests/bench_compression.py
+"""
+
+import sys
+import gzip
+import json
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import compression, jsoncodec
+from app.core.config import settings
+from tests.synthetic import make_process_result
+
+RESULT_FILE = Path(__file__).parent.parent / "outputs" / "test_process_document_result.json"
+BANDWIDTHS_MBPS = (10, 100)
+ROUNDS = 5
+
+
+def _load_result():
+    if RESULT_FILE.exists():
+        with open(RESULT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f), f"real ({RESULT_FILE.name})"
+    return make_process_result(sections=40), "synthetic (40 sections)"
+
+
+def _encode(encoding: str, data: bytes) -> tuple:
+    """返回 (压缩后字节数, 单次压缩耗时ms)"""
+    if encoding == "identity":
+        return len(data), 0.0
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        if encoding == "gzip":
+            out = gzip.compress(data, compresslevel=settings.COMPRESS_GZIP_LEVEL)
+        else:
+            out = compression.brotli.compress(data, quality=settings.COMPRESS_BROTLI_QUALITY)
+    return len(out), (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def _report(name: str, data: bytes) -> list:
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli else [])
+    head = "".join(f"{f'@{m}Mbps(ms)':>14}" for m in BANDWIDTHS_MBPS)
+    print(f"\n[{name}] {len(data) / 1024:.0f} KB")
+    print(f"  {'encoding':<10}{'bytes':>12}{'ratio':>8}{'encode(ms)':>12}{head}")
+    
+    rows = []
+    for enc in encodings:
+        size, cost = _encode(enc, data)
+        # 传输时间 = 压缩耗时 + 线路耗时
+        transfer = [cost + size * 8 / (m * 1e6) * 1000 for m in BANDWIDTHS_MBPS]
+        cols = "".join(f"{t:>14.1f}" for t in transfer)
+        print(f"  {enc:<10}{size:>12}{len(data) / size:>7.1f}x{cost:>12.1f}{cols}")
+        rows.append((enc, size, cost, transfer))
+    return rows
+
+
+def run_benchmark():
+    result, source = _load_result()
+    
+    print("=" * 78)
+    print(f"Compression benchmark: {source}, brotli={'yes' if compression.brotli else 'no'}")
+    print("=" * 78)
+    
+    response = jsoncodec.dumps_bytes({"status": "ok", "data": result})
+    request = jsoncodec.dumps_bytes(result["parse_result"])
+    return {
+        "response": _report("process_document response", response),
+        "request": _report("parse_result request body", request),
+    }
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,93 @@
+"""基准测试 - 幻灯片内容构建: 线性查找 vs 文档索引
+
+在合成的 200 张幻灯片文档上比较 build_all_slides_content 的耗时，
+并校验索引版输出与原线性查找实现完全一致。
+
+运行: python tests/bench_content_service.py
+"""
+
+import sys
+import time
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.logger import logger
+from app.services.PowerPoint import content_service
+from app.services.PowerPoint.content_service import build_all_slides_content
+from tests.synthetic import make_process_result
+
+ROUNDS = 5
+
+
+class LinearIndex:
+    """原实现: 每次查找线性扫描解析结果与视觉分析"""
+    
+    def __init__(self, parse_result, visual_analysis):
+        self.parse_result = parse_result
+        self.visual_analysis = visual_analysis
+    
+    def section(self, section_name):
+        sections = self.parse_result.get("sections", [])
+        for sec in sections:
+            if sec.get("name", "") == section_name:
+                return sec
+        clean_name = section_name.lstrip("0123456789. ")
+        for sec in sections:
+            if sec.get("name", "").lstrip("0123456789. ") == clean_name:
+                return sec
+        return {}
+    
+    def element(self, parse_section, element_type, element_id):
+        ref_key = content_service.REF_KEYS.get(element_type)
+        if not ref_key:
+            return {}
+        for ref in parse_section.get(ref_key, []):
+            if ref.get("id") == element_id:
+                return ref
+        return {}
+    
+    def analysis_text(self, element_type, element_id):
+        for item in self.visual_analysis:
+            elem = item.get("element", {})
+            if elem.get("id") == element_id and elem.get("type") == element_type:
+                return item.get("analysis", {}).get("analysis_text", "")
+        return ""
+
+
+def _run(data, rounds=ROUNDS) -> tuple:
+    """返回 (结果, 单次耗时ms)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = build_all_slides_content(data["outline"], data["parse_result"], data["visual_analysis"])
+    return result, (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    logger.setLevel(logging.WARNING)  # 屏蔽逐章节日志，避免干扰计时
+    data = make_process_result(sections=50, slides_per_section=4, elements_per_section=6)
+    print(f"[Deck] {len(data['outline']['sections'])} sections, "
+          f"{len(data['parse_result']['sections'])} parse sections, "
+          f"{len(data['visual_analysis'])} analyzed elements")
+    
+    indexed, indexed_ms = _run(data)
+    
+    original = content_service.ContentIndex
+    content_service.ContentIndex = LinearIndex
+    try:
+        linear, linear_ms = _run(data)
+    finally:
+        content_service.ContentIndex = original
+    
+    assert indexed == linear, "indexed output differs from linear lookup"
+    slides = indexed["statistics"]["total_slides"]
+    
+    print(f"\n  {'lookup':<10}{'slides':>8}{'total(ms)':>12}{'per slide(us)':>16}")
+    for name, ms in (("linear", linear_ms), ("indexed", indexed_ms)):
+        print(f"  {name:<10}{slides:>8}{ms:>12.2f}{ms * 1000 / slides:>16.1f}")
+    print(f"\n  speedup: {linear_ms / indexed_ms:.1f}x (output identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""基准测试 - 图片派生资源: 大尺寸扫描图的生成耗时（单进程/进程池）、跨运行复用与体积
+
+运行: python tests/bench_image_assets.py
+"""
+
+import sys
+import time
+import logging
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageChops
+
+from app.core.logger import logger
+from app.services.document.asset_service import ImageAssetStore
+
+COUNT = 8
+SIZE = (4000, 3000)
+
+
+def _make_scans(root: Path) -> list:
+    """合成扫描图: 渐变 + 低频噪声，PNG编码后体积与真实扫描相近"""
+    root.mkdir(parents=True, exist_ok=True)
+    gradient = Image.linear_gradient("L").resize(SIZE)
+    paths = []
+    for i in range(COUNT):
+        noise = Image.effect_noise((SIZE[0] // 8, SIZE[1] // 8), 30 + i).resize(SIZE)
+        img = Image.merge("RGB", (gradient, noise, ImageChops.invert(gradient)))
+        path = root / f"scan{i}.png"
+        img.save(path, compress_level=6)
+        paths.append(str(path))
+    return paths
+
+
+def _run(root: str, paths: list, variant: str, workers: int) -> tuple:
+    store = ImageAssetStore(root, max_bytes=4 * 1024 * 1024 * 1024, workers=workers)
+    try:
+        start = time.perf_counter()
+        derived = store.derive(paths, variant)
+        return (time.perf_counter() - start) * 1000, derived
+    finally:
+        store.shutdown()
+
+
+def main():
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _make_scans(Path(tmp) / "src")
+        original = sum(Path(p).stat().st_size for p in paths)
+        print(f"[Input] {COUNT} PNG scans {SIZE[0]}x{SIZE[1]}, {original / 1024 / 1024:.1f} MB")
+        
+        print(f"\n  {'variant':<9}{'workers':>8}{'cold(ms)':>10}{'warm(ms)':>10}{'output(MB)':>12}{'ratio':>8}")
+        for variant in ("llm", "display"):
+            for workers in (0, 4):
+                cache = str(Path(tmp) / f"cache_{variant}_{workers}")
+                cold, derived = _run(cache, paths, variant, workers)
+                warm, _ = _run(cache, paths, variant, workers)
+                size = sum(Path(p).stat().st_size for p in set(derived.values()))
+                print(f"  {variant:<9}{workers:>8}{cold:>10.0f}{warm:>10.1f}{size / 1024 / 1024:>12.1f}"
+                      f"{original / size:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
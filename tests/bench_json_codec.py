@@ -0,0 +1,80 @@
+"""基准测试 - JSON编解码: 标准库 vs jsoncodec
+
+优先使用真实的 process_document 结果 (outputs/test_process_document_result.json，
+由 test_process_document.py 生成)，不存在时使用合成数据。
+
+运行: python tests/bench_json_codec.py
+"""
+
+import sys
+import json
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import jsoncodec
+from app.core.jsoncodec import FastJSONResponse
+from tests.synthetic import make_process_result
+
+RESULT_FILE = Path(__file__).parent.parent / "outputs" / "test_process_document_result.json"
+ROUNDS = 20
+
+
+def _load_result():
+    if RESULT_FILE.exists():
+        with open(RESULT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f), f"real ({RESULT_FILE.name})"
+    return make_process_result(sections=40), "synthetic (40 sections)"
+
+
+def _timeit(fn, rounds: int = ROUNDS) -> float:
+    """返回单次平均耗时(ms)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def run_benchmark():
+    result, source = _load_result()
+    payload = {"status": "ok", "data": result}
+    elements = result.get("visual_analysis", [])
+    size = len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    
+    print("=" * 70)
+    print(f"JSON benchmark: {source}, {size / 1024:.0f} KB, backend={jsoncodec.BACKEND}")
+    print("=" * 70)
+    
+    # 1. 响应渲染
+    std_resp = _timeit(lambda: JSONResponse(jsonable_encoder(payload)))
+    fast_resp = _timeit(lambda: FastJSONResponse(payload))
+    
+    # 2. 逐元素构建prompt
+    prompts = [{k: e.get(k) for k in ("abstract", "element", "local_context", "section_content")}
+               for e in elements]
+    std_prompt = _timeit(lambda: [json.dumps(p, ensure_ascii=False) for p in prompts])
+    fast_prompt = _timeit(lambda: [jsoncodec.dumps(p) for p in prompts])
+    
+    # 3. 解析LLM输出
+    answers = [json.dumps(e.get("analysis") or {}, ensure_ascii=False) for e in elements]
+    std_parse = _timeit(lambda: [json.loads(a) for a in answers])
+    fast_parse = _timeit(lambda: [jsoncodec.loads(a) for a in answers])
+    
+    rows = [
+        ("response render", std_resp, fast_resp),
+        (f"prompt build x{len(prompts)}", std_prompt, fast_prompt),
+        (f"output parse x{len(answers)}", std_parse, fast_parse),
+    ]
+    print(f"\n  {'case':<24}{'stdlib(ms)':>12}{'codec(ms)':>12}{'speedup':>10}")
+    for name, std, fast in rows:
+        print(f"  {name:<24}{std:>12.2f}{fast:>12.2f}{std / fast:>9.1f}x")
+    
+    return rows
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,107 @@
+"""基准测试 - PPTX导出: 300张内容页的耗时、内存峰值与媒体去重
+
+对比直接按路径调用 add_picture（每次读取文件并遍历全部部件按SHA1查重）
+与 PptxBuilder 的内容哈希索引（相同内容统一引用首个源文件，像素尺寸只解析一次）。
+图片为合成的JPEG，不同文件名之间存在重复内容。
+
+运行: python tests/bench_pptx.py
+"""
+
+import sys
+import time
+import logging
+import zipfile
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from app.core.logger import logger
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from app.services.PowerPoint.layout_service import plan_deck
+from app.services.PowerPoint.pptx_service import PptxBuilder, build_pptx
+from tests.synthetic import make_process_result
+
+SECTIONS = 75  # 75 章节 x 4 页 = 300 张内容页
+DISTINCT_IMAGES = 25
+
+
+class NaiveBuilder(PptxBuilder):
+    """对照组: 直接使用 slide.shapes.add_picture"""
+    
+    def _place_image(self, slide, src, left, top, width, height):
+        path = self._resolve(src)
+        if path is None or not path.exists():
+            self.missing += 1
+            return
+        slide.shapes.add_picture(str(path), left, top, height=height)
+        self.pictures += 1
+
+
+def _make_images(root: Path, count: int):
+    """为合成数据中的每个图片路径生成JPEG（内容按 DISTINCT_IMAGES 循环重复）"""
+    (root / "images").mkdir(parents=True, exist_ok=True)
+    blobs = []
+    for i in range(DISTINCT_IMAGES):
+        img = Image.effect_noise((1200, 800), 40 + i).convert("RGB")
+        path = root / f"distinct{i}.jpg"
+        img.save(path, quality=85)
+        blobs.append(path.read_bytes())
+    for fig_id in range(1, count + 1):
+        (root / "images" / f"fig{fig_id}.jpg").write_bytes(blobs[fig_id % DISTINCT_IMAGES])
+
+
+def _run(builder_cls, slides_content, image_base: str, output: str) -> dict:
+    start = time.perf_counter()
+    builder = builder_cls(image_base)
+    for page in plan_deck(slides_content, {"title": "Benchmark Deck", "authors": ["KeenPoint"]}):
+        builder.add_page(page)
+    built = time.perf_counter()
+    size = builder.save(output)
+    saved = time.perf_counter()
+    with zipfile.ZipFile(output) as z:
+        media = len([n for n in z.namelist() if n.startswith("ppt/media/")])
+    return {"slides": len(builder.prs.slides), "pictures": builder.pictures, "media": media, "size": size,
+            "build_ms": (built - start) * 1000, "save_ms": (saved - built) * 1000}
+
+
+def _peak_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    logger.setLevel(logging.ERROR)
+    data = make_process_result(sections=SECTIONS, slides_per_section=4)
+    slides_content = build_content_from_process_result(data, compact=True)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_images(root, data["parse_result"]["metadata"]["total_figures"])
+        image_bytes = sum(p.stat().st_size for p in (root / "images").glob("*.jpg"))
+        print(f"[Input] {slides_content['statistics']['total_slides']} content slides, "
+              f"{data['parse_result']['metadata']['total_figures']} image files "
+              f"({image_bytes / 1024 / 1024:.1f} MB, {DISTINCT_IMAGES} distinct)")
+        
+        print(f"\n  {'writer':<10}{'slides':>8}{'pictures':>10}{'media':>7}{'size(MB)':>10}"
+              f"{'build(ms)':>11}{'save(ms)':>10}{'peak(MB)':>10}")
+        for name, cls in (("add_picture", NaiveBuilder), ("indexed", PptxBuilder)):
+            out = str(root / f"{name}.pptx")
+            r = _run(cls, slides_content, tmp, out)
+            peak = _peak_mb(lambda: _run(cls, slides_content, tmp, out))
+            print(f"  {name:<10}{r['slides']:>8}{r['pictures']:>10}{r['media']:>7}{r['size'] / 1024 / 1024:>10.1f}"
+                  f"{r['build_ms']:>11.0f}{r['save_ms']:>10.0f}{peak:>10.1f}")
+        
+        result = build_pptx(slides_content, str(root / "deck.pptx"), {"title": "Benchmark Deck"}, image_base=tmp)
+        print(f"\n  build_pptx: {result['slides']} slides, media={result['media']}, timings={result['timings']}")
+
+
+if __name__ == "__main__":
+    main()
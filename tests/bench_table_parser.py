@@ -0,0 +1,139 @@
+"""基准测试 - HTML表格解析: 数百个大表格的解析耗时与表格页渲染
+
+对比:
+  regex       原 layout_service 的行/单元格正则拆分（不处理 rowspan/colspan）
+  HTMLParser  标准库 html.parser 逐事件构建网格
+  tokenizer   table_parser 单次正则扫描标签流（首次解析 / 缓存命中）
+
+运行: python tests/bench_table_parser.py
+"""
+
+import re
+import sys
+import html
+import time
+import random
+import logging
+from html.parser import HTMLParser
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.logger import logger
+from app.services.document import table_parser
+from app.services.document.table_parser import parse_table_html
+from app.services.PowerPoint.layout_service import LayoutService
+
+TABLES = 300
+ROWS, GROUPS, METRICS = 60, 4, 3  # 每表 60 行，4 组 x 3 指标 + 模型列
+ROUNDS = 3
+
+_ROW_RE = re.compile(r"<tr[^>]*>(.*?)</tr>", re.S | re.I)
+_CELL_RE = re.compile(r"<t[dh][^>]*>(.*?)</t[dh]>", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def legacy_regex(body: str) -> dict:
+    rows = [[html.unescape(_TAG_RE.sub("", c)).strip() for c in _CELL_RE.findall(r)]
+            for r in _ROW_RE.findall(body)]
+    return {"columns": rows[0] if rows else [], "rows": rows[1:]}
+
+
+class _GridParser(HTMLParser):
+    """对照组: html.parser 事件驱动，展开跨行跨列"""
+    
+    def __init__(self):
+        super().__init__()
+        self.rows, self.row, self.cell = [], None, None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self.row = []
+        elif tag in ("td", "th") and self.row is not None:
+            a = dict(attrs)
+            self.cell = [[], int(a.get("rowspan") or 1), int(a.get("colspan") or 1)]
+        elif tag == "br" and self.cell is not None:
+            self.cell[0].append(" ")
+    
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self.cell is not None:
+            self.row.append((" ".join("".join(self.cell[0]).split()), self.cell[1], self.cell[2], False))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+    
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell[0].append(data)
+
+
+def html_parser(body: str) -> dict:
+    parser = _GridParser()
+    parser.feed(body)
+    parser.close()
+    grid = table_parser._expand(parser.rows)
+    return {"columns": grid[0], "rows": grid[2:]}
+
+
+def make_table(rng: random.Random) -> str:
+    head1 = '<td rowspan="2">Model</td>' + "".join(f'<td colspan="{METRICS}">Dataset {g}</td>'
+                                                     for g in range(GROUPS))
+    head2 = "".join(f"<td>Metric {m}</td>" for _ in range(GROUPS) for m in range(METRICS))
+    body = []
+    for r in range(ROWS):
+        first = f'<td rowspan="2">Model-{r} &amp; variant</td>' if r % 2 == 0 else ""
+        cells = "".join(f"<td>{rng.random() * 100:.2f}<br>(±{rng.random():.2f})</td>"
+                        for _ in range(GROUPS * METRICS))
+        body.append(f"<tr>{first}{cells}</tr>")
+    return f"<html><body><table><tr>{head1}</tr><tr>{head2}</tr>{''.join(body)}</table></body></html>"
+
+
+def _time(fn, bodies, before=None) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        if before:
+            before()
+        start = time.perf_counter()
+        for b in bodies:
+            fn(b)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    logger.setLevel(logging.WARNING)
+    rng = random.Random(7)
+    bodies = [make_table(rng) for _ in range(TABLES)]
+    size = sum(len(b) for b in bodies)
+    print(f"[Input] {TABLES} tables, {ROWS} rows x {GROUPS * METRICS + 1} cols, {size / 1024 / 1024:.1f} MB HTML")
+    
+    sample = parse_table_html(bodies[0])
+    assert sample["columns"][1] == "Dataset 0 / Metric 0" and len(sample["rows"]) == ROWS
+    assert sample["rows"][1][0] == sample["rows"][0][0]
+    assert html_parser(bodies[0])["rows"] == sample["rows"]
+    
+    print(f"\n  {'parser':<22}{'total(ms)':>10}{'per table(ms)':>15}")
+    for name, fn, before in (
+        ("regex (no spans)", legacy_regex, None),
+        ("HTMLParser", html_parser, None),
+        ("tokenizer cold", parse_table_html, table_parser._parse.cache_clear),
+        ("tokenizer cached", parse_table_html, None),
+    ):
+        ms = _time(fn, bodies, before)
+        print(f"  {name:<22}{ms:>10.1f}{ms / TABLES:>15.3f}")
+    
+    # 表格页渲染: 解析阶段已生成 data vs 渲染时从 body 解析
+    service = LayoutService(cache_dir="")
+    service.render_cache = None
+    with_data = [{"slide_title": f"T{i}", "table": {"body": b, "data": parse_table_html(b), "caption": "c"}}
+                 for i, b in enumerate(bodies)]
+    body_only = [{"slide_title": f"T{i}", "table": {"body": b, "caption": "c"}} for i, b in enumerate(bodies)]
+    print(f"\n  {'render_table_page':<22}{'total(ms)':>10}")
+    print(f"  {'parse-time data':<22}{_time(service.render_table_page, with_data):>10.1f}")
+    print(f"  {'parse at render':<22}"
+          f"{_time(service.render_table_page, body_only, table_parser._parse.cache_clear):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
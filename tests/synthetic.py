@@ -0,0 +1,114 @@
+"""基准测试用的合成数据: 结构与 process_document 输出一致"""
+
+import random
+from typing import Dict
+
+from app.services.document.table_parser import parse_table_html
+
+WORDS = ("hierarchical text classification label structure encoder graph attention model "
+         "dataset baseline accuracy propagation representation 层次 分类 模型 实验").split()
+
+
+def _text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def _table_html(rng: random.Random, rows: int, cols: int) -> str:
+    head = "".join(f"<td>Col{c}</td>" for c in range(cols))
+    body = "".join(
+        "<tr>" + "".join(f"<td>{rng.random():.3f}</td>" for _ in range(cols)) + "</tr>"
+        for _ in range(rows)
+    )
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def make_process_result(sections: int = 30, slides_per_section: int = 4, elements_per_section: int = 3,
+                        words_per_section: int = 600, seed: int = 7) -> Dict:
+    """构造合成的 process_document 结果
+    
+    Returns:
+        {parse_result, visual_analysis, outline, statistics}
+    """
+    rng = random.Random(seed)
+    abstract = _text(rng, 150)
+    
+    parse_sections = [{
+        "name": "Hierarchy-Aware Global Model", "level": 1, "path": "Hierarchy-Aware Global Model",
+        "content": _text(rng, 80), "fig_refs": [], "table_refs": [], "formula_refs": []
+    }, {
+        "name": "Abstract", "level": 1, "path": "Abstract",
+        "content": abstract, "fig_refs": [], "table_refs": [], "formula_refs": []
+    }]
+    visual_analysis = []
+    outline_sections = []
+    img_id = tbl_id = eq_id = 1
+    
+    for s in range(1, sections + 1):
+        name = f"{s} Section {s}"
+        content = _text(rng, words_per_section)
+        figs, tbls, eqs = [], [], []
+        
+        for e in range(elements_per_section):
+            kind = e % 3
+            if kind == 0:
+                figs.append({"type": "image", "id": img_id, "img_path": f"images/fig{img_id}.jpg",
+                             "caption": f"Figure {img_id}: {_text(rng, 12)}"})
+                img_id += 1
+            elif kind == 1:
+                body = _table_html(rng, 8, 5)
+                tbls.append({"type": "table", "id": tbl_id, "img_path": f"images/tbl{tbl_id}.jpg",
+                             "caption": f"Table {tbl_id}: {_text(rng, 10)}", "body": body,
+                             "data": parse_table_html(body)})
+                tbl_id += 1
+            else:
+                eqs.append({"type": "equation", "id": eq_id, "img_path": f"images/eq{eq_id}.jpg",
+                            "text": f"$$ h_{{{eq_id}}} = \\sigma(W x + b) $$", "text_format": "latex"})
+                eq_id += 1
+        
+        parse_sections.append({"name": name, "level": 1, "path": name, "content": content,
+                               "fig_refs": figs, "table_refs": tbls, "formula_refs": eqs})
+        
+        for elem in figs + tbls + eqs:
+            visual_analysis.append({
+                "abstract": abstract,
+                "element": dict(elem),
+                "local_context": _text(rng, 60),
+                "section_content": content,
+                "section_name": name,
+                "section_path": name,
+                "analysis": {"element_id": elem["id"], "element_type": elem["type"],
+                             "analysis_text": _text(rng, 90)}
+            })
+        
+        ppt_outline = []
+        for k in range(slides_per_section):
+            ppt_outline.append({
+                "slide_title": f"{name} - slide {k + 1}",
+                "slide_purpose": _text(rng, 15),
+                "content_points": [_text(rng, 18) for _ in range(4)],
+                "visual_refs": {
+                    "images": [f["id"] for f in figs][k % 2:k % 2 + 1],
+                    "tables": [t["id"] for t in tbls][:1] if k % 2 else [],
+                    "equations": [q["id"] for q in eqs][:1] if k == 0 else []
+                }
+            })
+        outline_sections.append({"section_name": name, "raw_result": {"ppt_outline": ppt_outline}})
+    
+    parse_result = {
+        "sections": parse_sections,
+        "metadata": {"total_sections": len(parse_sections), "total_figures": img_id - 1,
+                     "total_tables": tbl_id - 1, "total_formulas": eq_id - 1}
+    }
+    outline = {"sections": outline_sections,
+               "statistics": {"total": sections, "success": sections, "failed": 0}}
+    
+    return {
+        "parse_result": parse_result,
+        "visual_analysis": visual_analysis,
+        "outline": outline,
+        "statistics": {
+            "sections": len(parse_sections), "elements": len(visual_analysis),
+            "analyzed": len(visual_analysis), "outline_total": sections,
+            "outline_success": sections, "outline_failed": 0
+        }
+    }
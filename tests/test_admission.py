@@ -0,0 +1,117 @@
+"""测试准入控制 - 并发上限、有界排队、超时与429"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.api import routes
+from app.core import admission, metrics
+from app.core.admission import AdmissionController, AdmissionRejected
+
+
+def test_controller_queue_and_timeout():
+    """测试槽位FIFO移交、队列满拒绝、排队超时与取消"""
+    print("=" * 60)
+    print("TEST: AdmissionController")
+    print("=" * 60)
+    
+    async def run():
+        ctl = AdmissionController(max_concurrent=2, max_queue=1, timeout=0.2, retry_after=7)
+        await ctl.acquire()
+        await ctl.acquire()
+        assert ctl.active == 2
+        
+        waiter = asyncio.create_task(ctl.acquire())
+        await asyncio.sleep(0)
+        assert ctl.waiting == 1
+        assert metrics.ADMISSION_QUEUE_DEPTH.labels().value == 1
+        
+        try:
+            await ctl.acquire()
+        except AdmissionRejected as e:
+            print(f"\n[Rejected] {e}")
+            assert e.reason == "queue_full" and e.retry_after == 7
+        else:
+            raise AssertionError("queue full should reject")
+        
+        ctl.release(held=2.0)
+        waited = await waiter
+        assert ctl.active == 2 and ctl.waiting == 0
+        print(f"[Waited] {waited * 1000:.1f} ms")
+        
+        # 有耗时统计后按排队深度估算 Retry-After
+        assert ctl.retry_after() == 1
+        
+        try:
+            await ctl.acquire()
+        except AdmissionRejected as e:
+            assert e.reason == "timeout"
+        else:
+            raise AssertionError("queued request should time out")
+        assert ctl.waiting == 0
+        
+        # 排队中被取消不占用槽位
+        cancelled = asyncio.create_task(ctl.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        ctl.release()
+        ctl.release()
+        assert ctl.active == 0 and ctl.waiting == 0
+    
+    asyncio.run(run())
+
+
+def test_routes_return_429():
+    """测试流水线接口超出并发与队列时返回429和Retry-After，流式接口在流结束后归还槽位"""
+    print("=" * 60)
+    print("TEST: 429 + Retry-After")
+    print("=" * 60)
+    
+    def slow_analyze(parse_result, abstract):
+        time.sleep(0.3)
+        return {"sections_analysis": [], "statistics": {}}
+    
+    def slow_iter(parse_result, abstract):
+        time.sleep(0.2)
+        yield {"event": "statistics", "data": {}}
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # 请求体各不相同，避免被请求合并
+            burst = await asyncio.gather(*(client.post("/api/v1/analyze/full", json={"sections": [], "n": i})
+                                           for i in range(4)))
+            stream = await client.post("/api/v1/analyze/full/stream", json={"sections": []})
+            bad = await client.post("/api/v1/analyze/full/stream?format=xml", json={"sections": []})
+            return burst, stream, bad
+    
+    ctl = AdmissionController(max_concurrent=1, max_queue=1, timeout=5, retry_after=3)
+    original = (admission._controller, routes.analyze_full_document, routes.iter_full_document)
+    admission._controller = ctl
+    routes.analyze_full_document, routes.iter_full_document = slow_analyze, slow_iter
+    try:
+        burst, stream, bad = asyncio.run(run())
+    finally:
+        admission._controller, routes.analyze_full_document, routes.iter_full_document = original
+    
+    codes = sorted(r.status_code for r in burst)
+    print(f"\n[Burst] {codes}")
+    assert codes == [200, 200, 429, 429]
+    rejected = [r for r in burst if r.status_code == 429]
+    assert all(r.headers["retry-after"] == "3" for r in rejected)
+    assert stream.status_code == 200 and "statistics" in stream.text
+    assert bad.status_code == 400
+    assert ctl.active == 0 and ctl.waiting == 0
+    assert metrics.ADMISSION_REJECTED.labels("queue_full").value >= 2
+
+
+if __name__ == "__main__":
+    test_controller_queue_and_timeout()
+    test_routes_return_429()
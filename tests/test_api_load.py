@@ -0,0 +1,83 @@
+"""负载测试 - /analyze/full 执行期间 /health 延迟应保持平稳"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.api import routes
+
+IN_FLIGHT = 4
+TASK_SECONDS = 1.0
+PROBES = 10
+calls = []
+
+
+def _slow_analyze(parse_result, abstract):
+    """模拟耗时的同步分析（阻塞式LLM调用）"""
+    calls.append(parse_result)
+    time.sleep(TASK_SECONDS)
+    return {"sections_analysis": [], "statistics": {}}
+
+
+async def _probe(client: httpx.AsyncClient, interval: float = 0.05) -> list:
+    """连续测量 /health 延迟（含事件循环被占用的等待时间）"""
+    latencies = []
+    for _ in range(PROBES):
+        start = time.perf_counter()
+        resp = await client.get("/health")
+        assert resp.status_code == 200
+        await asyncio.sleep(interval)
+        latencies.append(time.perf_counter() - start - interval)
+    return latencies
+
+
+async def _run() -> tuple:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        idle = await _probe(client)
+        
+        start = time.perf_counter()
+        # 请求体各不相同，避免相同请求被合并为一次执行
+        jobs = [asyncio.create_task(client.post("/api/v1/analyze/full",
+                                                json={"sections": [{"name": f"section {i}", "content": ""}]}))
+                for i in range(IN_FLIGHT)]
+        busy = await _probe(client)
+        responses = await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - start
+        
+        assert all(r.status_code == 200 for r in responses)
+    return idle, busy, elapsed
+
+
+def test_health_latency_under_load():
+    """测试并发分析请求期间健康检查不被阻塞"""
+    print("=" * 60)
+    print(f"TEST: /health latency with {IN_FLIGHT} x /analyze/full in flight")
+    print("=" * 60)
+    
+    calls.clear()
+    original = routes.analyze_full_document
+    routes.analyze_full_document = _slow_analyze
+    try:
+        idle, busy, elapsed = asyncio.run(_run())
+    finally:
+        routes.analyze_full_document = original
+    
+    print(f"\n[空闲] /health max={max(idle) * 1000:.1f}ms avg={sum(idle) / len(idle) * 1000:.1f}ms")
+    print(f"[负载] /health max={max(busy) * 1000:.1f}ms avg={sum(busy) / len(busy) * 1000:.1f}ms")
+    print(f"[分析] {IN_FLIGHT} 个请求总耗时 {elapsed:.2f}s (单个 {TASK_SECONDS}s)")
+    
+    assert len(calls) == IN_FLIGHT
+    # 阻塞事件循环时 /health 至少等待一个任务时长，且分析请求会串行执行
+    assert max(busy) < TASK_SECONDS / 4
+    assert elapsed < TASK_SECONDS * IN_FLIGHT / 2
+
+
+if __name__ == "__main__":
+    test_health_latency_under_load()
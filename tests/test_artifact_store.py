@@ -0,0 +1,93 @@
+"""测试 artifact_store - 产物存储与按ID引用"""
+
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.api import routes
+from app.services.artifacts import artifact_store
+from app.services.artifacts.artifact_store import ArtifactStore
+
+MD_TEXT = "# Title\n\nAuthors\n\n# 1 Introduction\n\n" + "Hierarchical text classification. " * 200
+
+
+def test_store_roundtrip_and_evict():
+    """测试压缩存取、内容去重与按大小淘汰"""
+    print("=" * 60)
+    print("TEST: artifact_store.ArtifactStore")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArtifactStore(tmp, max_bytes=10 * 1024)
+        data = {"sections": [{"name": "Intro", "content": "x" * 50000}]}
+        
+        a1 = store.put(data)
+        assert store.put(data) == a1
+        assert store.get(a1) == data
+        size = (Path(tmp) / f"{a1}{artifact_store.SUFFIX}").stat().st_size
+        print(f"\n[压缩] 原始≈50KB -> {size}B")
+        assert size < 2000
+        
+        # 写满容量后最早访问的产物被淘汰
+        ids = []
+        for i in range(20):
+            time.sleep(0.002)
+            ids.append(store.put({"i": i, "noise": [hash((i, j)) for j in range(100)]}))
+        assert store.get(ids[-1]) is not None
+        assert store.get(a1) is None
+        assert store.get("../etc") is None
+
+
+async def _run(md_path: str) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        parsed = (await client.post("/api/v1/parse", params={"md_path": md_path, "inline": False})).json()
+        basic = await client.post("/api/v1/analyze/basic", params={"parse_result_id": parsed["artifact_id"]})
+        missing = await client.post("/api/v1/analyze/basic", params={"parse_result_id": "0" * 32})
+        empty = await client.post("/api/v1/analyze/basic")
+        outline = await client.post("/api/v1/outline/build", params={"parse_result_id": parsed["artifact_id"]},
+                                    json={"visual_analysis": []})
+        outline_missing = await client.post("/api/v1/outline/build", json={"parse_result": {"sections": []}},
+                                            params={"visual_analysis_id": "0" * 32})
+    return {"parsed": parsed, "basic": basic, "missing": missing, "empty": empty,
+            "outline": outline, "outline_missing": outline_missing}
+
+
+def test_routes_accept_artifact_id():
+    """测试 /parse 返回产物ID，下游路由按ID读取"""
+    print("\n" + "=" * 60)
+    print("TEST: /parse -> /analyze/basic?parse_result_id=")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        md = Path(tmp) / "full.md"
+        md.write_text(MD_TEXT, encoding="utf-8")
+        
+        original_store, original_fn = artifact_store._store, routes.extract_article_basic_info
+        artifact_store._store = ArtifactStore(str(Path(tmp) / "artifacts"), max_bytes=1024 * 1024)
+        routes.extract_article_basic_info = lambda pr: {"sections": len(pr["sections"])}
+        try:
+            r = asyncio.run(_run(str(md)))
+        finally:
+            artifact_store._store, routes.extract_article_basic_info = original_store, original_fn
+    
+    print(f"\n[parse] artifact_id={r['parsed']['artifact_id']} data={r['parsed']['data']}")
+    print(f"[analyze/basic] {r['basic'].json()}")
+    assert r["parsed"]["data"] is None
+    assert r["basic"].json()["data"] == {"sections": 2}
+    assert r["missing"].status_code == 404
+    assert r["empty"].status_code == 422
+    assert r["outline"].status_code == 200 and r["outline"].json()["status"] == "ok"
+    assert r["outline_missing"].status_code == 404
+
+
+if __name__ == "__main__":
+    test_store_roundtrip_and_evict()
+    test_routes_accept_artifact_id()
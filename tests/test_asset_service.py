@@ -0,0 +1,141 @@
+"""测试图片派生资源 - 缩放、按内容去重、跨实例复用、失败回退与整套渲染打包"""
+
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from app.core.logger import logger
+from app.services.document.asset_service import ImageAssetStore
+from app.services.PowerPoint.layout_service import LayoutService
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from tests.synthetic import make_process_result
+
+
+def _images(root: Path) -> dict:
+    root.mkdir(parents=True, exist_ok=True)
+    paths = {
+        "scan": root / "scan.png",
+        "photo": root / "photo.jpg",
+        "small": root / "small.png",
+        "copy": root / "copy.png",
+        "broken": root / "broken.png",
+    }
+    Image.linear_gradient("L").resize((3000, 2000)).convert("RGB").save(paths["scan"])
+    Image.new("RGB", (2400, 1600), (200, 120, 40)).save(paths["photo"], quality=90)
+    Image.new("RGB", (300, 200), (10, 20, 30)).save(paths["small"])
+    paths["copy"].write_bytes(paths["scan"].read_bytes())
+    paths["broken"].write_bytes(b"not an image")
+    return {k: str(v) for k, v in paths.items()}
+
+
+def test_derive():
+    """测试派生图: 最长边受限、格式保持、相同内容共享、缺失路径跳过、损坏图片回退原路径"""
+    print("=" * 60)
+    print("TEST: ImageAssetStore.derive")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _images(Path(tmp) / "src")
+        store = ImageAssetStore(str(Path(tmp) / "cache"), max_bytes=64 * 1024 * 1024, workers=2)
+        try:
+            derived = store.derive(list(paths.values()) + [str(Path(tmp) / "missing.png")], "llm")
+        finally:
+            store.shutdown()
+        print(f"\n[Derived] {derived}")
+        
+        assert set(derived) == set(paths.values())
+        assert derived[paths["broken"]] == paths["broken"]
+        assert derived[paths["scan"]] == derived[paths["copy"]]
+        for name in ("scan", "photo", "small"):
+            assert derived[paths[name]].startswith(str(Path(tmp) / "cache"))
+            with Image.open(derived[paths[name]]) as img:
+                print(f"[{name}] {img.format} {img.size}")
+                assert max(img.size) <= 1024
+                assert img.format == ("JPEG" if name == "photo" else "PNG")
+        with Image.open(derived[paths["scan"]]) as img:
+            assert img.size == (1024, 683)
+        assert Path(derived[paths["small"]]).read_bytes() == Path(paths["small"]).read_bytes()
+        
+        # 新实例（模拟重启）直接复用磁盘上的派生图
+        files = {p: p.stat().st_mtime_ns for p in (Path(tmp) / "cache").rglob("*.*")}
+        second = ImageAssetStore(str(Path(tmp) / "cache"), max_bytes=64 * 1024 * 1024, workers=0)
+        again = second.derive(list(paths.values()), "llm")
+        assert again == derived
+        assert set((Path(tmp) / "cache").rglob("*.*")) == set(files)
+        
+        # 不同类型分别生成
+        display = second.derive([paths["scan"]], "display")
+        with Image.open(display[paths["scan"]]) as img:
+            assert max(img.size) == 1600
+
+
+def test_evict_skips_temp_files():
+    """测试淘汰只统计并删除最终派生图，不触碰生成中的临时文件"""
+    print("\n" + "=" * 60)
+    print("TEST: ImageAssetStore.evict")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageAssetStore(tmp, max_bytes=150, workers=0)
+        folder = Path(tmp) / "ab"
+        folder.mkdir()
+        derived = [folder / f"ab{i}_llm1024.png" for i in range(3)]
+        for path in derived:
+            path.write_bytes(b"x" * 100)
+        tmp_file = folder / "ab9_llm1024.png.1234.tmp"
+        tmp_file.write_bytes(b"x" * 1000)
+        
+        removed = store.evict()
+        print(f"\n[Evict] removed={removed}, left={sorted(p.name for p in folder.iterdir())}")
+        assert removed == 2
+        assert tmp_file.exists()
+        assert len([p for p in derived if p.exists()]) == 1
+
+
+def test_render_deck_bundle():
+    """测试整套渲染打包图片: 页面引用 assets/images 下的派生图，相同内容只复制一份"""
+    print("\n" + "=" * 60)
+    print("TEST: render_deck(bundle=True)")
+    print("=" * 60)
+    
+    logger.setLevel(logging.WARNING)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp) / "mineru"
+            (base / "images").mkdir(parents=True)
+            blob = None
+            for fig_id in range(1, 5):
+                if blob is None:
+                    Image.new("RGB", (2000, 1500), (90, 90, 200)).save(base / "images" / "fig1.jpg")
+                    blob = (base / "images" / "fig1.jpg").read_bytes()
+                (base / "images" / f"fig{fig_id}.jpg").write_bytes(blob)
+            
+            slides_content = build_content_from_process_result(make_process_result(sections=5))
+            result = LayoutService(cache_dir="").render_deck(slides_content, output_dir=str(Path(tmp) / "deck"),
+                                                             bundle=True, image_base=str(base))
+            print(f"\n[Images] {result['images']}, timings={result['timings']}")
+            
+            # fig1-4 内容相同只打包一份；fig5 不存在保留原引用
+            assert len(result["images"]) == 1 and "images_ms" in result["timings"]
+            bundled = Path(result["output_dir"]) / result["images"][0]
+            with Image.open(bundled) as img:
+                assert max(img.size) == 1600
+            
+            pictures = [e for e in result["pages"] if e["kind"] == "picture"]
+            assert pictures
+            for entry in pictures:
+                page = (Path(result["output_dir"]) / entry["file"]).read_text(encoding="utf-8")
+                assert result["images"][0] in page or "images/fig5.jpg" in page
+    finally:
+        logger.setLevel(logging.INFO)
+
+
+if __name__ == "__main__":
+    test_derive()
+    test_evict_skips_temp_files()
+    test_render_deck_bundle()
@@ -0,0 +1,184 @@
+"""测试 CompressionMiddleware - 响应协商压缩与gzip请求体"""
+
+import sys
+import gzip
+import json
+import asyncio
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.api import routes
+from app.core import compression, metrics
+from app.core.compression import CompressionMiddleware, negotiate
+
+PARSE_RESULT = {"sections": [{"name": f"{i} Section", "content": "hierarchical text classification " * 20}
+                             for i in range(20)]}
+
+
+def _fake_basic(parse_result):
+    return {"sections": len(parse_result["sections"]), "echo": parse_result}
+
+
+async def _request(method: str, url: str, **kwargs) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url, **kwargs)
+
+
+def test_negotiate():
+    """测试 Accept-Encoding 协商"""
+    print("=" * 60)
+    print("TEST: negotiate")
+    print("=" * 60)
+    
+    assert negotiate("") is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    
+    expected_br = "br" if compression.brotli else "gzip"
+    assert negotiate("gzip, br") == expected_br
+    assert negotiate("br;q=0, gzip") == "gzip"
+    
+    original = compression.brotli
+    compression.brotli = None
+    try:
+        assert negotiate("br, gzip") == "gzip"
+        assert negotiate("br") is None
+    finally:
+        compression.brotli = original
+    print("\n[OK] negotiation")
+
+
+def test_response_compression():
+    """测试大响应压缩、小响应原样返回"""
+    print("=" * 60)
+    print("TEST: response compression")
+    print("=" * 60)
+    
+    original = routes.extract_article_basic_info
+    routes.extract_article_basic_info = _fake_basic
+    try:
+        raw = asyncio.run(_request("POST", "/api/v1/analyze/basic", json=PARSE_RESULT,
+                                   headers={"Accept-Encoding": "identity"}))
+        gz = asyncio.run(_request("POST", "/api/v1/analyze/basic", json=PARSE_RESULT,
+                                  headers={"Accept-Encoding": "gzip"}))
+        small = asyncio.run(_request("GET", "/health", headers={"Accept-Encoding": "gzip"}))
+        br = None
+        if compression.brotli:
+            br = asyncio.run(_request("POST", "/api/v1/analyze/basic", json=PARSE_RESULT,
+                                      headers={"Accept-Encoding": "br"}))
+    finally:
+        routes.extract_article_basic_info = original
+    
+    assert raw.status_code == 200 and "content-encoding" not in raw.headers
+    assert gz.status_code == 200
+    assert gz.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in gz.headers["vary"]
+    assert gz.json() == raw.json()
+    wire = int(gz.headers["content-length"])
+    print(f"\n[Size] identity={len(raw.content)}B gzip={wire}B")
+    assert wire < len(raw.content) / 3
+    
+    assert small.status_code == 200
+    assert "content-encoding" not in small.headers
+    
+    if br is not None:
+        assert br.headers["content-encoding"] == "br"
+        assert br.json() == raw.json()  # httpx 自动解码 br
+        print(f"[Size] br={br.headers['content-length']}B")
+
+
+def test_streaming_response():
+    """测试流式响应逐块压缩且可完整解码"""
+    print("=" * 60)
+    print("TEST: streaming compression")
+    print("=" * 60)
+    
+    chunks = [(json.dumps({"i": i, "text": "x" * 800}) + "\n").encode() for i in range(5)]
+    
+    async def stream_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    mw = CompressionMiddleware(stream_app, minimum_size=100)
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(mw(scope, receive, send))
+    
+    start, bodies = sent[0], sent[1:]
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(bodies) == len(chunks)
+    assert all(b["body"] for b in bodies)  # 每块都已刷新输出
+    assert gzip.decompress(b"".join(b["body"] for b in bodies)) == b"".join(chunks)
+    print(f"\n[OK] {len(bodies)} chunks flushed")
+
+
+def test_gzip_request_body():
+    """测试gzip请求体解压，损坏或超限时拒绝"""
+    print("=" * 60)
+    print("TEST: gzip request body")
+    print("=" * 60)
+    
+    body = json.dumps(PARSE_RESULT).encode("utf-8")
+    packed = gzip.compress(body)
+    print(f"\n[Size] request json={len(body)}B gzip={len(packed)}B")
+    
+    latency = metrics.HTTP_LATENCY.labels("POST", "/api/v1/analyze/basic", "200")
+    before = latency.count
+    original = routes.extract_article_basic_info
+    routes.extract_article_basic_info = _fake_basic
+    try:
+        ok = asyncio.run(_request("POST", "/api/v1/analyze/basic", content=packed, headers={
+            "Content-Type": "application/json", "Content-Encoding": "gzip"}))
+        bad = asyncio.run(_request("POST", "/api/v1/analyze/basic", content=b"not gzip", headers={
+            "Content-Type": "application/json", "Content-Encoding": "gzip"}))
+    finally:
+        routes.extract_article_basic_info = original
+    
+    assert ok.status_code == 200, ok.text
+    assert ok.json()["data"]["echo"] == PARSE_RESULT
+    assert latency.count == before + 1  # 解压后的请求仍按路由模板计入指标
+    assert bad.status_code == 400
+    
+    async def echo_app(scope, receive, send):
+        raise AssertionError("oversized body must not reach the app")
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    bomb = gzip.compress(b"0" * 10000)
+    messages = iter([{"type": "http.request", "body": bomb, "more_body": False}])
+    
+    async def receive():
+        return next(messages)
+    
+    mw = CompressionMiddleware(echo_app, max_body_size=1000)
+    scope = {"type": "http", "method": "POST", "path": "/",
+             "headers": [(b"content-encoding", b"gzip"), (b"content-length", str(len(bomb)).encode())]}
+    asyncio.run(mw(scope, receive, send))
+    assert sent[0]["status"] == 413
+
+
+if __name__ == "__main__":
+    test_negotiate()
+    test_response_compression()
+    test_streaming_response()
+    test_gzip_request_body()
@@ -7,10 +7,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.services.PowerPoint.content_service import (
+    ContentIndex,
     build_slide_content,
     build_all_slides_content,
-    build_content_from_process_result
+    build_content_from_process_result,
+    expand_slides_content
 )
+from tests.synthetic import make_process_result
 
 # 测试数据路径
 PARSE_FILE = Path(__file__).parent.parent / "outputs" / "test_parse.json"
@@ -190,6 +193,74 @@ def test_from_process_result():
     print(f"  ✓ 文件大小: {file_size:.1f} KB")
 
 
+def test_content_index():
+    """测试文档索引: 章节模糊匹配、首个匹配优先、缺失分析文本"""
+    print("\n" + "=" * 70)
+    print("测试: ContentIndex")
+    print("=" * 70)
+    
+    data = make_process_result(sections=3, slides_per_section=2)
+    parse_result = data["parse_result"]
+    visual_analysis = data["visual_analysis"]
+    sections = parse_result["sections"]
+    
+    # 重复章节名与重复分析条目: 均以首个为准
+    sections.append(dict(sections[2], content="duplicate"))
+    visual_analysis.append(dict(visual_analysis[0], analysis={"analysis_text": "duplicate"}))
+    # analysis 为 None 时视为无分析文本
+    visual_analysis.append({"element": {"type": "image", "id": 999}, "analysis": None})
+    
+    index = ContentIndex(parse_result, visual_analysis)
+    
+    assert index.section("1 Section 1") is sections[2]
+    assert index.section("3. Section 1") is sections[2]
+    assert index.section("Abstract") is sections[1]
+    assert index.section("Missing") == {}
+    
+    fig = sections[2]["fig_refs"][0]
+    assert index.element(sections[2], "image", fig["id"]) is fig
+    assert index.element(sections[2], "table", 999) == {}
+    assert index.element(sections[2], "chart", fig["id"]) == {}
+    assert index.element({}, "image", fig["id"]) == {}
+    
+    first = visual_analysis[0]["analysis"]["analysis_text"]
+    assert index.analysis_text("image", fig["id"]) == first
+    assert index.analysis_text("image", 999) == ""
+    assert index.analysis_text("equation", 12345) == ""
+    
+    # 复用索引与临时构建的结果一致
+    outline_section = data["outline"]["sections"][0]
+    assert build_slide_content(outline_section, parse_result, visual_analysis, index) == \
+        build_slide_content(outline_section, parse_result, visual_analysis)
+    
+    print("\n  ✓ 索引查找结果正确")
+
+
+def test_compact_output():
+    """测试紧凑格式: 章节正文只出现一次，可还原为展开格式"""
+    print("\n" + "=" * 70)
+    print("测试: 紧凑格式 (compact=True)")
+    print("=" * 70)
+    
+    data = make_process_result(sections=10, slides_per_section=6)
+    expanded = build_content_from_process_result(data)
+    compact = build_content_from_process_result(data, compact=True)
+    
+    assert len(compact["slides"]) == len(expanded["slides"])
+    assert len(compact["sections"]) == 10
+    assert all("content" not in slide and "section_id" in slide for slide in compact["slides"])
+    assert compact["statistics"] == expanded["statistics"]
+    
+    assert expand_slides_content(compact) == expanded
+    assert expand_slides_content(expanded) is expanded
+    
+    expanded_size = len(json.dumps(expanded, ensure_ascii=False))
+    compact_size = len(json.dumps(compact, ensure_ascii=False))
+    print(f"\n  展开格式: {expanded_size / 1024:.1f} KB")
+    print(f"  紧凑格式: {compact_size / 1024:.1f} KB ({compact_size / expanded_size:.0%})")
+    assert compact_size < expanded_size / 2
+
+
 def show_sample_output():
     """显示示例输出格式"""
     print("\n" + "=" * 70)
@@ -229,6 +300,8 @@ if __name__ == "__main__":
     test_build_single_slide()
     test_build_all_slides()
     test_from_process_result()
+    test_content_index()
+    test_compact_output()
     
     print("\n" + "=" * 70)
     print("测试完成")
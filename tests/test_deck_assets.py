@@ -0,0 +1,106 @@
+"""测试整套输出的共享样式表与HTML压缩"""
+
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.logger import logger
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from app.services.PowerPoint.deck_assets import DeckStylesheet, minify_html, scope_css
+from app.services.PowerPoint.layout_service import LayoutService
+from tests.synthetic import make_process_result
+
+PAGE = """<html><head><style>
+    /* reset */
+    * { margin: 0; }
+    body { width: 1280px; }
+    .panel, .slide > .title:hover { color: #000; }
+</style></head>
+<body>
+    <!-- Title -->
+    <div class="panel">  A   title </div>
+</body></html>"""
+
+
+def test_scope_css():
+    """测试样式作用域: 规则限定在 body.<scope> 内"""
+    print("=" * 60)
+    print("TEST: scope_css / minify_html")
+    print("=" * 60)
+    
+    css = scope_css(PAGE.split("<style>")[1].split("</style>")[0], "s-1")
+    print(f"\n[CSS] {css}")
+    assert css == ("body.s-1,.s-1 *{margin:0}"
+                   "body.s-1{width:1280px}"
+                   ".s-1 .panel,.s-1 .slide > .title:hover{color:#000}")
+    
+    html = minify_html(PAGE)
+    assert "<!--" not in html and "\n" not in html
+    assert '<div class="panel"> A title </div>' in html
+
+
+def test_stylesheet_extract():
+    """测试相同样式共用作用域，无法处理的样式保留内联"""
+    print("\n" + "=" * 60)
+    print("TEST: DeckStylesheet")
+    print("=" * 60)
+    
+    sheet = DeckStylesheet()
+    other = PAGE.replace("#000", "#fff")
+    unsupported = PAGE.replace("* { margin: 0; }", "@media print { body { width: 100%; } }")
+    pages = [sheet.extract(h) for h in (PAGE, PAGE, other, unsupported)]
+    href, css = sheet.build()
+    
+    print(f"\n[Stylesheet] {href}, {len(css)} bytes")
+    assert href.startswith("assets/deck.") and href.endswith(".css")
+    assert sheet.pages == 3 and css.count("{width:1280px}") == 2
+    assert pages[0] == pages[1] and pages[0] != pages[2]
+    assert "<style>" not in pages[0] and 'class="s-' in pages[0]
+    assert pages[3] == unsupported
+    
+    linked = DeckStylesheet.link(pages[0], href)
+    assert f'<link rel="stylesheet" href="{href}">' in linked
+
+
+def test_render_deck_shared_styles():
+    """测试整套渲染共享样式模式: 单个样式表、页面无内联样式、总体积下降"""
+    print("\n" + "=" * 60)
+    print("TEST: render_deck(shared_styles=True)")
+    print("=" * 60)
+    
+    logger.setLevel(logging.WARNING)
+    try:
+        slides_content = build_content_from_process_result(make_process_result(sections=12))
+        service = LayoutService(cache_dir="")
+        sizes = {}
+        for shared in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                result = service.render_deck(slides_content, {"title": "Deck"}, output_dir=tmp,
+                                             shared_styles=shared)
+                files = [p for p in Path(tmp).rglob("*") if p.is_file() and p.name != "manifest.json"]
+                sizes[shared] = sum(p.stat().st_size for p in files)
+                
+                if shared:
+                    assert len(result["pages"]) >= 50
+                    css_files = list(Path(tmp).glob("assets/deck.*.css"))
+                    assert [f"assets/{p.name}" for p in css_files] == [result["stylesheet"]]
+                    assert "assets_ms" in result["timings"]
+                    for entry in result["pages"]:
+                        page = (Path(tmp) / entry["file"]).read_text(encoding="utf-8")
+                        assert "<style" not in page and result["stylesheet"] in page
+                else:
+                    assert result["stylesheet"] is None
+        
+        print(f"\n[Size] inline: {sizes[False] / 1024:.0f} KB, shared: {sizes[True] / 1024:.0f} KB")
+        assert sizes[True] < sizes[False] / 2
+    finally:
+        logger.setLevel(logging.INFO)
+
+
+if __name__ == "__main__":
+    test_scope_css()
+    test_stylesheet_extract()
+    test_render_deck_shared_styles()
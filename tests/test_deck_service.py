@@ -0,0 +1,134 @@
+"""测试渐进式整套生成 - 大纲每完成一个章节即写入其页面，清单逐步更新"""
+
+import sys
+import json
+import time
+import types
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.core.config import settings
+from app.services.document import outline_service
+from app.services.PowerPoint import deck_service
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from app.services.PowerPoint.layout_service import render_deck
+from tests.synthetic import make_process_result
+
+BASIC_INFO = {"title": "Progressive Deck", "authors": ["KeenPoint"]}
+NO_SLEEP = types.SimpleNamespace(sleep=lambda s: None, perf_counter=time.perf_counter)
+
+
+def _patch(module, **attrs):
+    """替换模块属性，返回恢复函数"""
+    original = {k: getattr(module, k) for k in attrs}
+    for k, v in attrs.items():
+        setattr(module, k, v)
+    return lambda: [setattr(module, k, v) for k, v in original.items()]
+
+
+def _fake_pipeline(data: dict, delay: float = 0.0):
+    """以合成数据替换解析、图表分析与大纲分析（未知章节按失败处理）"""
+    outlines = {s["section_name"]: s["raw_result"] for s in data["outline"]["sections"]}
+    
+    def fake_outline(query):
+        time.sleep(delay)
+        name = json.loads(query)["section_name"]
+        if name not in outlines:
+            raise RuntimeError(f"no outline for {name}")
+        return outlines[name]
+    
+    return _patch(outline_service, parse_markdown=lambda md_path, json_path=None: data["parse_result"],
+                  extract_elements=lambda parse_result: data["visual_analysis"],
+                  analyze_elements=lambda elements, base: data["visual_analysis"],
+                  _analyze_outline=fake_outline, time=NO_SLEEP)
+
+
+def test_iter_build_deck():
+    """测试事件顺序、中途清单与最终清单，以及与 render_deck 的页面一致性"""
+    print("=" * 60)
+    print("TEST: iter_build_deck")
+    print("=" * 60)
+    
+    data = make_process_result(sections=4, slides_per_section=2)
+    restore = _fake_pipeline(data)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp) / "progressive"
+            events = []
+            for event in deck_service.iter_build_deck("paper.md", basic_info=BASIC_INFO, output_dir=str(folder)):
+                events.append(event)
+                manifest = json.loads((folder / "manifest.json").read_text(encoding="utf-8"))
+                if event["event"] != "done":
+                    # 生成过程中: 清单未完成，且只列出已落盘的页面
+                    assert manifest["complete"] is False
+                assert all((folder / p["file"]).is_file() for p in manifest["pages"])
+            
+            kinds = [e["event"] for e in events]
+            print(f"\n[Events] {kinds}")
+            sections = [e["data"] for e in events if e["event"] == "pages"]
+            assert kinds[0] == "deck" and kinds[-1] == "done"
+            assert kinds[1:-1] == ["pages"] * len(sections)
+            assert len(sections) == 4 and all(s["pages"] and not s["error"] for s in sections)
+            
+            done = events[-1]["data"]
+            print(f"[Done] {len(done['pages'])} pages, timings={done['timings']}")
+            assert manifest["complete"] is True
+            assert manifest["pages"] == done["pages"]
+            assert done["statistics"]["outline_success"] == 4
+            assert done["timings"]["first_page_ms"] <= done["timings"]["outline_ms"]
+            
+            # 与一次性整套渲染的页面相同
+            full = render_deck(build_content_from_process_result(data), BASIC_INFO, str(Path(tmp) / "full"))
+            assert [(p["kind"], p["slide_title"]) for p in done["pages"]] == \
+                   [(p["kind"], p["slide_title"]) for p in full["pages"]]
+            for ours, theirs in zip(done["pages"], full["pages"]):
+                assert (folder / ours["file"]).read_bytes() == (Path(full["output_dir"]) / theirs["file"]).read_bytes()
+    finally:
+        restore()
+
+
+def test_deck_stream_route():
+    """测试流式路由: 首个章节页面在大纲全部完成前到达，输出目录限定在 DECK_OUTPUT_DIR 下"""
+    print("=" * 60)
+    print("TEST: /deck/stream")
+    print("=" * 60)
+    
+    data = make_process_result(sections=3, slides_per_section=1)
+    
+    async def run(*names):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post("/api/v1/deck/stream", params={"md_path": "paper.md", "deck_name": name},
+                                      json=BASIC_INFO) for name in names]
+    
+    restore = _fake_pipeline(data, delay=0.1)
+    original_dir = settings.DECK_OUTPUT_DIR
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            settings.DECK_OUTPUT_DIR = tmp
+            response, escape = asyncio.run(run("paper_1", "../escape"))
+            records = [json.loads(line) for line in response.text.splitlines()]
+            assert (Path(tmp) / "paper_1" / "manifest.json").is_file()
+    finally:
+        settings.DECK_OUTPUT_DIR = original_dir
+        restore()
+    
+    print(f"\n[Events] {[r['event'] for r in records]}")
+    assert response.status_code == 200
+    assert escape.status_code == 400
+    assert records[0]["event"] == "deck" and records[-1]["event"] == "done"
+    assert records[0]["data"]["output_dir"] == str(Path(tmp) / "paper_1")
+    timings = records[-1]["data"]["timings"]
+    print(f"[Timings] {timings}")
+    assert timings["first_page_ms"] < timings["outline_ms"]
+
+
+if __name__ == "__main__":
+    test_iter_build_deck()
+    test_deck_stream_route()
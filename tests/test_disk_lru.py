@@ -0,0 +1,42 @@
+"""测试 disk_lru - 按最近访问时间淘汰、增量统计与临时文件忽略"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.disk_lru import DiskLRU, atomic_write, touch
+
+
+def test_disk_lru():
+    """测试淘汰顺序、增量统计触发淘汰、临时文件与已删除条目"""
+    print("=" * 60)
+    print("TEST: DiskLRU")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        lru = DiskLRU(root, max_bytes=300, pattern="*.bin")
+        paths = [root / f"{i}.bin" for i in range(3)]
+        for i, path in enumerate(paths):
+            atomic_write(path, b"x" * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+            lru.added(100)
+        (root / ".3.bin.1.2.tmp").write_bytes(b"x" * 1000)  # 写入中的临时文件
+        
+        # 访问最早的条目后，新写入应淘汰第二早的条目
+        assert touch(paths[0])
+        atomic_write(root / "3.bin", b"x" * 100)
+        lru.added(100)
+        left = sorted(p.name for p in root.iterdir())
+        print(f"\n[Left] {left}")
+        assert left == [".3.bin.1.2.tmp", "0.bin", "2.bin", "3.bin"]
+        
+        assert not touch(paths[1])
+        assert lru.evict() == 0
+
+
+if __name__ == "__main__":
+    test_disk_lru()
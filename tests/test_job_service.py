@@ -0,0 +1,129 @@
+"""测试 job_service - 异步任务提交、轮询与结果获取"""
+
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.services.jobs import job_service
+from app.core.config import settings
+from app.services.jobs.job_service import JobService, JobStore, STAGES, DONE, RUNNING
+
+
+def _echo_stage(params, progress):
+    """模拟耗时阶段"""
+    for i in range(params["steps"]):
+        progress("echo", i, params["steps"])
+        time.sleep(0.05)
+    if params.get("fail"):
+        raise RuntimeError("boom")
+    return {"echo": params["value"]}
+
+
+async def _run() -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/api/v1/jobs", json={"stage": "echo", "params": {"value": 42, "steps": 4}})
+        job_id = resp.json()["data"]["job_id"]
+        
+        early = await client.get(f"/api/v1/jobs/{job_id}/result")
+        
+        states = []
+        for _ in range(100):
+            status = (await client.get(f"/api/v1/jobs/{job_id}")).json()["data"]
+            states.append(status["state"])
+            if status["state"] in ("done", "failed"):
+                break
+            await asyncio.sleep(0.02)
+        
+        result = await client.get(f"/api/v1/jobs/{job_id}/result")
+        
+        resp = await client.post("/api/v1/jobs", json={"stage": "echo", "params": {"value": 0, "steps": 1, "fail": True}})
+        failed_id = resp.json()["data"]["job_id"]
+        await asyncio.gather(*job_service.get_job_service()._tasks)
+        failed = await client.get(f"/api/v1/jobs/{failed_id}/result")
+        
+        unknown = await client.post("/api/v1/jobs", json={"stage": "nope"})
+        missing = await client.get("/api/v1/jobs/missing")
+    
+    return {"early": early, "states": states, "result": result, "failed": failed,
+            "unknown": unknown, "missing": missing, "status": status}
+
+
+def test_job_lifecycle():
+    """测试任务提交、进度、结果与错误码"""
+    print("=" * 60)
+    print("TEST: /api/v1/jobs")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        STAGES["echo"] = _echo_stage
+        original = job_service._service
+        job_service._service = JobService(JobStore(str(Path(tmp) / "jobs.db")), workers=2, concurrency={})
+        try:
+            r = asyncio.run(_run())
+        finally:
+            job_service.shutdown()
+            job_service._service = original
+            STAGES.pop("echo")
+    
+    print(f"\n[状态变化] {r['states']}")
+    print(f"[最终进度] {r['status']['progress']}")
+    
+    assert r["early"].status_code == 409
+    assert "running" in r["states"] and r["states"][-1] == "done"
+    assert r["status"]["progress"]["stage"] == "echo"
+    assert r["result"].json()["data"] == {"echo": 42}
+    assert r["failed"].status_code == 500 and "boom" in r["failed"].json()["detail"]
+    assert r["unknown"].status_code == 400
+    assert r["missing"].status_code == 404
+
+
+def test_recover():
+    """测试多worker恢复: 只认领心跳过期的任务，存活worker的任务与已完成任务不重跑，同一任务只认领一次"""
+    print("\n" + "=" * 60)
+    print("TEST: JobService.recover")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(str(Path(tmp) / "jobs.db"))
+        params = {"value": 1, "steps": 1}
+        stale = store.create("echo", params, owner="host:dead")
+        live = store.create("echo", params, owner="host:live")
+        done = store.create("echo", params, owner="host:dead")
+        old = time.time() - settings.JOB_LEASE - 1
+        store.update(stale, state=RUNNING, updated=old)
+        store.update(live, state=RUNNING)
+        store.update(done, state=DONE, updated=old)
+        
+        async def run():
+            first = JobService(store, workers=1, concurrency={})
+            second = JobService(store, workers=1, concurrency={})
+            counts = (first.recover(), second.recover())
+            await asyncio.gather(*first._tasks)
+            return first, second, counts
+        
+        STAGES["echo"] = _echo_stage
+        try:
+            first, second, counts = asyncio.run(run())
+        finally:
+            first.shutdown()
+            second.shutdown()
+            STAGES.pop("echo")
+        
+        print(f"\n[认领] {counts}")
+        assert counts == (1, 0)
+        assert store.get(stale, True)["result"] == {"echo": 1}
+        assert store.get(live)["state"] == RUNNING
+        assert store.heartbeat("host:live") == 1 and store.heartbeat(first.owner) == 0
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    test_recover()
@@ -0,0 +1,86 @@
+"""测试 jsoncodec - orjson 与标准库回退结果一致"""
+
+import sys
+import json
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core import jsoncodec
+from app.services.document import image_service
+
+SAMPLE = {"title": "层次分类", "ids": [1, 2.5, None, True], 3: "int key", "nested": {"a": [{"b": "c"}]}}
+
+
+def test_codec_matches_stdlib():
+    """测试编解码与标准库语义一致（含回退路径）"""
+    print("=" * 60)
+    print(f"TEST: jsoncodec (backend={jsoncodec.BACKEND})")
+    print("=" * 60)
+    
+    expected = json.loads(json.dumps(SAMPLE, ensure_ascii=False))
+    
+    text = jsoncodec.dumps(SAMPLE)
+    print(f"\n[dumps] {text}")
+    assert "层次分类" in text
+    assert json.loads(text) == expected
+    assert jsoncodec.loads(text) == expected
+    assert jsoncodec.loads(text.encode("utf-8")) == expected
+    
+    # 标准库回退
+    original = jsoncodec.orjson
+    jsoncodec.orjson = None
+    try:
+        assert jsoncodec.loads(jsoncodec.dumps(SAMPLE)) == expected
+    finally:
+        jsoncodec.orjson = original
+    
+    # 孤立代理字符: 退回ASCII转义，结果与标准库默认输出一致
+    broken = {"text": "bad \ud835 pdf 文本"}
+    data = jsoncodec.dumps_bytes(broken)
+    print(f"[surrogate] {data}")
+    assert json.loads(data) == broken
+    assert data == json.dumps(broken, separators=(",", ":")).encode("ascii")
+    
+    try:
+        jsoncodec.loads("not json")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("invalid JSON should raise ValueError")
+
+
+
+def test_element_prompt():
+    """测试 iter_elements 用 jsoncodec 构建的元素 prompt（Dify 调用替换为桩）"""
+    print("=" * 60)
+    print("TEST: iter_elements prompt")
+    print("=" * 60)
+    
+    elements = [{"abstract": "摘要", "element": {"type": "equation", "id": 1, "img_path": "", "text": "$$ a = b $$"},
+                 "local_context": "上下文", "section_content": "章节"}]
+    prompts = []
+    
+    def fake_analyze(user_prompt, file_ids, llm_id, auto_upload, allow_empty_files):
+        prompts.append(user_prompt)
+        return {"element_id": 1, "element_type": "equation", "analysis_text": "ok"}
+    
+    original = (image_service.analyze_images, image_service.time)
+    image_service.analyze_images = fake_analyze
+    image_service.time = types.SimpleNamespace(sleep=lambda s: None)
+    try:
+        results = list(image_service.iter_elements(elements))
+    finally:
+        image_service.analyze_images, image_service.time = original
+    
+    print(f"\n[prompt] {prompts}")
+    assert results[0]["analysis"]["analysis_text"] == "ok" and "error" not in results[0]
+    assert json.loads(prompts[0]) == {"abstract": "摘要", "element": elements[0]["element"],
+                                      "local_context": "上下文", "section_content": "章节"}
+    assert "摘要" in prompts[0]
+
+
+if __name__ == "__main__":
+    test_codec_matches_stdlib()
+    test_element_prompt()
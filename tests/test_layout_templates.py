@@ -0,0 +1,60 @@
+"""测试 LayoutService 模板预加载与字节码缓存"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.PowerPoint.layout_service import LayoutService, DECK_TEMPLATES
+
+BASIC_INFO = {"title": "Cached Title", "subtitle": "", "authors": ["A"], "affiliation": "", "date": "2024-01-01"}
+
+
+def _warm(service: LayoutService) -> float:
+    start = time.perf_counter()
+    service.warm_up()
+    return (time.perf_counter() - start) * 1000
+
+
+def test_bytecode_cache():
+    """测试字节码缓存: 首个实例编译并写入缓存，新实例直接加载且渲染结果一致"""
+    print("=" * 60)
+    print("TEST: template bytecode cache")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cold = LayoutService(cache_dir=tmp, auto_reload=False)
+        cold_ms = _warm(cold)
+        cached = list(Path(tmp).glob("__jinja2_*.cache"))
+        assert len(cached) >= len(DECK_TEMPLATES)
+        
+        warm = LayoutService(cache_dir=tmp, auto_reload=False)
+        warm_ms = _warm(warm)
+        print(f"\n[warm_up] compile: {cold_ms:.1f}ms, from bytecode cache: {warm_ms:.1f}ms")
+        
+        assert warm.render_title_page(BASIC_INFO) == cold.render_title_page(BASIC_INFO)
+
+
+def test_auto_reload():
+    """测试 auto_reload 关闭后不再检查模板文件"""
+    print("\n" + "=" * 60)
+    print("TEST: auto_reload")
+    print("=" * 60)
+    
+    assert LayoutService(cache_dir="", auto_reload=True).env.auto_reload is True
+    
+    service = LayoutService(cache_dir="", auto_reload=False)
+    assert service.env.auto_reload is False
+    assert service.env.bytecode_cache is None
+    
+    assert service.warm_up() == len(list(service.template_dir.glob("*.html")))
+    template = service.env.get_template("title_page.html")
+    # 关闭自动重载时，缓存命中直接返回同一模板对象
+    assert service.env.get_template("title_page.html") is template
+
+
+if __name__ == "__main__":
+    test_bytecode_cache()
+    test_auto_reload()
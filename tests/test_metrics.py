@@ -0,0 +1,127 @@
+"""测试 metrics - 指标注册表、文本导出与 /metrics 路由"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.core import metrics
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_registry_render():
+    """测试计数、仪表、直方图的导出格式"""
+    print("=" * 60)
+    print("TEST: registry render")
+    print("=" * 60)
+    
+    reg = Registry()
+    calls = Counter("t_calls_total", "calls", ("llm_id",), registry=reg)
+    busy = Gauge("t_busy", "busy", registry=reg)
+    latency = Histogram("t_latency_seconds", "latency", ("call",), buckets=(0.1, 1), registry=reg)
+    
+    calls.labels(1).inc()
+    calls.labels(1).inc(2)
+    calls.labels('say "hi"').inc()
+    with busy.track():
+        assert busy.labels().value == 1
+    for v in (0.05, 0.1, 0.5, 3):
+        latency.labels("run").observe(v)
+    
+    text = reg.render()
+    print(f"\n{text}")
+    assert "# TYPE t_calls_total counter" in text
+    assert 't_calls_total{llm_id="1"} 3' in text
+    assert 't_calls_total{llm_id="say \\"hi\\""} 1' in text
+    assert "t_busy 0" in text
+    assert 't_latency_seconds_bucket{call="run",le="0.1"} 2' in text
+    assert 't_latency_seconds_bucket{call="run",le="1"} 3' in text
+    assert 't_latency_seconds_bucket{call="run",le="+Inf"} 4' in text
+    assert 't_latency_seconds_count{call="run"} 4' in text
+    
+    try:
+        calls.labels(1, 2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("wrong label count should raise")
+
+
+def test_upstream_and_cache_helpers():
+    """测试上游计时（含异常计数）与缓存命中率"""
+    print("=" * 60)
+    print("TEST: upstream_timer / record_cache")
+    print("=" * 60)
+    
+    with metrics.upstream_timer("test", "ok"):
+        pass
+    try:
+        with metrics.upstream_timer("test", "boom"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    
+    assert metrics.UPSTREAM_LATENCY.labels("test", "ok").count == 1
+    assert metrics.UPSTREAM_LATENCY.labels("test", "boom").count == 1
+    assert metrics.UPSTREAM_ERRORS.labels("test", "boom").value == 1
+    assert metrics.UPSTREAM_ERRORS.labels("test", "ok").value == 0
+    
+    for hit in (True, True, False, True):
+        metrics.record_cache("test_cache", hit)
+    ratio = metrics.CACHE_HIT_RATIO.labels("test_cache").value
+    print(f"\n[Ratio] {ratio}")
+    assert ratio == 0.75
+
+
+def test_metrics_route():
+    """测试请求按路由模板计时并通过 /metrics 导出"""
+    print("=" * 60)
+    print("TEST: GET /metrics")
+    print("=" * 60)
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/health")
+            await client.get("/api/v1/jobs/does-not-exist")
+            await client.get("/no/such/path")
+            return await client.get("/metrics")
+    
+    resp = asyncio.run(run())
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = resp.text
+    assert 'keenpoint_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in text
+    assert 'route="/api/v1/jobs/{job_id}",status="404"' in text
+    assert 'route="<unmatched>",status="404"' in text
+    assert "# TYPE keenpoint_stage_duration_seconds histogram" in text
+    print(f"\n[Metrics] {len(text.splitlines())} lines")
+
+
+def test_overhead():
+    """测试单次计时开销足够低"""
+    print("=" * 60)
+    print("TEST: per-call overhead")
+    print("=" * 60)
+    
+    hist = Histogram("t_overhead_seconds", "overhead", ("call",), registry=None)
+    n = 100000
+    start = time.perf_counter()
+    for _ in range(n):
+        with hist.labels("llm_1").time():
+            pass
+    per_call = (time.perf_counter() - start) / n * 1e6
+    print(f"\n[Overhead] {per_call:.2f} us per timed call")
+    assert per_call < 20
+
+
+if __name__ == "__main__":
+    test_registry_render()
+    test_upstream_and_cache_helpers()
+    test_metrics_route()
+    test_overhead()
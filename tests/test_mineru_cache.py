@@ -0,0 +1,133 @@
+"""测试 mineru_cache - PDF指纹结果库"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.clients import mineru_cache
+from app.services.clients.mineru_cache import ResultStore, fingerprint, make_key
+from app.services.clients.mineru_client import process_files
+
+
+def _make_result_dir(root: Path, name: str, size: int) -> Path:
+    """构造模拟的解压结果目录"""
+    d = root / name
+    (d / "images").mkdir(parents=True)
+    (d / "full.md").write_text("# Title\n\n![](images/a.jpg)", encoding="utf-8")
+    (d / "images" / "a.jpg").write_bytes(b"\0" * size)
+    return d
+
+
+def test_store_and_evict():
+    """测试写入、复用与按大小淘汰"""
+    print("=" * 60)
+    print("TEST: mineru_cache.ResultStore")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = ResultStore(str(tmp / "cache"), max_bytes=2500)
+        
+        store.put("k1", _make_result_dir(tmp, "p1", 1000), "p1.pdf")
+        time.sleep(0.01)
+        store.put("k2", _make_result_dir(tmp, "p2", 1000), "p2.pdf")
+        
+        restored = store.restore("k1", tmp / "out" / "p1")
+        assert restored and (restored / "images" / "a.jpg").exists()
+        assert not (restored / mineru_cache.META_FILE).exists()
+        
+        # k1 刚被访问，写入 k3 后应淘汰 k2
+        time.sleep(0.01)
+        store.put("k3", _make_result_dir(tmp, "p3", 1000), "p3.pdf")
+        print(f"\n[缓存条目] k1={bool(store.get('k1'))} k2={bool(store.get('k2'))} k3={bool(store.get('k3'))}")
+        assert store.get("k1") and store.get("k3") and not store.get("k2")
+
+
+def test_restore_replaces_and_misses():
+    """测试恢复时清除目标目录旧文件，复制出错（条目被并发淘汰）按未命中处理"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_cache.ResultStore.restore")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = ResultStore(str(tmp / "cache"), max_bytes=10 * 1024 * 1024)
+        store.put("k1", _make_result_dir(tmp, "p1", 10), "p1.pdf")
+        
+        target = tmp / "out" / "p1"
+        target.mkdir(parents=True)
+        (target / "stale.md").write_text("old", encoding="utf-8")
+        assert store.restore("k1", target) == target
+        assert sorted(p.name for p in target.iterdir()) == ["full.md", "images"]
+        
+        def vanished(src, dst, **kwargs):
+            raise FileNotFoundError(src)
+        
+        original = mineru_cache.shutil.copytree
+        mineru_cache.shutil.copytree = vanished
+        try:
+            missed = store.restore("k1", target)
+        finally:
+            mineru_cache.shutil.copytree = original
+        print(f"\n[复制出错] restore={missed}, target_exists={target.exists()}")
+        assert missed is None and not target.exists()
+
+
+def test_make_key():
+    """测试缓存键区分解压模式与解压白名单"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_cache.make_key")
+    print("=" * 60)
+    
+    original = mineru_cache.settings.MINERU_EXTRACT_PATTERNS
+    try:
+        filtered = make_key("abc")
+        full = make_key("abc", extract_all=True)
+        mineru_cache.settings.MINERU_EXTRACT_PATTERNS = original + ["layout.json"]
+        widened = make_key("abc")
+        widened_full = make_key("abc", extract_all=True)
+    finally:
+        mineru_cache.settings.MINERU_EXTRACT_PATTERNS = original
+    
+    print(f"\n[键] {filtered} / {widened} / {full}")
+    assert len({filtered, widened, full}) == 3
+    assert widened_full == full
+    assert make_key("abc") == filtered
+
+
+def test_process_files_cache_hit():
+    """测试已知PDF直接从结果库返回，不调用MinerU"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_client.process_files (cache hit)")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf = tmp / "paper.pdf"
+        pdf.write_bytes(b"%PDF-1.7 fake")
+        
+        store = ResultStore(str(tmp / "cache"), max_bytes=10 * 1024 * 1024)
+        store.put(make_key(fingerprint(str(pdf))), _make_result_dir(tmp, "src", 10), "paper.pdf")
+        
+        original = mineru_cache._store
+        mineru_cache._store = store
+        try:
+            results = asyncio.run(process_files([str(pdf)], str(tmp / "out"), use_cache=True))
+        finally:
+            mineru_cache._store = original
+        
+        print(f"\n[结果] {results}")
+        assert len(results) == 1 and results[0]["cached"]
+        assert os.path.exists(os.path.join(results[0]["extract_dir"], "full.md"))
+
+
+if __name__ == "__main__":
+    test_store_and_evict()
+    test_restore_replaces_and_misses()
+    test_make_key()
+    test_process_files_cache_hit()
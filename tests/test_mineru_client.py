@@ -1,12 +1,17 @@
 """测试 mineru_client"""
 
+import io
 import sys
+import asyncio
 import json
+import zipfile
+import tempfile
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.services.clients.mineru_client import process_sync
+from app.services.clients import mineru_client
+from app.services.clients.mineru_client import process_sync, plan_batches, _extract
 
 OUTPUT_FILE = r"D:\MyFiles\AIPPT\Code\keenPoint\outputs\test_mineru.json"
 
@@ -49,5 +54,140 @@ def test_process_files():
     return results
 
 
+def _make_zip() -> bytes:
+    """构造模拟的MinerU结果压缩包"""
+    content_list = [
+        {"type": "image", "img_path": "images/fig1.jpg"},
+        {"type": "table", "img_path": "images/tbl1.jpg"},
+        {"type": "text", "text": "hello"}
+    ]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("full.md", "# Title\n\n![](images/fig1.jpg)\n\n![](images/eq1.jpg)")
+        zf.writestr("abc_content_list.json", json.dumps(content_list))
+        zf.writestr("layout.pdf", b"%PDF-1.7")
+        zf.writestr("abc_model.json", "[]")
+        for name in ["fig1.jpg", "tbl1.jpg", "eq1.jpg", "unused.jpg"]:
+            zf.writestr(f"images/{name}", b"\xff\xd8")
+    return buf.getvalue()
+
+
+def test_extract_members():
+    """测试按解析器需求筛选解压"""
+    print("=" * 60)
+    print("TEST: mineru_client._extract")
+    print("=" * 60)
+    
+    data = _make_zip()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "filtered"
+        count = _extract(data, target)
+        files = sorted(str(p.relative_to(target).as_posix()) for p in target.rglob("*") if p.is_file())
+        print(f"\n[筛选解压] {count} 个文件: {files}")
+        assert files == [
+            "abc_content_list.json", "full.md",
+            "images/eq1.jpg", "images/fig1.jpg", "images/tbl1.jpg"
+        ]
+        
+        target = Path(tmp) / "full"
+        count = _extract(data, target, extract_all=True)
+        print(f"[完整解压] {count} 个文件")
+        assert count == 8
+        
+        # 重新解压时清除同名PDF的旧结果
+        (target / "stale.md").write_text("old", encoding="utf-8")
+        _extract(data, target)
+        assert not (target / "stale.md").exists()
+
+
+def test_plan_batches():
+    """测试按文件数和字节数均衡拆分批次"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_client.plan_batches")
+    print("=" * 60)
+    
+    sizes = [900, 100, 500, 500, 300, 700, 200, 800]
+    with tempfile.TemporaryDirectory() as tmp:
+        pending = []
+        for idx, size in enumerate(sizes):
+            p = Path(tmp) / f"{idx}.pdf"
+            p.write_bytes(b"\0" * size)
+            pending.append((idx, str(p), None))
+        
+        batches = plan_batches(pending, max_files=3, max_bytes=1500)
+        loads = [sum(sizes[e[0]] for e in b) for b in batches]
+        print(f"\n[批次] {[[e[0] for e in b] for b in batches]} bytes={loads}")
+        
+        assert sorted(e[0] for b in batches for e in b) == list(range(len(sizes)))
+        assert all(len(b) <= 3 and load <= 1500 for b, load in zip(batches, loads))
+        assert all([e[0] for e in b] == sorted(e[0] for e in b) for b in batches)
+        assert max(loads) - min(loads) <= max(sizes)
+        
+        # 单个超限文件独占一批
+        single = plan_batches(pending[:1], max_files=3, max_bytes=100)
+        assert len(single) == 1
+
+
+def test_partial_batch_failure():
+    """测试部分批次失败时结果仍与输入一一对应"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_client.process_files partial failure")
+    print("=" * 60)
+    
+    async def fake_run_batch(session, pending, out, extract_all, use_cache):
+        if any(Path(p).name == "1.pdf" for _, p, _ in pending):
+            raise RuntimeError("upload failed")
+        return {idx: {"file_name": Path(p).name, "state": "done"} for idx, p, _ in pending}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for idx in range(4):
+            p = Path(tmp) / f"{idx}.pdf"
+            p.write_bytes(b"\0" * 100)
+            paths.append(str(p))
+        
+        saved = (mineru_client._run_batch, mineru_client.settings.MINERU_BATCH_MAX_FILES)
+        mineru_client._run_batch = fake_run_batch
+        mineru_client.settings.MINERU_BATCH_MAX_FILES = 1
+        try:
+            results = asyncio.run(mineru_client.process_files(paths, tmp, use_cache=False))
+        finally:
+            mineru_client._run_batch, mineru_client.settings.MINERU_BATCH_MAX_FILES = saved
+    
+    print(f"\n[结果] {results}")
+    assert [r["file_name"] for r in results] == ["0.pdf", "1.pdf", "2.pdf", "3.pdf"]
+    assert [r["state"] for r in results] == ["done", "failed", "done", "done"]
+    assert results[1]["err_msg"] == "upload failed"
+
+
+def test_shared_session():
+    """测试共享会话复用与事件循环内的同步调用保护"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_client shared session")
+    print("=" * 60)
+    
+    async def run():
+        await mineru_client.startup()
+        try:
+            async with mineru_client._session_scope() as s1, mineru_client._session_scope() as s2:
+                assert s1 is s2 is mineru_client._session
+            try:
+                process_sync([])
+            except RuntimeError as e:
+                print(f"\n[同步调用保护] {e}")
+            else:
+                raise AssertionError("process_sync should refuse a running loop")
+        finally:
+            await mineru_client.shutdown()
+        assert mineru_client._session is None
+    
+    asyncio.run(run())
+
+
 if __name__ == "__main__":
+    test_extract_members()
+    test_plan_batches()
+    test_partial_batch_failure()
+    test_shared_session()
     test_process_files()
@@ -0,0 +1,161 @@
+"""测试 mineru_journal - 批次日志与续跑"""
+
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.clients import mineru_client, mineru_journal
+from app.core.config import settings
+from app.services.clients.mineru_journal import BatchJournal, POLLING, FAILED
+
+OLD_OWNER = "host:0123456789ab"  # 上次运行（已退出进程）的认领标识
+
+
+def _set_owner(journal: BatchJournal, batch_id: str, owner: str, age: float = 0):
+    """设置批次所属进程及其最近一次心跳距今的秒数"""
+    with journal._conn:
+        journal._conn.execute("UPDATE batches SET owner = ?, updated = ? WHERE batch_id = ?",
+                              (owner, time.time() - age, batch_id))
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def json(self):
+        return self.payload
+
+
+class _FakeSession:
+    """轮询结果始终为处理中的会话"""
+    def __init__(self):
+        self.calls = 0
+    
+    def get(self, url, headers=None):
+        self.calls += 1
+        return _FakeResponse({"code": 0, "data": {"extract_result": [{"file_name": "a.pdf", "state": "running"}]}})
+
+
+def test_resume_pending():
+    """测试重启后续跑未完成批次: 旧进程心跳过期后认领（模拟轮询与下载）"""
+    print("=" * 60)
+    print("TEST: mineru_client.resume_pending")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = BatchJournal(str(Path(tmp) / "journal.db"))
+        journal.record_batch("batch-1", str(Path(tmp) / "out"), [
+            {"file_path": "a.pdf", "file_name": "a.pdf", "url": "http://u/a", "cache_key": None},
+            {"file_path": "b.pdf", "file_name": "b.pdf", "url": "http://u/b", "cache_key": None}
+        ], use_cache=False)
+        journal.set_item_state("batch-1", "a.pdf", "uploaded")
+        journal.set_item_state("batch-1", "b.pdf", "uploaded")
+        journal.set_batch_state("batch-1", POLLING)
+        _set_owner(journal, "batch-1", OLD_OWNER)  # 重启前的进程刚退出，心跳尚未过期
+        
+        pending = journal.unfinished()
+        print(f"\n[未完成批次] {[b['batch_id'] for b in pending]}")
+        assert len(pending) == 1 and len(pending[0]["items"]) == 2
+        
+        polled = []
+        
+        async def fake_poll(session, batch_id, deadline):
+            polled.append(batch_id)
+            return [{"file_name": "b.pdf", "state": "done"}, {"file_name": "a.pdf", "state": "done"}]
+        
+        async def fake_download(session, items, output_dir, extract_all=False):
+            for item in items:
+                item["extract_dir"] = str(Path(output_dir) / Path(item["file_name"]).stem)
+        
+        saved = (mineru_journal._journal, mineru_client._poll, mineru_client._download, settings.MINERU_JOURNAL_LEASE)
+        mineru_journal._journal = journal
+        mineru_client._poll, mineru_client._download = fake_poll, fake_download
+        settings.MINERU_JOURNAL_LEASE = 0.2
+        try:
+            results = asyncio.run(mineru_client.resume_pending())
+        finally:
+            mineru_journal._journal, mineru_client._poll, mineru_client._download, settings.MINERU_JOURNAL_LEASE = saved
+        
+        print(f"[续跑结果] {[r['file_name'] for r in results]}")
+        assert polled == ["batch-1"]
+        assert [r["file_name"] for r in results] == ["a.pdf", "b.pdf"]
+        assert journal.unfinished() == []
+        journal.close()
+
+
+def test_claim():
+    """测试认领: 仅心跳过期的批次可认领，同一快照只有一个进程认领成功，心跳只能由持有者刷新"""
+    print("\n" + "=" * 60)
+    print("TEST: BatchJournal.claim")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = BatchJournal(str(Path(tmp) / "journal.db"))
+        for batch_id in ("stale", "live", "mine"):
+            journal.record_batch(batch_id, tmp, [
+                {"file_path": "a.pdf", "file_name": "a.pdf", "url": "http://u/a", "cache_key": None}
+            ])
+        lease = settings.MINERU_JOURNAL_LEASE
+        _set_owner(journal, "stale", OLD_OWNER, age=lease + 1)
+        _set_owner(journal, "live", OLD_OWNER, age=lease / 2)
+        _set_owner(journal, "mine", mineru_journal._owner(), age=lease + 1)
+        
+        snapshot = {b["batch_id"]: b for b in journal.unfinished()}
+        claims = {batch_id: journal.claim(b) for batch_id, b in snapshot.items()}
+        print(f"\n[认领] {claims}")
+        assert claims == {"stale": True, "live": False, "mine": False}
+        
+        # 另一进程持有同一快照时，按旧 owner 的条件更新失败
+        assert journal.claim(snapshot["stale"]) is False
+        assert journal.heartbeat("stale") is True
+        assert journal.heartbeat("live") is False
+        journal.close()
+
+
+def test_poll_deadline():
+    """测试续跑已超龄且仍未完成的批次: 轮询一次后记为失败，不再无限轮询"""
+    print("\n" + "=" * 60)
+    print("TEST: mineru_client.resume_pending (poll deadline)")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = BatchJournal(str(Path(tmp) / "journal.db"))
+        journal.record_batch("old", tmp, [
+            {"file_path": "a.pdf", "file_name": "a.pdf", "url": "http://u/a", "cache_key": None}
+        ])
+        journal.set_batch_state("old", POLLING)
+        with journal._conn:
+            journal._conn.execute("UPDATE batches SET created = ? WHERE batch_id = 'old'",
+                                  (time.time() - settings.MINERU_POLL_TIMEOUT - 1,))
+        _set_owner(journal, "old", OLD_OWNER, age=settings.MINERU_JOURNAL_LEASE + 1)
+        
+        session = _FakeSession()
+        
+        saved = mineru_journal._journal
+        mineru_journal._journal = journal
+        try:
+            results = asyncio.run(mineru_client._resume_batch(session, journal, journal.unfinished()[0]))
+            state = journal._conn.execute("SELECT state FROM batches WHERE batch_id = 'old'").fetchone()[0]
+        finally:
+            mineru_journal._journal = saved
+        
+        print(f"\n[轮询次数] {session.calls}, state={state}")
+        assert results == [] and session.calls == 1
+        assert state == FAILED and journal.unfinished() == []
+        journal.close()
+
+
+if __name__ == "__main__":
+    test_resume_pending()
+    test_claim()
+    test_poll_deadline()
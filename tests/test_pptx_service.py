@@ -0,0 +1,78 @@
+"""测试PPTX导出 - 页面数量、图片按内容去重、缺失图片与原子写入"""
+
+import sys
+import logging
+import zipfile
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+from pptx import Presentation
+
+from app.core.logger import logger
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from app.services.PowerPoint.pptx_service import build_pptx
+from tests.synthetic import make_process_result
+
+
+def _write_images(root: Path, count: int, distinct: int):
+    """fig1..figN 按 distinct 种内容循环，不同文件名之间存在重复内容"""
+    (root / "images").mkdir(parents=True)
+    blobs = []
+    for i in range(distinct):
+        path = root / f"src{i}.jpg"
+        Image.new("RGB", (400, 300), (40 * i, 80, 120)).save(path)
+        blobs.append(path.read_bytes())
+    for fig_id in range(1, count + 1):
+        (root / "images" / f"fig{fig_id}.jpg").write_bytes(blobs[fig_id % distinct])
+
+
+def test_build_pptx():
+    """测试导出结果: 页数一致、相同内容只嵌入一次、缺失图片计数、文件可重新打开"""
+    print("=" * 60)
+    print("TEST: build_pptx")
+    print("=" * 60)
+    
+    logger.setLevel(logging.ERROR)
+    try:
+        data = make_process_result(sections=6, slides_per_section=4)
+        slides_content = build_content_from_process_result(data, compact=True)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            _write_images(root, 5, distinct=2)  # fig6 不存在
+            output = root / "out" / "deck.pptx"
+            result = build_pptx(slides_content, str(output), {"title": "Deck", "authors": ["A", "B"]},
+                                image_base=tmp)
+            print(f"\n[Result] {result}")
+            
+            # 标题页 + 6个章节页 + 24张内容页
+            assert result["slides"] == 31
+            assert result["media"] == {"pictures": 10, "embedded": 2, "missing": 2}
+            assert result["size"] == output.stat().st_size
+            assert [p.name for p in output.parent.iterdir()] == ["deck.pptx"]
+            
+            with zipfile.ZipFile(output) as z:
+                media = [n for n in z.namelist() if n.startswith("ppt/media/")]
+            assert len(media) == 2
+            
+            prs = Presentation(str(output))
+            assert len(prs.slides) == 31
+            assert prs.slides[0].shapes.title.text == "Deck"
+            # 占位符随16:9页宽拉伸，标题与正文不再局限于左侧
+            for slide in list(prs.slides)[:3]:
+                for ph in slide.placeholders:
+                    assert ph.left + ph.width <= prs.slide_width
+                    assert ph.width > prs.slide_width * 0.6
+            pictures = [s for slide in prs.slides for s in slide.shapes if s.shape_type == 13]
+            assert len(pictures) == 10
+            tables = [s for slide in prs.slides for s in slide.shapes if s.has_table]
+            assert tables and len(tables[0].table.columns) == 5
+    finally:
+        logger.setLevel(logging.INFO)
+
+
+if __name__ == "__main__":
+    test_build_pptx()
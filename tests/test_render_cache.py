@@ -0,0 +1,100 @@
+"""测试页面渲染缓存 - 键生成、LRU上限、磁盘层与整套渲染复用"""
+
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.logger import logger
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from app.services.PowerPoint.layout_service import LayoutService
+from app.services.PowerPoint.render_cache import RenderCache
+from tests.synthetic import make_process_result
+
+
+def test_make_key():
+    """测试缓存键: 变量顺序无关，模板名/版本/变量变化时不同"""
+    print("=" * 60)
+    print("TEST: RenderCache.make_key")
+    print("=" * 60)
+    
+    key = RenderCache.make_key("a.html", "v1", {"x": 1, "y": [1, 2]})
+    assert key == RenderCache.make_key("a.html", "v1", {"y": [1, 2], "x": 1})
+    assert key != RenderCache.make_key("b.html", "v1", {"x": 1, "y": [1, 2]})
+    assert key != RenderCache.make_key("a.html", "v2", {"x": 1, "y": [1, 2]})
+    assert key != RenderCache.make_key("a.html", "v1", {"x": 2, "y": [1, 2]})
+    # 无法序列化的变量不缓存
+    assert RenderCache.make_key("a.html", "v1", {"x": object()}) is None
+
+
+def test_lru_and_disk():
+    """测试内存层按字节数淘汰，磁盘层跨实例复用"""
+    print("\n" + "=" * 60)
+    print("TEST: RenderCache LRU + disk")
+    print("=" * 60)
+    
+    cache = RenderCache(max_bytes=250)
+    for i in range(5):
+        cache.put(f"k{i}", "x" * 100)
+    stats = cache.stats()
+    print(f"\n[Memory] {stats}")
+    assert stats["entries"] == 2 and stats["bytes"] == 200
+    assert cache.get("k0") is None and cache.get("k4") == "x" * 100
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        first = RenderCache(max_bytes=1024, disk_dir=tmp, disk_max_bytes=350)
+        for i in range(3):
+            first.put(f"d{i}", "y" * 100)
+        assert len(list(Path(tmp).glob("*.html"))) == 3
+        
+        second = RenderCache(max_bytes=1024, disk_dir=tmp, disk_max_bytes=350)
+        assert second.get("d2") == "y" * 100
+        assert second.stats()["disk_hits"] == 1
+        
+        # 超出磁盘上限时淘汰最久未访问的页面
+        for i in range(3, 5):
+            second.put(f"d{i}", "y" * 100)
+        names = sorted(p.stem for p in Path(tmp).glob("*.html"))
+        print(f"[Disk] {names}")
+        assert names == ["d2", "d3", "d4"]
+
+
+def test_deck_rerender():
+    """测试修改单个章节后重新渲染: 只有该章节页面重新渲染，输出与无缓存一致"""
+    print("\n" + "=" * 60)
+    print("TEST: render_deck with render cache")
+    print("=" * 60)
+    
+    logger.setLevel(logging.WARNING)
+    try:
+        data = make_process_result(sections=10, slides_per_section=4)
+        service = LayoutService(cache_dir="", render_cache=RenderCache(16 * 1024 * 1024))
+        pages = service.plan_deck(build_content_from_process_result(data))
+        
+        first = [service._render_page(p) for p in pages]
+        assert service.render_cache.stats()["misses"] == len(pages)
+        
+        # 修改第3个章节的一张幻灯片
+        data["outline"]["sections"][2]["raw_result"]["ppt_outline"][1]["slide_title"] = "Changed title"
+        changed = service.plan_deck(build_content_from_process_result(data))
+        second = [service._render_page(p) for p in changed]
+        
+        stats = service.render_cache.stats()
+        print(f"\n[Stats] {stats}")
+        assert stats["misses"] == len(pages) + 1
+        assert stats["hits"] == len(pages) - 1
+        assert sum(a != b for a, b in zip(first, second)) == 1
+        
+        uncached = LayoutService(cache_dir="")
+        uncached.render_cache = None
+        assert [uncached._render_page(p) for p in changed] == second
+    finally:
+        logger.setLevel(logging.INFO)
+
+
+if __name__ == "__main__":
+    test_make_key()
+    test_lru_and_disk()
+    test_deck_rerender()
@@ -0,0 +1,90 @@
+"""测试 layout_service.render_deck - 整套渲染、模板映射与清单"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.PowerPoint.content_service import build_content_from_process_result
+from app.services.PowerPoint.layout_service import render_deck, LayoutService
+from tests.synthetic import make_process_result
+
+BASIC_INFO = {
+    "title": "Hierarchy-Aware Global Model for Hierarchical Text Classification",
+    "subtitle": "",
+    "authors": ["Jie Zhou", "Chunping Ma"],
+    "affiliation": "Shanghai Jiao Tong University",
+    "date": "2020-07-05"
+}
+
+
+def test_plan_deck():
+    """测试幻灯片到模板的映射"""
+    print("=" * 60)
+    print("TEST: LayoutService.plan_deck")
+    print("=" * 60)
+    
+    data = make_process_result(sections=3, slides_per_section=4)
+    # 去掉一张幻灯片的图表引用，映射为纯文本页
+    data["outline"]["sections"][0]["raw_result"]["ppt_outline"][2]["visual_refs"] = {}
+    slides_content = build_content_from_process_result(data)
+    pages = LayoutService().plan_deck(slides_content, BASIC_INFO)
+    
+    kinds = [p["kind"] for p in pages]
+    print(f"\n[Pages] {len(pages)}: {kinds}")
+    
+    # 标题页 + 每章节 (章节页 + 4张内容页)
+    assert len(pages) == 1 + 3 * 5
+    assert kinds[0] == "title"
+    assert kinds.count("section_header") == 3
+    assert {"picture", "table", "text_only"} <= set(kinds)
+    
+    header = pages[1]["vars"]
+    assert header["section_index"] == "01" and header["section_title"] == "Section 1"
+    
+    table = next(p for p in pages if p["kind"] == "table")["vars"]["table"]
+    assert table["columns"] == ["Col0", "Col1", "Col2", "Col3", "Col4"]
+    assert len(table["rows"]) == 8 and len(table["rows"][0]["values"]) == 5
+    
+    # 紧凑格式映射结果一致
+    compact = build_content_from_process_result(data, compact=True)
+    assert LayoutService().plan_deck(compact, BASIC_INFO) == pages
+
+
+def test_render_deck():
+    """测试整套渲染与清单写入"""
+    print("\n" + "=" * 60)
+    print("TEST: render_deck")
+    print("=" * 60)
+    
+    data = make_process_result(sections=5, slides_per_section=4)
+    slides_content = build_content_from_process_result(data)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        result = render_deck(slides_content, BASIC_INFO, output_dir=tmp, max_workers=4)
+        
+        print(f"\n[Deck] {len(result['pages'])} pages, timings={result['timings']}")
+        assert len(result["pages"]) == 1 + 5 * 5
+        assert set(result["timings"]) == {"plan_ms", "render_ms", "write_ms", "total_ms"}
+        
+        manifest = json.loads(Path(result["manifest_path"]).read_text(encoding="utf-8"))
+        assert manifest["total_pages"] == len(result["pages"])
+        assert [p["file"] for p in manifest["pages"]][:2] == ["slide_001.html", "slide_002.html"]
+        
+        for entry in manifest["pages"]:
+            page = Path(tmp) / entry["file"]
+            assert page.stat().st_size == entry["size"]
+        
+        title_html = (Path(tmp) / "slide_001.html").read_text(encoding="utf-8")
+        assert BASIC_INFO["title"] in title_html and "Jie Zhou" in title_html
+        
+        first = manifest["pages"][2]
+        html = (Path(tmp) / first["file"]).read_text(encoding="utf-8")
+        assert first["slide_title"] in html
+
+
+if __name__ == "__main__":
+    test_plan_deck()
+    test_render_deck()
@@ -0,0 +1,139 @@
+"""测试请求合并 - 线程/协程 single-flight、Dify调用合并与API请求合并"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.api import routes
+from app.core import metrics
+from app.core.singleflight import SingleFlight
+from app.services.clients import dify_workflow_client
+from app.services.clients.dify_workflow_client import DifyClient
+
+
+def test_thread_singleflight():
+    """测试相同键并发只执行一次，异常共享，不同键互不影响"""
+    print("=" * 60)
+    print("TEST: SingleFlight")
+    print("=" * 60)
+    
+    flight = SingleFlight("test")
+    calls = []
+    
+    def work(key):
+        calls.append(key)
+        time.sleep(0.2)
+        if key == "bad":
+            raise RuntimeError("upstream failed")
+        return f"result-{key}"
+    
+    def call(key):
+        try:
+            return flight.do(key, lambda: work(key))
+        except RuntimeError as e:
+            return str(e)
+    
+    keys = ["a"] * 6 + ["b"] * 2 + ["bad"] * 3
+    with ThreadPoolExecutor(len(keys)) as pool:
+        results = list(pool.map(call, keys))
+    
+    print(f"\n[Calls] {sorted(calls)}")
+    assert sorted(calls) == ["a", "b", "bad"]
+    assert results == ["result-a"] * 6 + ["result-b"] * 2 + ["upstream failed"] * 3
+    
+    # 执行结束后不再复用
+    assert flight.do("a", lambda: "fresh") == "fresh"
+
+
+class _FakeResponse:
+    content = b'{"data": {"outputs": {"text": "{\\"summary\\": \\"ok\\"}"}}}'
+    
+    def raise_for_status(self):
+        pass
+
+
+def test_dify_run_coalesced():
+    """测试相同 (llm_id, prompt) 的并发 run 只发一次上游请求，结果互不共享引用"""
+    print("=" * 60)
+    print("TEST: DifyClient.run coalescing")
+    print("=" * 60)
+    
+    posts = []
+    lock = threading.Lock()
+    
+    def fake_post(url, headers, data, timeout):
+        with lock:
+            posts.append(data)
+        time.sleep(0.2)
+        return _FakeResponse()
+    
+    client = DifyClient("test-key", "http://dify.test")
+    original = dify_workflow_client.requests.post
+    dify_workflow_client.requests.post = fake_post
+    shared_before = metrics.SINGLEFLIGHT_CALLS.labels("dify", "shared").value
+    try:
+        with ThreadPoolExecutor(6) as pool:
+            same = list(pool.map(lambda _: client.run(1, "same prompt"), range(5)))
+            other = client.run(2, "same prompt")
+    finally:
+        dify_workflow_client.requests.post = original
+    
+    print(f"\n[Posts] {len(posts)} for 6 calls")
+    assert len(posts) == 2
+    assert all(r == same[0] for r in same) and other == same[0]
+    same[0]["data"]["mutated"] = True
+    assert "mutated" not in same[1]["data"]
+    assert metrics.SINGLEFLIGHT_CALLS.labels("dify", "shared").value - shared_before == 4
+
+
+def test_api_requests_coalesced():
+    """测试相同请求体或相同 Idempotency-Key 的API请求共享一次执行"""
+    print("=" * 60)
+    print("TEST: API request coalescing")
+    print("=" * 60)
+    
+    calls = []
+    
+    def slow_analyze(parse_result, abstract):
+        calls.append(parse_result.get("n"))
+        time.sleep(0.3)
+        return {"n": parse_result.get("n"), "statistics": {}}
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            post = lambda body, **kw: client.post("/api/v1/analyze/full", json=body, **kw)
+            same = await asyncio.gather(*(post({"n": 1}) for _ in range(3)))
+            idem = await asyncio.gather(post({"n": 2}, headers={"Idempotency-Key": "k1"}),
+                                        post({"n": 3}, headers={"Idempotency-Key": "k1"}))
+            distinct = await asyncio.gather(post({"n": 4}), post({"n": 5}))
+            return same, idem, distinct
+    
+    original = routes.analyze_full_document
+    routes.analyze_full_document = slow_analyze
+    try:
+        same, idem, distinct = asyncio.run(run())
+    finally:
+        routes.analyze_full_document = original
+    
+    print(f"\n[Calls] {calls}")
+    assert sorted(calls) == [1, 2, 4, 5]
+    assert all(r.status_code == 200 for r in same + idem + distinct)
+    assert len({r.json()["artifact_id"] for r in same}) == 1
+    assert idem[0].json() == idem[1].json()
+    assert {r.json()["data"]["n"] for r in distinct} == {4, 5}
+    assert routes._request_flight.in_flight == 0
+
+
+if __name__ == "__main__":
+    test_thread_singleflight()
+    test_dify_run_coalesced()
+    test_api_requests_coalesced()
@@ -0,0 +1,184 @@
+"""测试流式分析 - 章节/元素逐条产出，最后输出统计记录"""
+
+import sys
+import json
+import time
+import types
+import asyncio
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.api import routes
+from app.services.document import nlp_service, image_service
+from app.services.artifacts.artifact_store import load_artifact
+
+PARSE_RESULT = {
+    "sections": [
+        {"name": "Title", "content": "Paper title"},
+        {"name": "Abstract", "content": "abstract text"},
+        {"name": "1 Introduction", "content": "See Figure 1.",
+         "fig_refs": [{"id": 1, "img_path": "", "caption": "Figure 1"}]},
+        {"name": "2 Method", "content": "Table 1 shows results.",
+         "table_refs": [{"id": 1, "img_path": "", "caption": "Table 1", "body": "<table></table>"}]},
+    ],
+    "metadata": {"total_sections": 4}
+}
+NO_SLEEP = types.SimpleNamespace(sleep=lambda s: None)
+
+
+def _patch(module, **attrs):
+    """替换模块属性，返回恢复函数"""
+    original = {k: getattr(module, k) for k in attrs}
+    for k, v in attrs.items():
+        setattr(module, k, v)
+    return lambda: [setattr(module, k, v) for k, v in original.items()]
+
+
+def _fake_summary(user_prompt):
+    name = user_prompt.split("name: ")[1].split("\n")[0]
+    return {"section_name": name, "summary": f"summary of {name}", "key_points": ["p"]}
+
+
+def _fake_images(user_prompt, file_ids, llm_id, auto_upload, allow_empty_files):
+    elem = json.loads(user_prompt)["element"]
+    return {"element_id": elem["id"], "element_type": elem["type"], "analysis_text": "ok"}
+
+
+def test_iter_full_document():
+    """测试服务层逐章节产出且与一次性分析结果一致"""
+    print("=" * 60)
+    print("TEST: iter_full_document")
+    print("=" * 60)
+    
+    restore = _patch(nlp_service, analyze_summary=_fake_summary, time=NO_SLEEP,
+                     analyze_basic=lambda query: {"title": "Paper title"})
+    try:
+        events = list(nlp_service.iter_full_document(PARSE_RESULT, "abstract"))
+        full = nlp_service.analyze_full_document(PARSE_RESULT, "abstract")
+    finally:
+        restore()
+    
+    kinds = [e["event"] for e in events]
+    print(f"\n[Events] {kinds}")
+    assert kinds == ["basic_info", "section", "section", "statistics"]
+    assert events[0]["data"] == full["basic_info"]
+    assert [e["data"] for e in events[1:-1]] == full["sections_analysis"]
+    assert events[-1]["data"] == full["statistics"]
+
+
+def test_iter_image_analysis():
+    """测试服务层逐元素产出"""
+    print("=" * 60)
+    print("TEST: iter_image_analysis")
+    print("=" * 60)
+    
+    restore = _patch(image_service, analyze_images=_fake_images, time=NO_SLEEP)
+    try:
+        events = list(image_service.iter_image_analysis(PARSE_RESULT))
+    finally:
+        restore()
+    
+    kinds = [e["event"] for e in events]
+    print(f"\n[Events] {kinds}")
+    assert kinds == ["element", "element", "statistics"]
+    assert events[0]["data"]["analysis"]["element_type"] == "image"
+    assert events[-1]["data"] == {"total": 2, "success": 2, "failed": 0}
+
+
+async def _call(path: str, body: dict) -> list:
+    """直接调用ASGI应用，记录每个响应分块的到达时间"""
+    payload = json.dumps(body).encode()
+    scope = {"type": "http", "http_version": "1.1", "method": "POST", "scheme": "http",
+             "path": path, "raw_path": path.split("?")[0].encode(),
+             "query_string": path.partition("?")[2].encode(), "root_path": "",
+             "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+             "client": ("test", 1), "server": ("test", 80)}
+    sent = False
+    chunks = []
+    start = time.perf_counter()
+    
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+    
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter() - start, message["body"]))
+    
+    await app(scope, receive, send)
+    return chunks
+
+
+def test_stream_route_incremental():
+    """测试流式路由: 首条记录在全部完成前到达，最后一条带 artifact_id"""
+    print("=" * 60)
+    print("TEST: /analyze/full/stream incremental delivery")
+    print("=" * 60)
+    
+    def slow_iter(parse_result, abstract):
+        yield {"event": "basic_info", "data": {"title": "t"}}
+        for i in range(3):
+            time.sleep(0.3)
+            yield {"event": "section", "data": {"id": str(i), "summary": "s"}}
+        yield {"event": "statistics", "data": {"total": 3}}
+    
+    restore = _patch(routes, iter_full_document=slow_iter)
+    try:
+        chunks = asyncio.run(_call("/api/v1/analyze/full/stream", PARSE_RESULT))
+    finally:
+        restore()
+    
+    records = [json.loads(line) for _, body in chunks for line in body.splitlines()]
+    print(f"\n[Chunks] {[round(t, 2) for t, _ in chunks]}")
+    assert [r["event"] for r in records] == ["basic_info", "section", "section", "section", "statistics"]
+    assert chunks[0][0] < 0.3 <= chunks[-1][0] - chunks[0][0]
+    
+    stored = load_artifact(records[-1]["artifact_id"])
+    assert [s["id"] for s in stored["sections_analysis"]] == ["0", "1", "2"]
+    assert stored["statistics"] == {"total": 3}
+
+
+def test_stream_route_sse_and_errors():
+    """测试SSE格式、不支持的格式与中途异常"""
+    print("=" * 60)
+    print("TEST: /analyze/images/stream sse + errors")
+    print("=" * 60)
+    
+    def failing_iter(parse_result, base_path):
+        yield {"event": "element", "data": {"element": {"id": 1}}}
+        raise RuntimeError("boom")
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            sse = await client.post("/api/v1/analyze/images/stream?format=sse", json=PARSE_RESULT)
+            bad = await client.post("/api/v1/analyze/images/stream?format=xml", json=PARSE_RESULT)
+            return sse, bad
+    
+    restore = _patch(routes, iter_image_analysis=failing_iter)
+    try:
+        sse, bad = asyncio.run(run())
+    finally:
+        restore()
+    
+    assert sse.headers["content-type"].startswith("text/event-stream")
+    blocks = [b for b in sse.text.split("\n\n") if b]
+    print(f"\n[SSE] {blocks}")
+    assert blocks[0].startswith("event: element\ndata: ")
+    assert blocks[-1].startswith("event: error\ndata: ")
+    assert json.loads(blocks[-1].split("data: ", 1)[1])["data"]["detail"] == "boom"
+    assert bad.status_code == 400
+
+
+if __name__ == "__main__":
+    test_iter_full_document()
+    test_iter_image_analysis()
+    test_stream_route_incremental()
+    test_stream_route_sse_and_errors()
@@ -0,0 +1,89 @@
+"""测试HTML表格解析 - rowspan/colspan展开、多行表头、解析阶段缓存与表格页渲染"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.document.parse_service import MarkdownParser
+from app.services.document.table_parser import parse_table_html
+from app.services.PowerPoint.layout_service import LayoutService
+
+SPANNED = """<html><body><table>
+<tr><td rowspan="2">Model</td><td colspan="2">WOS</td><td colspan=2>RCV1</td></tr>
+<tr><td>Micro</td><td>Macro</td><td>Micro</td><td>Macro</td></tr>
+<tr><td rowspan="2">HiAGM</td><td>85.82</td><td>80.28</td><td>83.96</td><td>63.35</td></tr>
+<tr><td>85.21<br>(±0.1)</td><td>79.97</td><td>83.11</td><td>61.43</td></tr>
+<tr><td>TextRCNN &amp; GCN</td><td colspan="4">n/a</td></tr>
+</table></body></html>"""
+
+
+def test_parse_spans():
+    """测试跨行跨列: 多行表头合并为 "上层 / 下层"，跨越的位置重复单元格文本"""
+    print("=" * 60)
+    print("TEST: parse_table_html")
+    print("=" * 60)
+    
+    data = parse_table_html(SPANNED)
+    for row in [data["columns"]] + data["rows"]:
+        print(f"  {row}")
+    
+    assert data["columns"] == ["Model", "WOS / Micro", "WOS / Macro", "RCV1 / Micro", "RCV1 / Macro"]
+    assert data["rows"] == [
+        ["HiAGM", "85.82", "80.28", "83.96", "63.35"],
+        ["HiAGM", "85.21 (±0.1)", "79.97", "83.11", "61.43"],
+        ["TextRCNN & GCN", "n/a", "n/a", "n/a", "n/a"],
+    ]
+    
+    # thead/th 表头、不规则行补齐、嵌套表格与注释
+    data = parse_table_html("<table><thead><tr><th>a</th><th>b</th></tr></thead><tbody>"
+                            "<tr><td>1<table><tr><td>x</td></tr></table></td><td>2<!-- c --></td></tr>"
+                            "<tr><td>3</td></tr></tbody></table>")
+    assert data == {"columns": ["a", "b"], "rows": [["1 x", "2"], ["3", ""]]}
+    assert parse_table_html("") == {"columns": [], "rows": []}
+    
+    # 返回值为副本，修改不影响缓存
+    parse_table_html(SPANNED)["rows"][0][0] = "changed"
+    assert parse_table_html(SPANNED)["rows"][0][0] == "HiAGM"
+
+
+def test_parse_time_data():
+    """测试解析阶段为每个表格生成结构化数据"""
+    print("\n" + "=" * 60)
+    print("TEST: MarkdownParser table data")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        md = Path(tmp) / "full.md"
+        md.write_text(f"# 1 Results\n\nTable 1: Main results.\n{SPANNED}\n", encoding="utf-8")
+        result = MarkdownParser().parse(str(md))
+    
+    table = result["sections"][0]["table_refs"][0]
+    print(f"\n[Table] columns={table['data']['columns']}")
+    assert table["data"] == parse_table_html(table["body"])
+
+
+def test_render_table_page():
+    """测试表格页渲染: 表格引用与已整理数据两种输入"""
+    print("\n" + "=" * 60)
+    print("TEST: render_table_page")
+    print("=" * 60)
+    
+    service = LayoutService(cache_dir="")
+    page = service.render_table_page({"section_index": "02", "section_title": "Results",
+                                      "slide_title": "Main results",
+                                      "table": {"body": SPANNED, "caption": "Table 1: Main results."}})
+    print(f"\n[HTML] {len(page)} chars")
+    assert "<th>WOS / Micro</th>" in page and "<td>85.21 (±0.1)</td>" in page
+    assert "TextRCNN & GCN" in page and "Table 1: Main results." in page
+    
+    page = service.render_table_page({"slide_title": "T",
+                                      "table": {"columns": ["A", "B"], "rows": [["1", "2"]]}})
+    assert "<th>B</th>" in page and "<td>2</td>" in page
+
+
+if __name__ == "__main__":
+    test_parse_spans()
+    test_parse_time_data()
+    test_render_table_page()
@@ -0,0 +1,118 @@
+"""测试文档上传 - multipart流式落盘、大小限制与MinerU句柄"""
+
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.main import app
+from app.core.config import settings
+from app.services.document import upload_service
+from app.services.document.upload_service import UploadTooLargeError, receive_upload
+from app.services.artifacts.artifact_store import load_artifact
+
+BOUNDARY = "----keenpoint-test"
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 400 + b"\n%%EOF"
+
+
+def _multipart(name: str, data: bytes, field: str = "file") -> bytes:
+    return (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+            f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{name}\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def _chunks(body: bytes, size: int = 4096):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def _receive(body: bytes, folder: str, **kwargs):
+    return asyncio.run(receive_upload(f"multipart/form-data; boundary={BOUNDARY}",
+                                      _chunks(body), upload_dir=folder, **kwargs))
+
+
+def test_receive_upload():
+    """测试分块写入、超限中止与类型校验"""
+    print("=" * 60)
+    print("TEST: receive_upload")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        upload = _receive(_multipart("paper.PDF", PDF), tmp)
+        print(f"\n[Upload] {upload}")
+        assert upload["file_name"] == "paper.PDF"
+        assert upload["size"] == len(PDF)
+        assert Path(upload["path"]).read_bytes() == PDF
+        assert Path(upload["path"]).name == f"{upload['document_id']}.pdf"
+        
+        cases = [
+            (_multipart("paper.pdf", PDF), {"max_bytes": len(PDF) // 2}, UploadTooLargeError),
+            (_multipart("paper.pdf", PDF), {"max_bytes": 10, "content_length": len(PDF) * 2},
+             UploadTooLargeError),
+            (_multipart("notes.txt", b"text"), {}, ValueError),
+            (_multipart("paper.pdf", PDF, field="other"), {}, ValueError),
+            (_multipart("", b""), {}, ValueError),  # 未选择文件: filename=""
+            (_multipart("", PDF), {}, ValueError),
+            (_multipart("paper.pdf", b""), {}, ValueError),
+        ]
+        for body, kwargs, error in cases:
+            try:
+                _receive(body, tmp, **kwargs)
+            except error as e:
+                print(f"[Rejected] {type(e).__name__}: {e}")
+            else:
+                raise AssertionError(f"expected {error.__name__} for {kwargs}")
+        
+        # 被拒绝的上传不留下临时文件
+        assert sorted(p.name for p in Path(tmp).iterdir()) == [Path(upload["path"]).name]
+
+
+def test_upload_route():
+    """测试 /documents 路由: 上传 → MinerU → 解析产物"""
+    print("=" * 60)
+    print("TEST: POST /api/v1/documents")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        extract_dir = Path(tmp) / "extract"
+        extract_dir.mkdir()
+        (extract_dir / "full.md").write_text("# 1 Introduction\n\nHello world.\n", encoding="utf-8")
+        seen = []
+        
+        async def fake_process_files(file_paths, *args, **kwargs):
+            seen.extend(file_paths)
+            return [{"file_name": Path(file_paths[0]).name, "state": "done", "extract_dir": str(extract_dir)}]
+        
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                ok = await client.post("/api/v1/documents", files={"file": ("paper.pdf", PDF, "application/pdf")})
+                big = await client.post("/api/v1/documents", files={"file": ("big.pdf", PDF * 3)})
+                bad = await client.post("/api/v1/documents", files={"file": ("a.docx", b"x")})
+                return ok, big, bad
+        
+        original = (upload_service.mineru_client.process_files, settings.UPLOAD_DIR, settings.MAX_UPLOAD_SIZE)
+        upload_service.mineru_client.process_files = fake_process_files
+        settings.UPLOAD_DIR, settings.MAX_UPLOAD_SIZE = tmp, len(PDF) * 2
+        try:
+            ok, big, bad = asyncio.run(run())
+        finally:
+            upload_service.mineru_client.process_files, settings.UPLOAD_DIR, settings.MAX_UPLOAD_SIZE = original
+        
+        assert ok.status_code == 200, ok.text
+        handle = ok.json()["data"]
+        print(f"\n[Handle] {handle}")
+        assert Path(seen[0]).read_bytes() == PDF
+        assert handle["md_path"] == str(extract_dir / "full.md")
+        assert load_artifact(handle["parse_result_id"])["sections"]
+        assert big.status_code == 413
+        assert bad.status_code == 400
+
+
+if __name__ == "__main__":
+    test_receive_upload()
+    test_upload_route()